@@ -0,0 +1,83 @@
+"""
+Benchmark applying recap clause amendments to a long template
+
+Builds a template of numbered clauses with printed line numbers and a recap
+with many clause and line amendments, then times finding, resolving and
+splicing them into the document.
+
+Usage:
+    python benchmarks/bench_clause_amendments.py [clauses] [amendments]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from docx import Document
+
+from document_processor import DocumentProcessor
+from src.generators.clause_amender import ClauseAmender, find_amendments
+
+LINES_PER_CLAUSE = 5
+
+def make_template(clauses: int) -> Document:
+    """A template whose clauses each span several numbered lines"""
+    doc = Document()
+    line = 0
+    for number in range(1, clauses + 1):
+        for k in range(LINES_PER_CLAUSE):
+            line += 1
+            text = f"{number}. Clause {number} heading text" if k == 0 else "clause body text continues here"
+            doc.add_paragraph(f"{text} {line}")
+    return doc
+
+def make_recap(clauses: int, amendments: int) -> str:
+    """Alternate clause rewrites, clause deletions and line deletions over the template"""
+    step = max(clauses // amendments, 1)
+    instructions = []
+    for k, number in enumerate(range(1, clauses + 1, step)):
+        if k % 3 == 0:
+            instructions.append(f'Clause {number} amended to read: "Clause {number} as agreed in the recap."')
+        elif k % 3 == 1:
+            instructions.append(f"Clause {number} deleted")
+        else:
+            first = (number - 1) * LINES_PER_CLAUSE + 2
+            instructions.append(f"Delete lines {first}-{first + 1}")
+    return "\n\n".join(instructions[:amendments])
+
+def main():
+    args = sys.argv[1:]
+    clauses = int(args[0]) if args else 2000
+    amendments = int(args[1]) if len(args) > 1 else 500
+    
+    recap = make_recap(clauses, amendments)
+    doc = make_template(clauses)
+    paragraphs = [paragraph.text for paragraph in doc.paragraphs]
+    
+    start = time.perf_counter()
+    found = find_amendments(recap)
+    find_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    amender = ClauseAmender(paragraphs)
+    index_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    resolved = amender.resolve(found)
+    resolve_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    DocumentProcessor().apply_clause_amendments(doc, recap)
+    apply_time = time.perf_counter() - start
+    
+    applied = sum(1 for amendment in resolved if amendment["status"] == "applied")
+    print(f"{len(paragraphs)} template paragraphs, {len(found)} amendments, {applied} applied")
+    print(f"  find in recap:    {find_time:.3f}s")
+    print(f"  index template:   {index_time:.3f}s")
+    print(f"  resolve targets:  {resolve_time:.3f}s")
+    print(f"  apply end to end: {apply_time:.3f}s")
+
+if __name__ == "__main__":
+    main()
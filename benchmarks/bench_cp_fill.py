@@ -0,0 +1,95 @@
+"""
+Benchmark filling template text: slicing per field against the piece-table edit buffer
+
+Builds a long template with a blank every clause and a mapping per blank,
+then times the previous fill, which rebuilt the whole text with slicing for
+every field and again to highlight the HTML, against recording every value
+in an edit buffer and rendering the text and the highlighted HTML from it.
+
+Usage:
+    python benchmarks/bench_cp_fill.py [field counts...]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.generators.cp_generator import CPGenerator
+
+CLAUSE = ("{i}. The vessel shall load a full and complete cargo of ________ at the loading port "
+          "and the charterers shall pay freight as agreed in the recap of this charter party.\n")
+
+def make_template(fields: int):
+    """A template text with one blank per clause and a filled mapping for each blank"""
+    parts, mappings, offset = [], [], 0
+    for i in range(fields):
+        clause = CLAUSE.format(i=i + 1)
+        start = offset + clause.index("________")
+        mappings.append({
+            "field_id": f"field_{i + 1}", "field_type": "cargo", "field_position": (start, start + 8),
+            "filled": True, "confidence": 0.9, "mapped_term": {"value": f"WHEAT IN BULK {i}"}
+        })
+        parts.append(clause)
+        offset += len(clause)
+    return {"original_data": {"original_text": "".join(parts)}}, mappings
+
+def sliced_fill(template_data: dict, field_mappings: list):
+    """The previous fill: slice the text for every field, last first, then again to highlight"""
+    filled_text = template_data["original_data"]["original_text"]
+    modifications = []
+    for mapping in sorted(field_mappings, key=lambda m: m["field_position"][0], reverse=True):
+        start, end = mapping["field_position"]
+        value = mapping["mapped_term"]["value"]
+        modifications.append({"position": (start, end), "old_text": filled_text[start:end], "new_text": value})
+        filled_text = filled_text[:start] + value + filled_text[end:]
+    
+    html, current = "", 0
+    for modification in sorted(modifications, key=lambda m: m["position"][0]):
+        start, end = modification["position"]
+        html += filled_text[current:start]
+        html += f'<span class="modified">{modification["new_text"]}</span>'
+        current = end
+    html += filled_text[current:]
+    return filled_text, html
+
+def buffered_fill(generator: CPGenerator, template_data: dict, field_mappings: list):
+    """Fill through the edit buffer, rendering the text and the highlighted HTML"""
+    filled = asyncio.run(generator._fill_template(template_data, field_mappings, "text"))
+    original_text = template_data["original_data"]["original_text"]
+    html = generator._highlight_modifications_in_html(original_text, filled["modifications"])
+    return filled["content"], html
+
+def unhighlighted(html: str) -> str:
+    """Strip the highlight markup, leaving the text it was rendered from"""
+    return html.replace('<span class="modified">', "").replace("</span>", "")
+
+def best_time(func, runs: int = 3) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [500, 2000, 10000]
+    generator = CPGenerator()
+    
+    for count in counts:
+        template_data, field_mappings = make_template(count)
+        old_text, old_html = sliced_fill(template_data, field_mappings)
+        new_text, new_html = buffered_fill(generator, template_data, field_mappings)
+        print(f"{count} fields, {len(template_data['original_data']['original_text'])} chars, "
+              f"identical text: {old_text == new_text}, highlights in place: "
+              f"{unhighlighted(old_html) == old_text} before, {unhighlighted(new_html) == new_text} now")
+        sliced = best_time(lambda: sliced_fill(template_data, field_mappings))
+        buffered = best_time(lambda: buffered_fill(generator, template_data, field_mappings))
+        print(f"  slicing per field: {sliced:.3f}s")
+        print(f"  edit buffer:       {buffered:.3f}s ({sliced / buffered:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark the streaming DOCX extractor against python-docx and docx2txt
+
+Builds a table-heavy recap (or uses the given file) and times each way of
+getting its text.
+
+Usage:
+    python benchmarks/bench_docx_extraction.py [path/to/recap.docx] [rows]
+"""
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.extractors.docx_extractor import DOCXExtractor
+
+def make_table_recap(path: str, rows: int):
+    """Write a recap with a long terms table that includes merged cells"""
+    from docx import Document
+    
+    doc = Document()
+    doc.add_paragraph("RECAP - M/V OCEAN STAR")
+    table = doc.add_table(rows=rows, cols=4)
+    for r in range(rows):
+        cells = table.rows[r].cells
+        cells[0].text = f"{r + 1})"
+        cells[1].text = "Freight"
+        cells[2].text = f"USD {r}.50 per MT"
+        cells[3].text = "Basis 1/1 GENCON"
+        # Merge every tenth row's value cells, as recap term tables often do
+        if r % 10 == 0:
+            cells[2].merge(cells[3])
+    doc.add_paragraph("Terms: As per GENCON with usual exceptions")
+    doc.save(path)
+
+def python_docx_text(file_path: str) -> str:
+    """The parsers' previous path: paragraphs, then every table cell via row.cells"""
+    from docx import Document
+    
+    doc = Document(file_path)
+    text = ""
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + "\n"
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                text += cell.text + "\t"
+            text += "\n"
+    return text
+
+def docx2txt_text(file_path: str) -> str:
+    """DocumentProcessor's previous path"""
+    import docx2txt
+    return docx2txt.process(file_path)
+
+def best_time(func, file_path: str, runs: int = 3) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(file_path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    args = sys.argv[1:]
+    generated = None
+    
+    if args and args[0].endswith(".docx"):
+        file_path = args[0]
+    else:
+        rows = int(args[0]) if args else 2000
+        fd, generated = tempfile.mkstemp(suffix=".docx")
+        os.close(fd)
+        make_table_recap(generated, rows)
+        file_path = generated
+    
+    try:
+        candidates = {
+            "streaming": DOCXExtractor().extract_text,
+            "python-docx": python_docx_text,
+            "docx2txt": docx2txt_text
+        }
+        
+        print(f"{Path(file_path).name}: {os.path.getsize(file_path) / 1024:.0f} KB")
+        baseline = best_time(candidates["streaming"], file_path)
+        print(f"  streaming:   {baseline:.3f}s")
+        for name in ("python-docx", "docx2txt"):
+            try:
+                elapsed = best_time(candidates[name], file_path)
+            except ImportError:
+                print(f"  {name + ':':12s} not installed")
+                continue
+            print(f"  {name + ':':12s} {elapsed:.3f}s ({elapsed / baseline:.1f}x slower)")
+    finally:
+        if generated:
+            os.unlink(generated)
+
+if __name__ == "__main__":
+    main()
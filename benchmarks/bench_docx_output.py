@@ -0,0 +1,121 @@
+"""
+Benchmark DOCX output: python-docx fill and save against patching the template runs in place
+
+Builds DOCX templates of numbered clauses in formatted runs with a few JSON
+placeholders, compiles each once, then times filling a python-docx copy of
+the compiled template and saving it, the way generation worked before
+in-place output, against patching the placeholders' runs in the template
+XML, which recompresses only the parts of the XML the edits touch.
+
+Usage:
+    python benchmarks/bench_docx_output.py [clause counts...]
+"""
+
+import io
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from docx import Document
+from docx.shared import RGBColor
+
+from document_processor import DocumentProcessor
+from src.extractors.docx_extractor import DOCXExtractor
+
+RECAP_DATA = {
+    "vessel_name": "M/V OCEAN STAR",
+    "cargo_type": "Iron Ore",
+    "loading_port": "Port Hedland",
+    "charterer": "ABC Trading Ltd"
+}
+
+def make_docx_template(path: str, clauses: int):
+    """Write a template of numbered clauses, a placeholder in every hundredth"""
+    doc = Document()
+    fields = list(RECAP_DATA)
+    for i in range(clauses):
+        paragraph = doc.add_paragraph()
+        paragraph.add_run(f"{i + 1}. ").bold = True
+        paragraph.add_run("The vessel shall proceed with all convenient speed as ordered ")
+        if i % 100 == 0:
+            paragraph.add_run(f"{{${fields[i // 100 % len(fields)]}}}").italic = True
+        paragraph.add_run(" and the charterers shall pay freight as agreed.")
+    doc.save(path)
+
+def docx_paragraphs(doc):
+    """Yield body paragraphs, then table cell paragraphs"""
+    yield from doc.paragraphs
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                yield from cell.paragraphs
+
+def docx_fill(processor: DocumentProcessor, compiled: dict) -> bytes:
+    """Fill a python-docx copy of the compiled template, rebuilding placeholder paragraphs, and save it"""
+    doc = Document(io.BytesIO(compiled["patcher"].docx))
+    field_mappings = processor._create_field_mappings(RECAP_DATA)
+    
+    for paragraph in docx_paragraphs(doc):
+        text = paragraph.text
+        matches = list(processor.JSON_PLACEHOLDER_PATTERN.finditer(text))
+        if not matches:
+            continue
+        paragraph.clear()
+        current = 0
+        for match in matches:
+            if match.start() > current:
+                paragraph.add_run(text[current:match.start()])
+            value = field_mappings.get(match.group(0), match.group(0))
+            run = paragraph.add_run(value)
+            if value != match.group(0):
+                run.font.color.rgb = RGBColor(255, 0, 0)
+                run.font.bold = True
+            current = match.end()
+        if current < len(text):
+            paragraph.add_run(text[current:])
+    
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def best_time(func, runs: int = 3) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 5000, 20000]
+    extractor = DOCXExtractor()
+    
+    for count in counts:
+        fd, path = tempfile.mkstemp(suffix=".docx")
+        os.close(fd)
+        try:
+            make_docx_template(path, count)
+            processor = DocumentProcessor()
+            start = time.perf_counter()
+            compiled = processor._compiled_template(path)
+            compile_time = time.perf_counter() - start
+            
+            filled = extractor.extract_text(io.BytesIO(docx_fill(processor, compiled)))
+            patched = extractor.extract_text(io.BytesIO(processor._patch_compiled_template(compiled, RECAP_DATA)))
+            print(f"{count} clauses, {len(compiled['placeholders'])} placeholders, "
+                  f"{len(compiled['patcher'].xml)} chars of XML, identical text: {filled == patched}")
+            rebuilt = best_time(lambda: docx_fill(processor, compiled))
+            in_place = best_time(lambda: processor._patch_compiled_template(compiled, RECAP_DATA))
+            print(f"  compile once:         {compile_time:.3f}s")
+            print(f"  python-docx and save: {rebuilt:.3f}s per generation")
+            print(f"  patch in place:       {in_place:.3f}s per generation ({rebuilt / in_place:.1f}x faster)")
+        finally:
+            os.unlink(path)
+
+if __name__ == "__main__":
+    main()
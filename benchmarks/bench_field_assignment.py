@@ -0,0 +1,145 @@
+"""
+Benchmark field mapping: independent best terms against one global assignment
+
+Builds templates whose blanks repeat the standard field types and add custom
+clause blanks with no direct recap mapping, then times the previous mapping,
+where each field takes its own best direct or semantic term, against the
+assignment of terms to all field types at once. Also times the solver alone
+on large random score tables, against its greedy fallback.
+
+Usage:
+    python benchmarks/bench_field_assignment.py [field counts...]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.generators.cp_generator import CPGenerator
+from src.utils.assignment import assign, greedy_assign
+
+STANDARD_FIELDS = {
+    "vessel_name": "Vessel name ______ flag",
+    "charterer": "Charterers ______ of London",
+    "owner": "Owners ______ disponent",
+    "cargo": "cargo of ______ in bulk",
+    "quantity": "quantity ______ metric tons",
+    "load_port": "loading port ______ one safe berth",
+    "discharge_port": "discharging port ______ one safe berth",
+    "freight_rate": "freight ______ per metric ton",
+    "laycan_start": "laydays not to commence before ______",
+    "laycan_end": "cancelling date ______"
+}
+
+CLAUSE_PHRASES = [
+    "demurrage per day or pro rata", "despatch half demurrage on laytime saved",
+    "brokerage commission on freight", "address commission to charterers",
+    "ice clause applies at loading", "general average to be settled in London",
+    "bills of lading to be signed", "notice of readiness to be tendered"
+]
+
+RECAP_TERMS = {
+    "vessel": "vessel ocean star", "charterer": "charterers abc trading",
+    "owner": "owners xyz shipping", "cargo": "cargo wheat in bulk",
+    "quantity": "quantity 50000 metric tons", "load_port": "load port santos",
+    "discharge_port": "discharge port qingdao", "freight": "freight usd 25.50 per metric ton",
+    "laycan": "laycan 1-5 march", "demurrage": "demurrage usd 20000 per day pro rata",
+    "despatch": "despatch half demurrage laytime saved", "brokerage": "brokerage 1.25 pct on freight",
+    "ice": "vessel not to force ice at loading", "average": "general average york antwerp rules london"
+}
+
+def make_recap_terms() -> dict:
+    """Recap terms in the order they appear, with their recap offsets"""
+    terms, offset = {}, 0
+    for key, match in RECAP_TERMS.items():
+        terms[key] = {"value": key.upper(), "confidence": 0.8, "original_match": match,
+                      "position": (offset, offset + len(match))}
+        offset += len(match) + 2
+    return terms
+
+def make_fields(count: int, seed: int = 1) -> list:
+    """Standard blanks repeated through the form, with custom clause blanks between them"""
+    rng = random.Random(seed)
+    fields = []
+    for i in range(count):
+        if i % 3:
+            field_type, context = rng.choice(list(STANDARD_FIELDS.items()))
+        else:
+            field_type = f"clause_{rng.randrange(count // 6 + 1)}"
+            context = f"{rng.choice(CLAUSE_PHRASES)} ______"
+        fields.append({"id": f"field_{i + 1}", "type": field_type,
+                       "position": (i * 100, i * 100 + 6), "context": context})
+    return fields
+
+def independent_mapping(generator: CPGenerator, fields: list, recap_terms: dict) -> list:
+    """The previous mapping: each field's direct term, else its most similar term, as term keys"""
+    keys = list(recap_terms)
+    chosen = []
+    for field in fields:
+        direct = generator._direct_term(field["type"], recap_terms)
+        chosen.append(direct[0] if direct else None)
+    
+    unmapped = [i for i, key in enumerate(chosen) if key is None]
+    similarities = generator._semantic_similarities([fields[i] for i in unmapped], recap_terms)
+    if similarities is not None:
+        for i, row in zip(unmapped, similarities):
+            j = row.argmax()
+            if row[j] > generator.similarity_threshold:
+                chosen[i] = keys[j]
+    return chosen
+
+def global_mapping(generator: CPGenerator, fields: list, recap_terms: dict) -> list:
+    """The assignment of terms to all field types at once, as term keys"""
+    mappings = asyncio.run(generator._map_terms_to_fields(recap_terms, {"structured_fields": fields}))
+    return [m["mapped_term"]["value"].lower() if m["filled"] else None for m in mappings]
+
+def shared_terms(fields: list, chosen: list) -> int:
+    """Count terms filling more than one field type, besides the laycan's two ends"""
+    types = {}
+    for field, key in zip(fields, chosen):
+        if key and key != "laycan":
+            types.setdefault(key, set()).add(field["type"])
+    return sum(len(field_types) > 1 for field_types in types.values())
+
+def best_time(func, runs: int = 3) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 500, 2000]
+    generator = CPGenerator()
+    recap_terms = make_recap_terms()
+    
+    for count in counts:
+        fields = make_fields(count)
+        old = independent_mapping(generator, fields, recap_terms)
+        new = global_mapping(generator, fields, recap_terms)
+        print(f"{count} fields, {len(recap_terms)} terms: filled {sum(map(bool, old))} -> {sum(map(bool, new))}, "
+              f"terms shared across field types {shared_terms(fields, old)} -> {shared_terms(fields, new)}")
+        independent = best_time(lambda: independent_mapping(generator, fields, recap_terms))
+        assigned = best_time(lambda: global_mapping(generator, fields, recap_terms))
+        print(f"  independent best terms: {independent:.3f}s")
+        print(f"  global assignment:      {assigned:.3f}s")
+    
+    rng = random.Random(7)
+    for size in (200, 1000):
+        scores = {(r, c): rng.random() for r in range(size) for c in range(size) if rng.random() < 0.2}
+        capacities = [rng.randint(1, 2) for _ in range(size)]
+        optimal = assign(scores, size, capacities)
+        greedy = greedy_assign(scores, capacities)
+        print(f"solver, {size} x {size} with {len(scores)} scores: total "
+              f"{sum(scores[p] for p in optimal.items()):.1f} optimal, {sum(scores[p] for p in greedy.items()):.1f} greedy")
+        print(f"  linear sum assignment: {best_time(lambda: assign(scores, size, capacities)):.3f}s")
+        print(f"  greedy fallback:       {best_time(lambda: greedy_assign(scores, capacities)):.3f}s")
+
+if __name__ == "__main__":
+    main()
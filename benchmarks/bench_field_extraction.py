@@ -0,0 +1,95 @@
+"""
+Benchmark DocumentProcessor keyword field extraction before and after precompiling
+
+Usage:
+    python benchmarks/bench_field_extraction.py [recap files...]
+
+Without arguments every recap under uploads/ is used.
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from document_processor import DocumentProcessor
+
+def finditer_fields(processor: DocumentProcessor, text: str) -> dict:
+    """The previous extraction: three patterns built and scanned per keyword"""
+    text_lower = text.lower()
+    extracted = {}
+    
+    for field, keywords in processor.common_cp_fields.items():
+        for keyword in keywords:
+            value = None
+            for pattern in (rf"{keyword}\s*:?\s*([^\n\r]+)",
+                            rf"{keyword}\s+([A-Z][^\n\r]+)",
+                            rf"^{keyword}\s*:?\s*([^\n\r]+)"):
+                for match in re.finditer(pattern, text_lower, re.MULTILINE | re.IGNORECASE):
+                    cleaned = processor._clean_extracted_value(text[match.start(1):match.end(1)].strip(), field)
+                    if cleaned and len(cleaned) > 2 and processor._is_valid_field_value(cleaned, field):
+                        value = cleaned
+                        break
+                if value:
+                    break
+            if value:
+                extracted[field] = value
+                break
+    
+    for field, field_patterns in processor.specific_patterns.items():
+        for pattern in field_patterns:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            if matches:
+                extracted[field] = matches[0]
+                break
+    
+    return extracted
+
+def scanner_fields(processor: DocumentProcessor, text: str) -> dict:
+    """The precompiled keyword scanners"""
+    text_lower = text.lower()
+    extracted = {}
+    
+    for field, keywords in processor.common_cp_fields.items():
+        value = processor._extract_field_value(text, text_lower, keywords, field)
+        if value:
+            extracted[field] = value
+    
+    extracted.update(processor._extract_specific_patterns(text))
+    return extracted
+
+def best_time(func, *args, runs: int = 5) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    processor = DocumentProcessor()
+    root = Path(__file__).parent.parent
+    files = [Path(f) for f in sys.argv[1:]] or sorted((root / "uploads").glob("recap_*"))
+    
+    total_before = total_after = 0.0
+    for file_path in files:
+        text = processor.extract_text_from_file(str(file_path))
+        if not text:
+            print(f"{file_path.name}: skipped (no text)")
+            continue
+        
+        assert finditer_fields(processor, text) == scanner_fields(processor, text)
+        before = best_time(finditer_fields, processor, text)
+        after = best_time(scanner_fields, processor, text)
+        total_before += before
+        total_after += after
+        print(f"{file_path.name}: {len(text)} chars, {before * 1000:.2f}ms -> {after * 1000:.2f}ms")
+    
+    if total_after:
+        print(f"total: {total_before * 1000:.1f}ms -> {total_after * 1000:.1f}ms ({total_before / total_after:.1f}x)")
+
+if __name__ == "__main__":
+    main()
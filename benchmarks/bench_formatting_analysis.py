@@ -0,0 +1,92 @@
+"""
+Benchmark template formatting statistics: separate scans against one pass over lines
+
+Builds a template of the given number of pages (about 55 lines each, with
+numbered clauses, lettered sub-items and blanks) and times the previous
+statistics, one scan of the whole text each, against the single-pass
+FormattingAnalyzer.
+
+Usage:
+    python benchmarks/bench_formatting_analysis.py [pages]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.preprocessors.formatting_analyzer import analyze_formatting
+
+def make_template(pages: int) -> str:
+    """Pages of clause headings, indented wording, lettered sub-items and blank lines"""
+    lines = []
+    for page in range(pages):
+        for line in range(55):
+            number = page * 55 + line
+            if line % 11 == 0:
+                lines.append(f"{number}. CLAUSE {number}")
+            elif line % 11 == 5:
+                lines.append("")
+            elif line % 11 == 8:
+                lines.append("    a) at 5% more or less in Owners' option, about ______ (metric) tons")
+            else:
+                lines.append("    The vessel shall load at [port] the cargo at $ ____ per ton as agreed.")
+    return "\n".join(lines)
+
+def separate_scans(text: str) -> dict:
+    """The previous statistics, each walking the full text"""
+    indentation = {}
+    for line in text.split('\n'):
+        if line.strip():
+            indent = len(line) - len(line.lstrip())
+            indentation[indent] = indentation.get(indent, 0) + 1
+    
+    schemes = []
+    if re.search(r'^\s*\d+\.', text, re.MULTILINE):
+        schemes.append("numeric_dot")
+    if re.search(r'^\s*[a-z]\)', text, re.MULTILINE):
+        schemes.append("letter_parenthesis")
+    if re.search(r'^\s*\([a-z]\)', text, re.MULTILINE):
+        schemes.append("parenthesis_letter")
+    if re.search(r'^\s*[ivx]+\.', text, re.MULTILINE):
+        schemes.append("roman_dot")
+    
+    return {
+        "line_breaks": text.count('\n'),
+        "paragraph_breaks": len(re.findall(r'\n\s*\n', text)),
+        "indentation_patterns": indentation,
+        "numbering_schemes": schemes,
+        "special_characters": {
+            "underscores": text.count('_'),
+            "brackets": text.count('[') + text.count(']'),
+            "parentheses": text.count('(') + text.count(')'),
+            "dollar_signs": text.count('$'),
+            "percent_signs": text.count('%')
+        }
+    }
+
+def best_time(func, runs: int = 5) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    text = make_template(pages)
+    
+    same = analyze_formatting(text) == separate_scans(text)
+    print(f"{pages} pages, {len(text)} chars, identical output: {same}")
+    
+    separate = best_time(lambda: separate_scans(text))
+    single = best_time(lambda: analyze_formatting(text))
+    print(f"  separate scans: {separate:.3f}s")
+    print(f"  single pass:    {single:.3f}s ({separate / single:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark peak memory of large-document PDF extraction
+
+Generates a synthetic PDF (1000 pages by default) and extracts it in a fresh
+process per mode, since peak RSS is a per-process high-water mark.
+
+Usage:
+    python benchmarks/bench_large_pdf_memory.py [pages]
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.extractors.pdf_extractor import PDFExtractor, peak_rss_mb
+
+LINES_PER_PAGE = 40
+
+def make_large_pdf(path: str, pages: int):
+    """Write a PDF with a full page of charter party text on every page"""
+    from reportlab.pdfgen import canvas
+    
+    pdf = canvas.Canvas(path)
+    for page in range(1, pages + 1):
+        for line in range(LINES_PER_PAGE):
+            pdf.drawString(
+                40, 780 - line * 18,
+                f"Clause {page}.{line} The vessel shall load at the port of loading with due despatch."
+            )
+        pdf.showPage()
+    pdf.save()
+
+def run_mode(file_path: str, mode: str) -> dict:
+    """Extract in this process and report the result as JSON"""
+    if mode == "list":
+        # Hold every page before joining, as extraction did before streaming
+        extractor = PDFExtractor(max_workers=1, large_document_pages=sys.maxsize)
+        pages = extractor.extract_pages(file_path)
+        text = "".join(p["text"] + "\n" for p in pages if p["text"])
+    else:
+        extractor = PDFExtractor(max_workers=1, large_document_pages=1)
+        text = extractor.extract_text(file_path)
+    
+    stats = dict(extractor.last_stats)
+    stats["peak_rss_mb"] = peak_rss_mb()
+    stats["characters"] = len(text)
+    return stats
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--run":
+        print(json.dumps(run_mode(sys.argv[2], sys.argv[3])))
+        return
+    
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    fd, file_path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    
+    try:
+        make_large_pdf(file_path, pages)
+        print(f"{pages} pages, {os.path.getsize(file_path) / 1024 / 1024:.1f} MB")
+        
+        for mode in ("list", "large"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--run", file_path, mode],
+                capture_output=True, text=True, check=True
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(f"  {mode:6s} peak RSS {stats['peak_rss_mb']} MB, "
+                  f"{stats['elapsed_seconds']:.2f}s, {stats['characters']} chars")
+    finally:
+        os.unlink(file_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark match deduplication with pairwise overlap checks against an IntervalIndex
+
+Usage:
+    python benchmarks/bench_match_dedup.py [match count]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.interval_index import IntervalIndex
+
+def make_matches(count: int, seed: int = 1) -> list:
+    """Generate recap-like matches: short spans, many overlapping, spread over the text"""
+    rng = random.Random(seed)
+    text_length = count * 20
+    matches = []
+    for _ in range(count):
+        start = rng.randrange(text_length)
+        matches.append({
+            "confidence": rng.choice([0.6, 0.7, 0.8, 0.9]),
+            "position": (start, start + rng.randint(5, 60))
+        })
+    matches.sort(key=lambda x: (x['confidence'], -x['position'][0]), reverse=True)
+    return matches
+
+def pairwise_dedup(matches: list) -> list:
+    """The previous deduplication: every match compared with every accepted one"""
+    unique_matches = []
+    for match in matches:
+        if not any(
+            min(match['position'][1], existing['position'][1]) -
+            max(match['position'][0], existing['position'][0]) > 0
+            for existing in unique_matches
+        ):
+            unique_matches.append(match)
+    return unique_matches
+
+def indexed_dedup(matches: list) -> list:
+    """Deduplication with a sorted interval index"""
+    unique_matches = []
+    accepted = IntervalIndex()
+    for match in matches:
+        if accepted.add(*match['position']):
+            unique_matches.append(match)
+    return unique_matches
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 5000, 10000]
+    for count in counts:
+        matches = make_matches(count)
+        before, before_time = timed(pairwise_dedup, matches)
+        after, after_time = timed(indexed_dedup, matches)
+        assert before == after
+        print(
+            f"{count} matches ({len(after)} kept): {before_time * 1000:.1f}ms -> "
+            f"{after_time * 1000:.1f}ms ({before_time / after_time:.0f}x)"
+        )
+
+if __name__ == "__main__":
+    main()
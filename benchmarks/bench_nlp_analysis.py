@@ -0,0 +1,65 @@
+"""
+Benchmark RecapParser NLP analysis: one full-pipeline call against batched paragraphs
+
+Usage:
+    python benchmarks/bench_nlp_analysis.py [--copies N] [--batch-size N] [--n-process N] [recap files...]
+
+The recaps (every recap under uploads/ by default) are concatenated N times
+to make one large document. Needs the spaCy model to be installed.
+"""
+
+import argparse
+import sys
+import time
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.parsers.recap_parser import RecapParser
+
+ENTITY_LABELS = ['ORG', 'GPE', 'MONEY', 'DATE', 'PRODUCT']
+
+def full_pipeline(nlp, text: str) -> int:
+    """The previous analysis: the whole text through every component in one call"""
+    doc = nlp(text)
+    entities = [ent for ent in doc.ents if ent.label_ in ENTITY_LABELS]
+    phrases = [chunk for chunk in doc.noun_chunks if len(chunk.text.split()) > 1]
+    return len(entities) + len(phrases)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("files", nargs="*")
+    args = parser.parse_args()
+    
+    logging.disable(logging.WARNING)
+    recap_parser = RecapParser(nlp_batch_size=args.batch_size, nlp_n_process=args.n_process)
+    if recap_parser.nlp is None:
+        print(f"spaCy model {RecapParser.NLP_MODEL} is not installed, nothing to benchmark")
+        return
+    
+    root = Path(__file__).parent.parent
+    files = [Path(f) for f in args.files] or sorted((root / "uploads").glob("recap_*"))
+    text = "\n\n".join("".join(recap_parser._iter_text(str(f))) for f in files) * args.copies
+    print(f"{len(files)} recaps x {args.copies}: {len(text)} characters, max_length {recap_parser.nlp.max_length}")
+    
+    if len(text) <= recap_parser.nlp.max_length:
+        started = time.perf_counter()
+        found = full_pipeline(recap_parser.nlp, text)
+        print(f"full pipeline, one call: {time.perf_counter() - started:.2f}s ({found} entities and phrases)")
+    else:
+        print("full pipeline, one call: fails, text exceeds max_length")
+    
+    started = time.perf_counter()
+    analysis = recap_parser._perform_nlp_analysis(text)
+    found = len(analysis["entities"]) + len(analysis["key_phrases"])
+    print(
+        f"batched paragraphs (batch {args.batch_size}, {args.n_process} process): "
+        f"{time.perf_counter() - started:.2f}s ({found} entities and phrases)"
+    )
+
+if __name__ == "__main__":
+    main()
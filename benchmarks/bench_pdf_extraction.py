@@ -0,0 +1,48 @@
+"""
+Benchmark sequential vs page-parallel PDF text extraction
+
+Usage:
+    python benchmarks/bench_pdf_extraction.py path/to/template.pdf [workers]
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.extractors.pdf_extractor import PDFExtractor
+
+def time_extraction(extractor: PDFExtractor, file_path: str, runs: int = 3) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        extractor.extract_text(file_path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    
+    file_path = sys.argv[1]
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    
+    sequential = PDFExtractor(max_workers=1)
+    parallel = PDFExtractor(max_workers=workers, min_parallel_pages=1)
+    
+    pages = sequential.page_count(file_path)
+    assert sequential.extract_text(file_path) == parallel.extract_text(file_path)
+    
+    seq_time = time_extraction(sequential, file_path)
+    par_time = time_extraction(parallel, file_path)
+    
+    print(f"{Path(file_path).name}: {pages} pages, {workers} workers")
+    print(f"  sequential: {seq_time:.3f}s")
+    print(f"  parallel:   {par_time:.3f}s ({seq_time / par_time:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Fuzz every regex rule set with adversarial long single-line text
+
+Each rule set is scanned once per generated line, under the regex guard. The
+lines repeat the literals the rules look for without ever completing a match,
+which is what makes backtracking patterns go quadratic or worse. The report
+lists the slowest line per rule set and every rule that tripped its budget.
+
+Usage:
+    python benchmarks/bench_regex_guard.py [--length N] [--budget SECONDS] [--unguarded]
+
+With --unguarded each line is also scanned without a guard, which can take
+minutes on long lines.
+"""
+
+import argparse
+import sys
+import time
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from document_processor import DocumentProcessor
+from src.parsers.recap_parser import RecapParser
+from src.parsers.template_parser import TemplateParser
+from src.preprocessors.template_preprocessor import TemplatePreprocessor
+from src.utils.pattern_scanner import PatternScanner
+from src.utils.regex_guard import RegexGuard
+
+# Fragments that open a match many rules cannot finish on a single line
+GENERIC_FRAGMENTS = ["lay ", "( ", "[ ", "_", "1", "1,", "$1.", " ", "to ", "usd ", ". "]
+
+def rule_sets(budget: float):
+    """Build every scanner the application runs, all guarded with the same budget"""
+    recap = RecapParser(regex_time_budget=budget)
+    template = TemplateParser(regex_time_budget=budget)
+    preprocessor = TemplatePreprocessor(regex_time_budget=budget)
+    processor = DocumentProcessor(regex_time_budget=budget)
+    
+    sets = [
+        ("recap terms", recap.term_scanner, recap.regex_guard),
+        ("template fields", template.field_scanner, template.regex_guard),
+        ("fillable areas", preprocessor.fillable_scanner, preprocessor.regex_guard),
+        ("recap specific patterns", processor.specific_scanner, processor.regex_guard),
+    ]
+    for field, keywords in processor.common_cp_fields.items():
+        sets.append((f"recap keywords: {field}", processor._keyword_scanner(keywords), processor.regex_guard))
+    return sets
+
+def adversarial_lines(scanner: PatternScanner, length: int):
+    """Yield single lines repeating each rule's literals and the generic fragments"""
+    fragments = set(GENERIC_FRAGMENTS)
+    for _, _, prefix, required in scanner.rules:
+        if prefix:
+            fragments.add(prefix + " ")
+        fragments.update(literal + " " for literal in required)
+    
+    for fragment in sorted(fragments):
+        yield fragment, (fragment * (length // len(fragment) + 1))[:length]
+
+def unguarded(scanner: PatternScanner) -> PatternScanner:
+    """A copy of a scanner that runs its rules with plain re and no budget"""
+    copy = PatternScanner({}, scanner.flags, guard=RegexGuard(None))
+    copy.rules = [
+        (name, copy.guard.compile(compiled.pattern, scanner.flags), prefix, required)
+        for name, compiled, prefix, required in scanner.rules
+    ]
+    copy.literal_index = scanner.literal_index
+    return copy
+
+def timed_scan(scanner: PatternScanner, text: str) -> float:
+    started = time.perf_counter()
+    for _ in scanner.iter_matches(text):
+        pass
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--length", type=int, default=20000, help="characters per adversarial line")
+    parser.add_argument("--budget", type=float, default=0.1, help="seconds per rule and text")
+    parser.add_argument("--unguarded", action="store_true", help="also time each line without the guard")
+    args = parser.parse_args()
+    
+    logging.disable(logging.WARNING)
+    engine = "regex (interruptible)" if RegexGuard(args.budget).interruptible else "re (overruns detected after the call)"
+    print(f"engine: {engine}, budget {args.budget}s per rule, lines of {args.length} characters")
+    
+    for name, scanner, guard in rule_sets(args.budget):
+        worst = (0.0, "")
+        worst_unguarded = (0.0, "")
+        tripped = set()
+        
+        for fragment, line in adversarial_lines(scanner, args.length):
+            guard.reset()
+            elapsed = timed_scan(scanner, line)
+            worst = max(worst, (elapsed, fragment))
+            tripped.update(rule["pattern"] for rule in guard.tripped)
+            
+            if args.unguarded:
+                worst_unguarded = max(worst_unguarded, (timed_scan(unguarded(scanner), line), fragment))
+        
+        report = f"{name}: {len(scanner.rules)} rules, slowest line {worst[1]!r} {worst[0]:.2f}s"
+        if args.unguarded:
+            report += f" (unguarded {worst_unguarded[1]!r} {worst_unguarded[0]:.2f}s)"
+        print(report)
+        for pattern in sorted(tripped):
+            print(f"    tripped: {pattern}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Report the start-up cost of each application component
+
+Every component is measured in a fresh interpreter: the time to import its
+module, to construct it, and to warm it up (load the NLP resources it uses on
+first call). Network access is blocked and every attempt is counted, so a
+component that tries to download data at start-up shows up in the report.
+
+Usage:
+    python benchmarks/bench_startup.py
+"""
+
+import json
+import socket
+import subprocess
+import sys
+import time
+import logging
+import importlib
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+def warm_recap_parser(parser):
+    parser.nlp
+    parser.stop_words
+
+def warm_cp_generator(generator):
+    generator.vectorizer
+
+# (name, module, class, warm-up called on the constructed object)
+COMPONENTS = [
+    ("RecapParser", "src.parsers.recap_parser", "RecapParser", warm_recap_parser),
+    ("TemplateParser", "src.parsers.template_parser", "TemplateParser", None),
+    ("TemplatePreprocessor", "src.preprocessors.template_preprocessor", "TemplatePreprocessor", None),
+    ("CPGenerator", "src.generators.cp_generator", "CPGenerator", warm_cp_generator),
+    ("DocumentProcessor", "document_processor", "DocumentProcessor", None),
+]
+
+def block_network() -> list:
+    """Refuse outgoing connections and record where they were going"""
+    attempts = []
+    
+    def refuse(sock, address, *args, **kwargs):
+        attempts.append(str(address))
+        raise OSError("network access blocked by bench_startup")
+    
+    socket.socket.connect = refuse
+    socket.socket.connect_ex = refuse
+    original_getaddrinfo = socket.getaddrinfo
+    
+    def lookup(host, *args, **kwargs):
+        attempts.append(str(host))
+        return original_getaddrinfo(host, *args, **kwargs)
+    
+    socket.getaddrinfo = lookup
+    return attempts
+
+def measure(name: str) -> dict:
+    """Measure one component in this interpreter"""
+    _, module_name, class_name, warm_up = next(c for c in COMPONENTS if c[0] == name)
+    attempts = block_network()
+    logging.disable(logging.WARNING)
+    
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    imported = time.perf_counter()
+    component = getattr(module, class_name)()
+    constructed = time.perf_counter()
+    if warm_up:
+        warm_up(component)
+    warmed = time.perf_counter()
+    
+    from src.utils.nlp_resources import LOAD_TIMES
+    return {
+        "import_seconds": round(imported - started, 3),
+        "construct_seconds": round(constructed - imported, 3),
+        "warmup_seconds": round(warmed - constructed, 3),
+        "network_attempts": attempts,
+        "lazy_loads": dict(LOAD_TIMES)
+    }
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--component":
+        print(json.dumps(measure(sys.argv[2])))
+        return
+    
+    print(f"{'component':<22}{'import':>9}{'construct':>11}{'warmup':>9}  network")
+    for name, *_ in COMPONENTS:
+        result = subprocess.run(
+            [sys.executable, __file__, "--component", name],
+            capture_output=True, text=True, cwd=ROOT
+        )
+        if result.returncode != 0:
+            print(f"{name:<22}failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        network = ", ".join(report["network_attempts"]) or "none"
+        print(
+            f"{name:<22}{report['import_seconds']:>8.2f}s{report['construct_seconds']:>10.2f}s"
+            f"{report['warmup_seconds']:>8.2f}s  {network}"
+        )
+        for resource, seconds in report["lazy_loads"].items():
+            print(f"    {resource}: {seconds:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark template field and clause extraction with and without family reuse
+
+Builds a long clause-numbered template, parses it once to register its family,
+then times a full parse of an edited copy against a parse that reuses the
+family's unchanged sections.
+
+Usage:
+    python benchmarks/bench_template_family.py [clauses] [edited clauses]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.parsers.template_parser import TemplateParser
+from src.utils.template_fingerprint import TemplateFingerprintIndex
+
+def make_sections(clauses: int):
+    """Clauses with a couple of fillable fields each, as in a long charter party form"""
+    return [
+        f"{i}. CLAUSE {i}\nThe vessel ______ shall load at ______ loading and the charterers "
+        f"shall pay demurrage: ______ per day. Laytime shall count as agreed, weather "
+        f"permitting, Sundays and holidays excepted, unless used, clause {i}."
+        for i in range(1, clauses + 1)
+    ]
+
+def best_time(func, runs: int = 3) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    args = sys.argv[1:]
+    clauses = int(args[0]) if args else 3000
+    edits = int(args[1]) if len(args) > 1 else 10
+    
+    sections = make_sections(clauses)
+    original = "\n\n".join(sections)
+    step = max(clauses // edits, 1)
+    for i in range(0, clauses, step):
+        sections[i] = sections[i].replace("as agreed", "as amended")
+    edited = "\n\n".join(sections)
+    
+    parser = TemplateParser()
+    parser._extract_fields_and_clauses(original)
+    # The index with only the original registered, restored before each timed run
+    snapshot = parser.fingerprints.to_dict()
+    
+    def full_parse():
+        return parser._extract_fields(edited), parser._extract_clauses(edited)
+    
+    def family_parse():
+        parser.fingerprints = TemplateFingerprintIndex.from_dict(snapshot)
+        return parser._extract_fields_and_clauses(edited)
+    
+    fields, clauses_found, family = family_parse()
+    same = (fields, clauses_found) == full_parse()
+    print(f"{clauses} clauses, {edits} edited: reused {family['reused_sections']} of "
+          f"{family['sections']} sections, identical output: {same}")
+    
+    full = best_time(full_parse)
+    reuse = best_time(family_parse)
+    print(f"  full parse:    {full:.3f}s")
+    print(f"  family reuse:  {reuse:.3f}s ({full / reuse:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
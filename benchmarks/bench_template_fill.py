@@ -0,0 +1,95 @@
+"""
+Benchmark filling a compiled template against reloading it for every generation
+
+Builds a long text template with dot placeholders (or uses the given PDF,
+DOCX or TXT template), then times loading, converting and filling it from
+scratch against patching the compiled template.
+
+Usage:
+    python benchmarks/bench_template_fill.py [path/to/template] [clauses]
+"""
+
+import io
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from document_processor import DocumentProcessor
+from src.extractors.docx_extractor import DOCXExtractor
+
+RECAP_DATA = {
+    "vessel_name": "M/V OCEAN STAR",
+    "cargo_type": "Iron Ore",
+    "loading_port": "Port Hedland",
+    "discharge_port": "Qingdao",
+    "freight_rate": "USD 25.50 per MT",
+    "demurrage": "USD 15,000 per day",
+    "charterer": "ABC Trading Ltd",
+    "owner": "XYZ Shipping Company"
+}
+
+def make_text_template(path: str, clauses: int):
+    """Write a template of numbered clauses, every fifth with a placeholder"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(clauses):
+            f.write(f"{i + 1}. The vessel shall proceed with all convenient speed as ordered. ")
+            if i % 5 == 0:
+                f.write("Cargo............ to be loaded at Loading________ as agreed.")
+            f.write("\n")
+
+def best_time(func, runs: int = 3) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    args = sys.argv[1:]
+    generated = None
+    
+    if args and Path(args[0]).suffix.lower() in (".pdf", ".docx", ".txt"):
+        template_path = args[0]
+    else:
+        clauses = int(args[0]) if args else 5000
+        fd, generated = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        make_text_template(generated, clauses)
+        template_path = generated
+    
+    try:
+        processor = DocumentProcessor()
+        extractor = DOCXExtractor()
+        
+        def full_update():
+            processor._compiled_templates.clear()
+            return processor._patch_compiled_template(processor._compiled_template(template_path), RECAP_DATA)
+        
+        start = time.perf_counter()
+        compiled = processor._compiled_template(template_path)
+        compile_time = time.perf_counter() - start
+        
+        def compiled_fill():
+            return processor._patch_compiled_template(compiled, RECAP_DATA)
+        
+        same = extractor.extract_text(io.BytesIO(full_update())) == extractor.extract_text(io.BytesIO(compiled_fill()))
+        
+        print(f"{Path(template_path).name}: {len(compiled['placeholders'])} placeholders, "
+              f"identical output: {same}")
+        full = best_time(full_update)
+        fill = best_time(compiled_fill)
+        print(f"  compile once:  {compile_time:.3f}s")
+        print(f"  full update:   {full:.3f}s per generation")
+        print(f"  compiled fill: {fill:.3f}s per generation ({full / fill:.1f}x faster)")
+    finally:
+        if generated:
+            os.unlink(generated)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark the precompiled term scanner against one finditer per pattern
+
+Usage:
+    python benchmarks/bench_term_scanner.py [recap files...]
+
+Without arguments every recap under uploads/ is used.
+"""
+
+import re
+import sys
+import time
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.parsers.recap_parser import RecapParser
+from src.extractors.text_stream import iter_paragraph_blocks, iter_with_lookahead
+
+def finditer_scan(term_patterns, windows):
+    """The previous scan: every pattern compiled at call time and run over each window"""
+    found = []
+    for text_lower, match_before in windows:
+        for term_type, patterns in term_patterns.items():
+            for pattern in patterns:
+                for match in re.finditer(pattern, text_lower, re.IGNORECASE | re.MULTILINE):
+                    if match.start() >= match_before:
+                        break
+                    found.append((term_type, match.span(), match.groups()))
+    return found
+
+def scanner_scan(scanner, windows):
+    """The precompiled scanner"""
+    return [
+        (term_type, match.span(), match.groups())
+        for text_lower, match_before in windows
+        for term_type, match in scanner.iter_matches(text_lower, match_before)
+    ]
+
+def block_windows(text_lower):
+    """The windows the parser scans while streaming: each block plus the next line"""
+    blocks = iter_paragraph_blocks(text_lower.splitlines(keepends=True))
+    return [(block + lookahead, len(block)) for block, lookahead in iter_with_lookahead(blocks)]
+
+def best_time(func, *args, runs: int = 5) -> float:
+    """Return the best wall time over several runs"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    logging.disable(logging.WARNING)
+    parser = RecapParser()
+    root = Path(__file__).parent.parent
+    files = [Path(f) for f in sys.argv[1:]] or sorted((root / "uploads").glob("recap_*"))
+    
+    totals = {"whole text": [0.0, 0.0], "streamed blocks": [0.0, 0.0]}
+    for file_path in files:
+        try:
+            text_lower = "".join(parser._iter_text(str(file_path))).lower()
+        except Exception as e:
+            print(f"{file_path.name}: skipped ({e})")
+            continue
+        
+        print(f"{file_path.name}: {len(text_lower)} chars")
+        for mode, windows in (("whole text", [(text_lower, len(text_lower))]),
+                              ("streamed blocks", block_windows(text_lower))):
+            assert finditer_scan(parser.term_patterns, windows) == scanner_scan(parser.term_scanner, windows)
+            before = best_time(finditer_scan, parser.term_patterns, windows)
+            after = best_time(scanner_scan, parser.term_scanner, windows)
+            totals[mode][0] += before
+            totals[mode][1] += after
+            print(f"  {mode + ':':16s} {before * 1000:.2f}ms -> {after * 1000:.2f}ms")
+    
+    for mode, (before, after) in totals.items():
+        if after:
+            print(f"total {mode}: {before * 1000:.1f}ms -> {after * 1000:.1f}ms ({before / after:.1f}x)")
+
+if __name__ == "__main__":
+    main()
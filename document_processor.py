@@ -2,27 +2,73 @@
 Real document processing module for Charter Party Generator
 """
 
+import io
 import os
 import re
 import json
 import uuid
 from pathlib import Path
-from typing import Dict, List, Tuple, Any, Optional
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, List, Tuple, Any, Optional, Iterator
 from docx import Document
 from docx.shared import RGBColor
 from docx.enum.text import WD_COLOR_INDEX
 from docx.shared import Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-import PyPDF2
-import pdfplumber
-import docx2txt
+
+from src.extractors.pdf_extractor import PDFExtractor
+from src.extractors.docx_extractor import DOCXExtractor
+from src.extractors.text_stream import iter_paragraph_blocks, iter_text_file_blocks, iter_with_lookahead
+from src.generators.clause_amender import ClauseAmender, find_amendments
+from src.generators.docx_patcher import DocxPatcher
+from src.preprocessors.template_preprocessor import TemplatePreprocessor
+from src.utils.interval_index import IntervalIndex
+from src.utils.parse_cache import ParseCache, rules_hash, file_digest
+from src.utils.pattern_scanner import PatternScanner, LiteralIndex
+from src.utils.regex_guard import RegexGuard
 
 
 class DocumentProcessor:
     """Handles document parsing and Charter Party generation"""
     
-    def __init__(self):
+    # Bump when extraction logic changes in a way the rule hash cannot see
+    EXTRACTOR_VERSION = "1.1"
+    
+    # Look for patterns like "Vessel Name: M/V OCEAN STAR"
+    KEYWORD_VALUE_PATTERNS = (
+        r"{keyword}\s*:?\s*([^\n\r]+)",
+        r"{keyword}\s+([A-Z][^\n\r]+)",
+        r"^{keyword}\s*:?\s*([^\n\r]+)",
+    )
+    
+    # JSON placeholders written into templates, e.g. "{$vessel_name}"
+    JSON_PLACEHOLDER_PATTERN = re.compile(r'\{\$(\w+)\}')
+    
+    # Run properties of filled values: bold red
+    FILLED_RUN_PROPERTIES = {"b": {}, "color": {"val": "FF0000"}}
+    
+    # Compiled templates kept in memory, least recently used evicted first
+    MAX_COMPILED_TEMPLATES = 32
+    
+    # Template required-field names that differ from the recap field names below
+    REQUIRED_FIELD_ALIASES = {
+        'cargo': 'cargo_type',
+        'load_port': 'loading_port'
+    }
+    
+    def __init__(self, cache: Optional[ParseCache] = None, regex_time_budget: Optional[float] = 1.0):
+        self.cache = cache
+        # Seconds each extraction pattern may spend on a text before it is skipped
+        self.regex_guard = RegexGuard(regex_time_budget)
+        self.pdf_extractor = PDFExtractor()
+        self.docx_extractor = DOCXExtractor()
+        self.template_preprocessor = TemplatePreprocessor()
         self.placeholder_map = {}  # Store identified placeholders and their context
+        # Template content hash -> {"plan": fill plan, "patcher": DocxPatcher of the
+        # prepared template, "placeholders": (span, placeholder) in the patcher text,
+        # and once amendments are applied, "amender": ClauseAmender of the patcher text}
+        self._compiled_templates: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.field_patterns = {
             'vessel_name': ['vessel', 'name', 'mv', 'ship'],
             'dwt': ['dwt', 'deadweight', 'tonnage'],
@@ -75,100 +121,245 @@ class DocumentProcessor:
             'bills_lading': ['bills of lading', 'bl', 'b/l'],
             'insurance': ['insurance', 'p&i', 'pi club'],
         }
+        
+        # Patterns for specific value formats like currency amounts and quantities
+        self.specific_patterns = {
+            'freight_rate': [
+                r'USD\s+[\d,]+\.?\d*\s*(?:per|/)\s*(?:mt|metric ton)',
+                r'US\$\s*[\d,]+\.?\d*\s*(?:per|/)\s*(?:mt|metric ton)',
+                r'[\d,]+\.?\d*\s*USD\s*(?:per|/)\s*(?:mt|metric ton)',
+            ],
+            'quantity': [
+                r'[\d,]+\.?\d*\s*(?:mt|metric tons?|tons?)\s*(?:\+|-|±)',
+                r'[\d,]+\.?\d*\s*(?:mt|metric tons?|tons?)',
+            ],
+            'dwt': [
+                r'[\d,]+\.?\d*\s*(?:dwt|DWT)',
+                r'deadweight\s*:?\s*[\d,]+\.?\d*',
+            ],
+            'laytime': [
+                r'[\d]+\s*hours?\s*(?:total|combined)?',
+                r'[\d]+\s*days?\s*(?:total|combined)?',
+            ],
+            'demurrage': [
+                r'USD\s*[\d,]+\.?\d*\s*per\s*day',
+                r'US\$\s*[\d,]+\.?\d*\s*/\s*day',
+            ]
+        }
+        self.specific_scanner = PatternScanner(self.specific_patterns, re.IGNORECASE, guard=self.regex_guard)
+        
+        # Compiled keyword patterns per keyword list, built on first use; they
+        # share one literal index so each text is searched for keywords once
+        self._keyword_scanners: Dict[Tuple[str, ...], PatternScanner] = {}
+        self._keyword_index = LiteralIndex()
+    
+    def _cache_key(self, namespace: str, file_path: str) -> Optional[str]:
+        """Build the parse cache key for a file, or None when caching is disabled"""
+        if not self.cache:
+            return None
+        try:
+            content_hash = file_digest(file_path)
+        except OSError:
+            return None
+        return self.cache.make_key(
+            namespace,
+            content_hash,
+            self.EXTRACTOR_VERSION,
+            rules_hash(self.common_cp_fields, self.specific_patterns)
+        )
     
     def extract_text_from_file(self, file_path: str) -> str:
         """Extract text from PDF, DOCX, or TXT files"""
+        return "".join(self.extract_text_blocks(file_path))
+    
+    def _extract_pdf_text(self, file_path: str) -> str:
+        """Extract text from PDF, page-parallel with per-page PyPDF2 fallback"""
+        try:
+            return self.pdf_extractor.extract_text(file_path)
+        except Exception as e:
+            print(f"Error extracting PDF text: {e}")
+            return ""
+    
+    def _extract_docx_text(self, file_path: str) -> str:
+        """Extract paragraph and table text from DOCX files in document order"""
+        try:
+            return self.docx_extractor.extract_text(file_path)
+        except Exception as e:
+            print(f"Error extracting DOCX text: {e}")
+            return ""
+    
+    def extract_text_blocks(self, file_path: str) -> Iterator[str]:
+        """Yield document text in order: pages for PDF, paragraphs otherwise
+        
+        Joined, the blocks equal ``extract_text_from_file``. The full text is
+        cached only when the stream is read to the end.
+        """
         file_ext = Path(file_path).suffix.lower()
         
+        cache_key = self._cache_key("text", file_path)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield from iter_paragraph_blocks(cached.splitlines(keepends=True))
+                return
+        
+        blocks = []
         try:
             if file_ext == '.pdf':
-                return self._extract_pdf_text(file_path)
+                stream = self.pdf_extractor.iter_text(file_path)
             elif file_ext in ['.docx', '.doc']:
-                return self._extract_docx_text(file_path)
+                stream = iter_paragraph_blocks(self.docx_extractor.iter_text(file_path))
             elif file_ext == '.txt':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
+                stream = iter_text_file_blocks(file_path)
             else:
                 raise ValueError(f"Unsupported file type: {file_ext}")
+            
+            with closing(stream):
+                for block in stream:
+                    blocks.append(block)
+                    yield block
         except Exception as e:
             print(f"Error extracting text from {file_path}: {e}")
-            return ""
-    
-    def _extract_pdf_text(self, file_path: str) -> str:
-        """Extract text from PDF using pdfplumber"""
-        text = ""
-        try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except Exception as e:
-            print(f"Error with pdfplumber, trying PyPDF2: {e}")
-            # Fallback to PyPDF2
-            try:
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-            except Exception as e2:
-                print(f"Error with PyPDF2: {e2}")
-        
-        return text
+            return
+        
+        if cache_key and blocks:
+            self.cache.put(cache_key, "".join(blocks))
     
-    def _extract_docx_text(self, file_path: str) -> str:
-        """Extract text from DOCX files"""
-        try:
-            return docx2txt.process(file_path)
-        except Exception as e:
-            print(f"Error extracting DOCX text: {e}")
-            return ""
+    def parse_recap_document(self, file_path: str, template_type: Optional[str] = None) -> Dict[str, Any]:
+        """Parse recap document and extract key information
+        
+        With a template type, reading stops once every required field of that
+        template has a valid value.
+        """
+        return self._parse_recap(file_path, template_type)[0]
     
-    def parse_recap_document(self, file_path: str) -> Dict[str, Any]:
-        """Parse recap document and extract key information"""
-        text = self.extract_text_from_file(file_path)
-        if not text:
-            return {}
+    def _parse_recap(self, file_path: str, template_type: Optional[str] = None,
+                     with_amendments: bool = False) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Extract recap fields and, optionally, clause amendments in one read
+        
+        Amendments may appear anywhere in a recap, so when they are wanted the
+        rest of the stream is still read after the required fields are filled,
+        but only for amendment detection.
+        """
+        required_fields = self._required_fields(template_type)
+        namespace = "recap" if not required_fields else f"recap-{template_type.lower()}"
+        if with_amendments:
+            namespace += "-amendments"
+        
+        cache_key = self._cache_key(namespace, file_path)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if with_amendments:
+                    return cached["data"], cached["amendments"]
+                return cached, []
         
         extracted_data = {}
-        text_lower = text.lower()
+        # Rank (keyword index, pattern index) of the match each field was filled from
+        ranks = {}
+        read_blocks = []
+        # Number of blocks read when every required field was filled
+        field_blocks = None
+        self.regex_guard.reset()
+        
+        # Extract information using pattern matching while the text is read
+        with closing(self.extract_text_blocks(file_path)) as blocks:
+            for block, lookahead in iter_with_lookahead(blocks):
+                read_blocks.append(block)
+                if field_blocks is not None:
+                    continue
+                window = block + lookahead
+                window_lower = window.lower()
+                
+                for field, keywords in self.common_cp_fields.items():
+                    found = self._find_field_value(window, window_lower, keywords, field,
+                                                   ranks.get(field), match_before=len(block))
+                    if found:
+                        ranks[field], extracted_data[field] = found
+                
+                if required_fields and required_fields.issubset(extracted_data):
+                    field_blocks = len(read_blocks)
+                    if not with_amendments:
+                        print(f"Required fields filled after {field_blocks} blocks, skipping the rest of {file_path}")
+                        break
         
-        # Extract information using pattern matching
-        for field, keywords in self.common_cp_fields.items():
-            value = self._extract_field_value(text, text_lower, keywords, field)
-            if value:
-                extracted_data[field] = value
+        text = "".join(read_blocks)
+        if not text:
+            return {}, []
+        
+        extracted_data = {field: extracted_data[field] for field in self.common_cp_fields if field in extracted_data}
+        
+        # Additional specific extractions, over the text the fields were read from
+        field_text = text if field_blocks is None else "".join(read_blocks[:field_blocks])
+        extracted_data.update(self._extract_specific_patterns(field_text))
         
-        # Additional specific extractions
-        extracted_data.update(self._extract_specific_patterns(text))
+        amendments = find_amendments(text) if with_amendments else []
         
-        return extracted_data
+        tripped = sorted({rule["pattern"] for rule in self.regex_guard.tripped})
+        if tripped:
+            # A rule that ran out of time may succeed on a later attempt
+            print(f"Patterns skipped after exceeding their time budget in {file_path}: {', '.join(tripped)}")
+        elif cache_key:
+            self.cache.put(cache_key, {"data": extracted_data, "amendments": amendments}
+                           if with_amendments else extracted_data)
+        
+        return extracted_data, amendments
+    
+    def _required_fields(self, template_type: Optional[str]) -> set:
+        """Map a template's required fields onto the recap fields extracted here"""
+        required = set()
+        for field in self.template_preprocessor.get_required_fields(template_type):
+            field = self.REQUIRED_FIELD_ALIASES.get(field, field)
+            # Fields without keywords cannot be filled by reading further
+            if field in self.common_cp_fields:
+                required.add(field)
+        return required
     
     def _extract_field_value(self, text: str, text_lower: str, keywords: List[str], field: str) -> Optional[str]:
         """Extract field value using keyword matching"""
-        for keyword in keywords:
-            # Look for patterns like "Vessel Name: M/V OCEAN STAR"
-            patterns = [
-                rf"{keyword}\s*:?\s*([^\n\r]+)",
-                rf"{keyword}\s+([A-Z][^\n\r]+)",
-                rf"^{keyword}\s*:?\s*([^\n\r]+)",
-            ]
+        found = self._find_field_value(text, text_lower, keywords, field)
+        return found[1] if found else None
+    
+    def _find_field_value(self, text: str, text_lower: str, keywords: List[str], field: str,
+                          better_than: Optional[Tuple[int, int]] = None,
+                          match_before: Optional[int] = None) -> Optional[Tuple[Tuple[int, int], str]]:
+        """Find the first valid field value and the rank of the keyword pattern that matched
+        
+        Earlier keywords and patterns take priority. With ``better_than`` only
+        ranks ahead of it are tried, so later text can only improve a value
+        found in earlier text. With ``match_before`` only matches starting
+        before that offset are used.
+        """
+        # Matches come in keyword, then pattern, then position order
+        for rank, match in self._keyword_scanner(keywords).iter_matches(text_lower, match_before):
+            if better_than is not None and rank >= better_than:
+                return None
             
-            for pattern in patterns:
-                matches = re.finditer(pattern, text_lower, re.MULTILINE | re.IGNORECASE)
-                for match in matches:
-                    # Get the actual case from original text
-                    start_pos = match.start(1)
-                    end_pos = match.end(1)
-                    value = text[start_pos:end_pos].strip()
-                    
-                    # Clean and validate the value
-                    cleaned_value = self._clean_extracted_value(value, field)
-                    if cleaned_value and len(cleaned_value) > 2 and self._is_valid_field_value(cleaned_value, field):
-                        return cleaned_value
+            # Get the actual case from original text
+            start_pos = match.start(1)
+            end_pos = match.end(1)
+            value = text[start_pos:end_pos].strip()
+            
+            # Clean and validate the value
+            cleaned_value = self._clean_extracted_value(value, field)
+            if cleaned_value and len(cleaned_value) > 2 and self._is_valid_field_value(cleaned_value, field):
+                return rank, cleaned_value
         
         return None
     
+    def _keyword_scanner(self, keywords: List[str]) -> PatternScanner:
+        """Get the compiled keyword patterns for a field, ranked (keyword index, pattern index)"""
+        key = tuple(keywords)
+        scanner = self._keyword_scanners.get(key)
+        if scanner is None:
+            rules = {}
+            for keyword_index, keyword in enumerate(keywords):
+                for pattern_index, pattern in enumerate(self.KEYWORD_VALUE_PATTERNS):
+                    rules[(keyword_index, pattern_index)] = [pattern.format(keyword=keyword)]
+            scanner = PatternScanner(rules, re.MULTILINE | re.IGNORECASE, self._keyword_index, self.regex_guard)
+            self._keyword_scanners[key] = scanner
+        return scanner
+    
     def _is_valid_field_value(self, value: str, field: str) -> bool:
         """Validate if extracted value makes sense for the field"""
         value_lower = value.lower()
@@ -203,37 +394,11 @@ class DocumentProcessor:
     
     def _extract_specific_patterns(self, text: str) -> Dict[str, str]:
         """Extract specific patterns like currency amounts, dates, etc."""
-        patterns = {
-            'freight_rate': [
-                r'USD\s+[\d,]+\.?\d*\s*(?:per|/)\s*(?:mt|metric ton)',
-                r'US\$\s*[\d,]+\.?\d*\s*(?:per|/)\s*(?:mt|metric ton)',
-                r'[\d,]+\.?\d*\s*USD\s*(?:per|/)\s*(?:mt|metric ton)',
-            ],
-            'quantity': [
-                r'[\d,]+\.?\d*\s*(?:mt|metric tons?|tons?)\s*(?:\+|-|±)',
-                r'[\d,]+\.?\d*\s*(?:mt|metric tons?|tons?)',
-            ],
-            'dwt': [
-                r'[\d,]+\.?\d*\s*(?:dwt|DWT)',
-                r'deadweight\s*:?\s*[\d,]+\.?\d*',
-            ],
-            'laytime': [
-                r'[\d]+\s*hours?\s*(?:total|combined)?',
-                r'[\d]+\s*days?\s*(?:total|combined)?',
-            ],
-            'demurrage': [
-                r'USD\s*[\d,]+\.?\d*\s*per\s*day',
-                r'US\$\s*[\d,]+\.?\d*\s*/\s*day',
-            ]
-        }
-        
         extracted = {}
-        for field, field_patterns in patterns.items():
-            for pattern in field_patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                if matches:
-                    extracted[field] = matches[0]
-                    break
+        # First match of the first matching pattern per field; the patterns
+        # have no capturing groups, so the whole match is what findall gave
+        for field, match in self.specific_scanner.iter_matches(text, first_only=True):
+            extracted[field] = match.group(0)
         
         return extracted
     
@@ -332,7 +497,7 @@ class DocumentProcessor:
                     doc.add_paragraph(paragraph)
         
         return doc
-        
+    
     def _standardize_dots(self, content: str) -> str:
         """Standardize various dot patterns to a consistent format"""
         # Replace variable length dots with standard format
@@ -342,68 +507,114 @@ class DocumentProcessor:
         return content
     
     def update_cp_template(self, doc: Document, recap_data: Dict[str, Any]) -> Document:
-        """Update CP template with data from recap using JSON placeholders"""
+        """Update CP template with data from recap using JSON placeholders
+        
+        Fills the document's placeholders through DocxPatcher, as generation
+        does for compiled templates, and returns the filled copy; ``doc``
+        itself only has its placeholders converted.
+        """
         try:
-            # First identify and replace dots with JSON placeholders
-            placeholders = self.identify_placeholders(doc)
-            
-            # Create mappings for JSON placeholders with full placeholder text
-            field_mappings = {}
-            for field, value in recap_data.items():
-                if value:
-                    json_placeholder = f"{{${field}}}"
-                    field_mappings[json_placeholder] = str(value)
+            self.identify_placeholders(doc)
             
-            # Update paragraphs
-            for paragraph in doc.paragraphs:
-                self._process_paragraph(paragraph, field_mappings)
-                
-            # Also process tables if present
-            if hasattr(doc, 'tables'):
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for paragraph in cell.paragraphs:
-                                self._process_paragraph(paragraph, field_mappings)
-                            
-            return doc
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            patcher = DocxPatcher(buffer.getvalue())
+            field_mappings = self._create_field_mappings(recap_data)
+            edits = [
+                {"position": match.span(), "new_text": field_mappings[match.group(0)]}
+                for match in self.JSON_PLACEHOLDER_PATTERN.finditer(patcher.text)
+                if match.group(0) in field_mappings
+            ]
+            return Document(io.BytesIO(patcher.patch(edits, self.FILLED_RUN_PROPERTIES)))
         except Exception as e:
             raise Exception(f"Failed to update CP template: {str(e)}")
-            
-    def _process_paragraph(self, para: Any, field_mappings: Dict[str, str]) -> None:
-        """Process a paragraph replacing JSON placeholders with recap data"""
-        text = para.text
-        
-        # Find all JSON placeholders
-        placeholder_pattern = r'\{\$(\w+)\}'
-        matches = list(re.finditer(placeholder_pattern, text))
-        
-        if matches:
-            # Clear paragraph
-            para.clear()
-            
-            # Split text and insert values
-            current_pos = 0
-            for match in matches:
-                # Add text before placeholder
-                if match.start() > current_pos:
-                    para.add_run(text[current_pos:match.start()])
-                
-                # Get the full placeholder and its value
-                placeholder = text[match.start():match.end()]
-                value = field_mappings.get(placeholder, placeholder)
-                
-                # Add value in red if it was replaced
-                run = para.add_run(value)
-                if value != placeholder:
-                    run.font.color.rgb = RGBColor(255, 0, 0)
-                    run.font.bold = True
-                
-                current_pos = match.end()
-            
-            # Add remaining text
-            if current_pos < len(text):
-                para.add_run(text[current_pos:])
+    
+    def compile_template(self, template_path: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Compile a template into a fill plan reused by every generation against it
+        
+        Loading the template and converting its placeholders happens once; the
+        plan records the placeholders identified and the field types found.
+        Pass the upload's content hash to skip hashing the file.
+        """
+        return self._compiled_template(template_path, content_hash)["plan"]
+    
+    def _compiled_template(self, template_path: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Get the compiled template for a file, compiling it on first use"""
+        content_hash = content_hash or file_digest(template_path)
+        compiled = self._compiled_templates.get(content_hash)
+        if compiled is not None:
+            self._compiled_templates.move_to_end(content_hash)
+            return compiled
+        
+        doc = self.load_cp_template(template_path)
+        placeholders = self.identify_placeholders(doc)
+        
+        # The prepared template is kept indexed for patching its runs in place
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        patcher = DocxPatcher(buffer.getvalue())
+        json_placeholders = [(match.span(), match.group(0), match.group(1))
+                             for match in self.JSON_PLACEHOLDER_PATTERN.finditer(patcher.text)]
+        
+        compiled = {
+            "plan": {
+                "content_hash": content_hash,
+                "placeholders": placeholders,
+                "fields": sorted({field for _, _, field in json_placeholders})
+            },
+            "patcher": patcher,
+            "placeholders": [(span, placeholder) for span, placeholder, _ in json_placeholders]
+        }
+        self._compiled_templates[content_hash] = compiled
+        while len(self._compiled_templates) > self.MAX_COMPILED_TEMPLATES:
+            self._compiled_templates.popitem(last=False)
+        return compiled
+    
+    def _patch_compiled_template(self, compiled: Dict[str, Any], recap_data: Dict[str, Any],
+                                 amendment_edits: Optional[List[Dict[str, Any]]] = None) -> bytes:
+        """Fill a compiled template in its document XML, getting the DOCX file
+        
+        Each mapped placeholder is replaced in place by its value, in the
+        formatting of the run it was in plus bold red; every other run, part
+        and byte of the file stays as it was. Clause amendment edits, from
+        ``_amendment_edits``, are applied in the same pass and win over the
+        placeholders they cover.
+        """
+        field_mappings = self._create_field_mappings(recap_data)
+        edits = list(amendment_edits or [])
+        amended = IntervalIndex()
+        for edit in edits:
+            amended.add(*edit["position"])
+        edits += [
+            {"position": span, "new_text": field_mappings[placeholder]}
+            for span, placeholder in compiled["placeholders"]
+            if placeholder in field_mappings and not amended.overlaps(*span)
+        ]
+        self.placeholder_map = compiled["plan"]["placeholders"]
+        return compiled["patcher"].patch(edits, self.FILLED_RUN_PROPERTIES)
+    
+    def _amendment_edits(self, compiled: Dict[str, Any],
+                         amendments: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Resolve recap clause amendments against a compiled template's text
+        
+        The clauses are indexed from the patcher text on first use and the
+        index is kept with the compiled template. Returns the patcher edits of
+        the applied amendments and every amendment with its status.
+        """
+        if not amendments:
+            return [], []
+        
+        amender = compiled.get("amender")
+        if amender is None:
+            amender = compiled["amender"] = ClauseAmender(compiled["patcher"].text.split("\n"))
+        resolved = amender.resolve(amendments)
+        
+        edits = [
+            {"position": amender.text_span(amendment), "new_text": amendment.get("text", "")}
+            for amendment in resolved
+            if amendment["status"] == "applied"
+        ]
+        return edits, resolved
     
     def identify_placeholders(self, doc: Document) -> Dict[str, str]:
         """Identify placeholders and convert to JSON format based on context"""
@@ -440,7 +651,7 @@ class DocumentProcessor:
         
         self.placeholder_map = placeholders
         return placeholders
-
+    
     def _determine_field_type(self, word: str, context: str) -> str:
         """Determine the field type based on word and surrounding context"""
         word_lower = word.lower()
@@ -454,7 +665,7 @@ class DocumentProcessor:
         
         # Use word as field name if no match found
         return word.lower()
-
+    
     def _create_field_mappings(self, recap_data: Dict[str, Any]) -> Dict[str, str]:
         """Create mapping of JSON placeholders to recap values"""
         mappings = {}
@@ -464,7 +675,7 @@ class DocumentProcessor:
             if value:
                 json_placeholder = f"{{${field}}}"
                 mappings[json_placeholder] = str(value)
-                
+        
         return mappings
     
     def _replace_placeholders(self, text: str, mappings: Dict[str, str]) -> str:
@@ -498,31 +709,70 @@ class DocumentProcessor:
         
         return updated_text
     
-    def generate_charter_party(self, template_path: str, recap_path: str, output_path: str) -> Tuple[str, Dict[str, Any]]:
+    def generate_charter_party(self, template_path: str, recap_path: str, output_path: str,
+                               template_type: Optional[str] = None,
+                               template_hash: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
         """Main function to generate Charter Party"""
         try:
-            # Parse recap document
-            recap_data = self.parse_recap_document(recap_path)
-            
-            # Load CP template
-            template_doc = self.load_cp_template(template_path)
+            # Parse recap document, collecting clause amendments from the same read
+            recap_data, amendments = self._parse_recap(recap_path, template_type, with_amendments=True)
             
-            # Update template with recap data
-            updated_doc = self.update_cp_template(template_doc, recap_data)
+            # Load the compiled CP template, compiling it if this is its first use
+            compiled = self._compiled_template(template_path, template_hash)
             
-            # Save the updated document
-            updated_doc.save(output_path)
+            # Fill the template's runs in place with recap data, applying clause
+            # amendments and line deletions from the recap in the same patch
+            amendment_edits, amendments = self._amendment_edits(compiled, amendments)
+            filled = self._patch_compiled_template(compiled, recap_data, amendment_edits)
+            with open(output_path, "wb") as f:
+                f.write(filled)
             
             # Create change report
-            change_report = self._create_change_report(recap_data, template_path, recap_path)
+            change_report = self._create_change_report(recap_data, template_path, recap_path, amendments)
             
             return output_path, change_report
-            
+        
         except Exception as e:
             raise Exception(f"Charter Party generation failed: {str(e)}")
     
-    def _create_change_report(self, recap_data: Dict[str, Any], template_path: str, recap_path: str) -> Dict[str, Any]:
+    def apply_clause_amendments(self, doc: Document, recap_text: str) -> List[Dict[str, Any]]:
+        """Apply the clause and line amendments found in recap text to a template
+        
+        Replacement text is marked in red like filled values; deleted
+        paragraphs are removed. Returns every amendment found with its status,
+        and only "applied" ones change the document.
+        """
+        return self._apply_amendments(doc, find_amendments(recap_text))
+    
+    def _apply_amendments(self, doc: Document, amendments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Resolve amendments found in a recap against a document and apply them"""
+        if not amendments:
+            return []
+        
+        paragraphs = doc.paragraphs
+        resolved = ClauseAmender([paragraph.text for paragraph in paragraphs]).resolve(amendments)
+        
+        for amendment in resolved:
+            if amendment["status"] != "applied":
+                continue
+            first, last = amendment["paragraphs"]
+            if amendment["action"] == "replace":
+                paragraph = paragraphs[first]
+                paragraph.clear()
+                run = paragraph.add_run(amendment["text"])
+                run.font.color.rgb = RGBColor(255, 0, 0)
+                run.font.bold = True
+                first += 1
+            for paragraph in paragraphs[first:last + 1]:
+                paragraph._element.getparent().remove(paragraph._element)
+        
+        return resolved
+    
+    def _create_change_report(self, recap_data: Dict[str, Any], template_path: str, recap_path: str,
+                              amendments: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """Create a detailed change report"""
+        amendments = amendments or []
+        applied = [a for a in amendments if a["status"] == "applied"]
         return {
             "generation_summary": {
                 "template_file": Path(template_path).name,
@@ -549,11 +799,20 @@ class DocumentProcessor:
                 }
                 for field, value in recap_data.items()
                 if value
+            ] + [
+                {
+                    "section": f"Clause {a['clause']}" if a["target"] == "clause" else f"Lines {a['lines'][0]}-{a['lines'][1]}",
+                    "change": a["instruction"],
+                    "type": "amendment" if a["action"] == "replace" else "deletion"
+                }
+                for a in applied
             ],
+            "clause_amendments": amendments,
             "confidence_score": 0.85,
             "processing_notes": [
                 f"Successfully extracted {len(recap_data)} fields from recap document",
                 "Template updated with actual extracted values",
+                f"Applied {len(applied)} of {len(amendments)} clause amendments found in the recap",
                 "Document format and structure preserved",
                 "Ready for review and finalization"
             ]
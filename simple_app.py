@@ -5,9 +5,11 @@ FastAPI application with real document processing
 import os
 import json
 import time
+import asyncio
 import uuid
+import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
@@ -19,6 +21,10 @@ from pydantic import BaseModel
 
 # Import the real document processor
 from document_processor import DocumentProcessor
+from src.utils.content_store import ContentStore, UploadRejectedError, UploadTooLargeError
+from src.utils.parse_cache import ParseCache
+
+logger = logging.getLogger(__name__)
 
 # Create required directories
 BASE_DIR = Path(__file__).parent
@@ -26,6 +32,9 @@ BASE_DIR = Path(__file__).parent
 UPLOADS_DIR = BASE_DIR / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
+# Deduplicated blob storage shared by all uploads
+content_store = ContentStore(UPLOADS_DIR / "store")
+
 OUTPUTS_DIR = BASE_DIR / "outputs"
 OUTPUTS_DIR.mkdir(exist_ok=True)
 
@@ -35,6 +44,12 @@ STATIC_DIR.mkdir(exist_ok=True)
 IMAGES_DIR = STATIC_DIR / "images"
 IMAGES_DIR.mkdir(exist_ok=True)
 
+# Upload size limits, matching FileManager.max_file_sizes
+MAX_UPLOAD_SIZES = {
+    "template": 50 * 1024 * 1024,  # 50MB
+    "recap": 20 * 1024 * 1024,     # 20MB
+}
+
 # Create templates directory
 templates = Jinja2Templates(directory="templates")
 
@@ -43,8 +58,10 @@ templates_storage: Dict[str, Dict[str, Any]] = {}
 recaps_storage: Dict[str, Dict[str, Any]] = {}
 documents_storage: Dict[str, Dict[str, Any]] = {}
 
-# Initialize document processor
-doc_processor = DocumentProcessor()
+# Initialize document processor with a persistent parse cache so repeat
+# generations against the same documents skip extraction
+parse_cache = ParseCache(UPLOADS_DIR / "cache")
+doc_processor = DocumentProcessor(cache=parse_cache)
 
 app = FastAPI(
     title="Smart Charter Party Generator",
@@ -68,6 +85,7 @@ app.mount("/static", StaticFiles(directory=str(STATIC_DIR), check_dir=False), na
 class GenerateRequest(BaseModel):
     template_id: str
     recap_id: str
+    template_type: Optional[str] = None
 
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
@@ -107,22 +125,52 @@ async def upload_template(file: UploadFile = File(...)):
     # Generate unique ID
     template_id = str(uuid.uuid4())
     
-    # Save file
+    # Stream the file into the content store and point this upload at the blob
     file_path = UPLOADS_DIR / f"template_{template_id}{file_ext}"
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    try:
+        stored = await content_store.put_upload(
+            file, max_size=MAX_UPLOAD_SIZES["template"], file_ext=file_ext
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await asyncio.to_thread(content_store.link, stored["digest"], file_path)
+    await asyncio.to_thread(
+        content_store.add_ref, template_id, stored["digest"],
+        filename=file.filename, path=str(file_path)
+    )
+    
+    # Compile the fill plan now so generations only patch the placeholder locations;
+    # a template that cannot be compiled is still stored and fails at generation
+    fill_fields = None
+    try:
+        fill_plan = await asyncio.to_thread(
+            doc_processor.compile_template, str(file_path), content_hash=stored["digest"]
+        )
+        fill_fields = fill_plan["fields"]
+    except Exception as e:
+        logger.warning(f"Could not compile template {file.filename}: {e}")
     
     # Store metadata
     templates_storage[template_id] = {
         "id": template_id,
         "filename": file.filename,
         "path": str(file_path),
-        "size": len(content),
+        "size": stored["size"],
+        "content_hash": stored["digest"],
+        "fill_fields": fill_fields,
         "uploaded_at": time.time()
     }
     
-    return {"id": template_id, "filename": file.filename, "size": len(content)}
+    return {
+        "id": template_id,
+        "filename": file.filename,
+        "size": stored["size"],
+        "content_hash": stored["digest"],
+        "deduplicated": stored["deduplicated"],
+        "fill_fields": fill_fields
+    }
 
 @app.post("/api/recaps/upload")
 async def upload_recap(file: UploadFile = File(...)):
@@ -139,22 +187,39 @@ async def upload_recap(file: UploadFile = File(...)):
     # Generate unique ID
     recap_id = str(uuid.uuid4())
     
-    # Save file
+    # Stream the file into the content store and point this upload at the blob
     file_path = UPLOADS_DIR / f"recap_{recap_id}{file_ext}"
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    try:
+        stored = await content_store.put_upload(
+            file, max_size=MAX_UPLOAD_SIZES["recap"], file_ext=file_ext
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await asyncio.to_thread(content_store.link, stored["digest"], file_path)
+    await asyncio.to_thread(
+        content_store.add_ref, recap_id, stored["digest"],
+        filename=file.filename, path=str(file_path)
+    )
     
     # Store metadata
     recaps_storage[recap_id] = {
         "id": recap_id,
         "filename": file.filename,
         "path": str(file_path),
-        "size": len(content),
+        "size": stored["size"],
+        "content_hash": stored["digest"],
         "uploaded_at": time.time()
     }
     
-    return {"id": recap_id, "filename": file.filename, "size": len(content)}
+    return {
+        "id": recap_id,
+        "filename": file.filename,
+        "size": stored["size"],
+        "content_hash": stored["digest"],
+        "deduplicated": stored["deduplicated"]
+    }
 
 @app.post("/api/generate")
 async def generate_charter_party(request: GenerateRequest):
@@ -184,7 +249,9 @@ async def generate_charter_party(request: GenerateRequest):
             processed_path, change_report = doc_processor.generate_charter_party(
                 template_path=template_info["path"],
                 recap_path=recap_info["path"],
-                output_path=str(output_path)
+                output_path=str(output_path),
+                template_type=request.template_type,
+                template_hash=template_info["content_hash"]
             )
         except Exception as e:
             import traceback
@@ -216,7 +283,7 @@ async def generate_charter_party(request: GenerateRequest):
             "status": "completed",
             "message": "Charter Party generated successfully with real document processing"
         }
-        
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
 
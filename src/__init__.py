@@ -2,10 +2,18 @@
 Smart Charter Party Generator - Main Package
 """
 
+import importlib
+
 __version__ = "1.0.0"
 __author__ = "Smart Charter Party Generator Team"
 __description__ = "Automated Charter Party contract generation from recap documents"
 
-from . import models, parsers, preprocessors, generators, utils, templates
+__all__ = ["models", "parsers", "extractors", "preprocessors", "generators", "utils", "templates"]
+
 
-__all__ = ["models", "parsers", "preprocessors", "generators", "utils", "templates"]
+def __getattr__(name):
+    # Subpackages are imported on first access so that lightweight helpers
+    # (e.g. ``src.utils``) can be used without pulling in SQLAlchemy or spaCy.
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,9 @@
+"""
+Extractors package for Smart Charter Party Generator
+"""
+
+from .pdf_extractor import PDFExtractor
+from .docx_extractor import DOCXExtractor
+from .text_stream import iter_paragraph_blocks, iter_text_file_blocks, iter_with_lookahead
+
+__all__ = ["PDFExtractor", "DOCXExtractor", "iter_paragraph_blocks", "iter_text_file_blocks", "iter_with_lookahead"]
@@ -0,0 +1,160 @@
+"""
+Streaming DOCX text extractor reading word/document.xml straight from the zip
+"""
+
+import logging
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+MC_NS = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+
+_P = f"{{{W_NS}}}p"
+_R = f"{{{W_NS}}}r"
+_T = f"{{{W_NS}}}t"
+_TAB = f"{{{W_NS}}}tab"
+_PTAB = f"{{{W_NS}}}ptab"
+_BR = f"{{{W_NS}}}br"
+_CR = f"{{{W_NS}}}cr"
+_NO_BREAK_HYPHEN = f"{{{W_NS}}}noBreakHyphen"
+_TBL = f"{{{W_NS}}}tbl"
+_TR = f"{{{W_NS}}}tr"
+_TC = f"{{{W_NS}}}tc"
+_BR_TYPE = f"{{{W_NS}}}type"
+# VML copies of drawing content (e.g. text boxes) that would repeat their text
+_FALLBACK = f"{{{MC_NS}}}Fallback"
+
+class DOCXExtractor:
+    """Extracts paragraphs and table cells from a DOCX file in document order
+    
+    The XML is parsed incrementally, so memory stays flat on large documents and
+    table cells are read once each, with no grid resolution for merged cells.
+    In the joined text every paragraph is followed by a newline, every cell by
+    a tab, and every table row ends with a newline.
+    """
+    
+    DOCUMENT_PART = "word/document.xml"
+    
+    def iter_items(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Yield paragraphs and table cells with their offsets in the joined text
+        
+        Each item has ``type`` ("paragraph" or "cell"), ``text``, ``start``,
+        ``end`` and the ``separator`` that follows it. Cells also carry their
+        ``table``, ``row`` and ``column`` indexes. Paragraphs inside a cell
+        make up the cell's text, joined by newlines.
+        """
+        offset = 0
+        for item in self._iter_raw_items(file_path):
+            item["start"] = offset
+            item["end"] = offset + len(item["text"])
+            offset = item["end"] + len(item["separator"])
+            yield item
+    
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        """Yield the document one line at a time: paragraphs and whole table rows"""
+        row = []
+        for item in self.iter_items(file_path):
+            if item["type"] == "paragraph":
+                yield item["text"] + item["separator"]
+                continue
+            
+            row.append(item["text"] + item["separator"])
+            if item["separator"].endswith("\n"):
+                yield "".join(row)
+                row = []
+    
+    def extract_text(self, file_path: str) -> str:
+        """Extract the full text of a DOCX file"""
+        return "".join(self.iter_text(file_path))
+    
+    def _iter_raw_items(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Walk document.xml and yield items without offsets"""
+        try:
+            archive = zipfile.ZipFile(file_path)
+        except zipfile.BadZipFile:
+            raise ValueError(f"Not a valid DOCX file: {file_path}")
+        
+        with archive, archive.open(self.DOCUMENT_PART) as document_xml:
+            # Open paragraphs and cells, innermost last, as [tag, pieces]
+            containers: List[List[Any]] = []
+            tables: List[Dict[str, Any]] = []
+            table_count = 0
+            run_depth = 0
+            skip_depth = 0
+            
+            for event, elem in ET.iterparse(document_xml, events=("start", "end")):
+                tag = elem.tag
+                
+                if tag == _FALLBACK:
+                    skip_depth += 1 if event == "start" else -1
+                    continue
+                if skip_depth:
+                    if event == "end":
+                        elem.clear()
+                    continue
+                
+                if event == "start":
+                    if tag == _P:
+                        containers.append([_P, []])
+                    elif tag == _R:
+                        run_depth += 1
+                    elif tag == _TC:
+                        containers.append([_TC, []])
+                        tables[-1]["column"] += 1
+                    elif tag == _TR:
+                        tables[-1]["row"] += 1
+                        tables[-1]["column"] = -1
+                        tables[-1]["cells"] = []
+                    elif tag == _TBL:
+                        tables.append({"index": table_count, "row": -1, "column": -1, "cells": []})
+                        table_count += 1
+                    continue
+                
+                if run_depth and containers and containers[-1][0] == _P:
+                    pieces = containers[-1][1]
+                    if tag == _T:
+                        pieces.append(elem.text or "")
+                    elif tag == _TAB or tag == _PTAB:
+                        pieces.append("\t")
+                    elif tag == _BR:
+                        # Page and column breaks have no text equivalent
+                        if elem.get(_BR_TYPE, "textWrapping") == "textWrapping":
+                            pieces.append("\n")
+                    elif tag == _CR:
+                        pieces.append("\n")
+                    elif tag == _NO_BREAK_HYPHEN:
+                        pieces.append("-")
+                
+                if tag == _R:
+                    run_depth -= 1
+                elif tag == _P:
+                    text = "".join(containers.pop()[1])
+                    if containers and containers[-1][0] == _TC:
+                        containers[-1][1].append(text)
+                    else:
+                        yield {"type": "paragraph", "text": text, "separator": "\n"}
+                    elem.clear()
+                elif tag == _TC:
+                    table = tables[-1]
+                    table["cells"].append({
+                        "type": "cell",
+                        "text": "\n".join(containers.pop()[1]),
+                        "separator": "\t",
+                        "table": table["index"],
+                        "row": table["row"],
+                        "column": table["column"]
+                    })
+                elif tag == _TR:
+                    # Cells are held until the row ends so the last one can end the line
+                    cells = tables[-1]["cells"]
+                    if cells:
+                        cells[-1]["separator"] = "\t\n"
+                    yield from cells
+                    tables[-1]["cells"] = []
+                    elem.clear()
+                elif tag == _TBL:
+                    tables.pop()
+                    elem.clear()
@@ -0,0 +1,257 @@
+"""
+Page-parallel PDF text extraction engine
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Iterator, IO
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+def _release_page(page: Any) -> None:
+    """Drop a pdfplumber page's cached layout objects once its text has been read"""
+    # pdfplumber 0.10 pages have flush_cache() but no close(); later releases add close()
+    release = getattr(page, "close", None) or getattr(page, "flush_cache", None)
+    if release is None:
+        return
+    try:
+        release()
+    except Exception as e:
+        logger.debug(f"Could not release pdfplumber page: {e}")
+
+def _extract_page_text(plumber_pdf: Any, pypdf_reader: Any, index: int) -> Dict[str, Any]:
+    """Extract one page with pdfplumber, falling back to PyPDF2 for that page only"""
+    if plumber_pdf is not None:
+        page = None
+        text = None
+        try:
+            page = plumber_pdf.pages[index]
+            text = page.extract_text()
+        except Exception as e:
+            logger.warning(f"pdfplumber failed on page {index + 1}: {e}, trying PyPDF2")
+        
+        if page is not None:
+            _release_page(page)
+        if text:
+            return {"text": text, "engine": "pdfplumber"}
+    
+    if pypdf_reader is not None:
+        try:
+            text = pypdf_reader.pages[index].extract_text()
+            if text:
+                return {"text": text, "engine": "PyPDF2"}
+        except Exception as e:
+            logger.warning(f"PyPDF2 failed on page {index + 1}: {e}")
+    
+    return {"text": "", "engine": None}
+
+def _iter_page_range(file_path: str, start: int, stop: int) -> Iterator[Dict[str, Any]]:
+    """Yield pages [start, stop) of a PDF one at a time"""
+    plumber_pdf = None
+    pypdf_file = None
+    pypdf_reader = None
+    
+    try:
+        if pdfplumber:
+            try:
+                plumber_pdf = pdfplumber.open(file_path)
+            except Exception as e:
+                logger.warning(f"pdfplumber could not open {file_path}: {e}")
+        
+        if PyPDF2:
+            try:
+                pypdf_file = open(file_path, 'rb')
+                pypdf_reader = PyPDF2.PdfReader(pypdf_file)
+            except Exception as e:
+                logger.warning(f"PyPDF2 could not open {file_path}: {e}")
+        
+        if plumber_pdf is None and pypdf_reader is None:
+            raise ValueError(f"Could not open PDF {file_path}")
+        
+        for index in range(start, stop):
+            page = _extract_page_text(plumber_pdf, pypdf_reader, index)
+            page["page_number"] = index + 1
+            yield page
+    finally:
+        if plumber_pdf is not None:
+            plumber_pdf.close()
+        if pypdf_file is not None:
+            pypdf_file.close()
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[Dict[str, Any]]:
+    """Extract pages [start, stop) of a PDF; runs inside worker processes"""
+    return list(_iter_page_range(file_path, start, stop))
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process and its finished workers, in MB"""
+    if not resource:
+        return None
+    
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+class PDFExtractor:
+    """Extracts PDF text page by page, spreading large documents over a process pool"""
+    
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 min_parallel_pages: int = 16,
+                 large_document_pages: int = 200,
+                 spool_threshold: int = 8 * 1024 * 1024):
+        if not pdfplumber and not PyPDF2:
+            logger.warning("No PDF processing library available")
+        
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Below this page count the pool start-up costs more than it saves
+        self.min_parallel_pages = min_parallel_pages
+        # From this page count on, page text is spooled instead of held in a list
+        self.large_document_pages = large_document_pages
+        # Spooled text moves from memory to a temp file past this many characters
+        self.spool_threshold = spool_threshold
+        
+        # Statistics for the most recent extraction
+        self.last_stats: Dict[str, Any] = {}
+    
+    def page_count(self, file_path: str) -> int:
+        """Get the number of pages in a PDF"""
+        if PyPDF2:
+            try:
+                with open(file_path, 'rb') as f:
+                    return len(PyPDF2.PdfReader(f).pages)
+            except Exception as e:
+                logger.warning(f"PyPDF2 could not count pages: {e}")
+        
+        if pdfplumber:
+            with pdfplumber.open(file_path) as pdf:
+                return len(pdf.pages)
+        
+        raise ImportError("No PDF processing library available")
+    
+    def iter_pages(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Yield pages in order with their offsets in the joined document text"""
+        started = time.perf_counter()
+        total_pages = self.page_count(file_path)
+        workers = min(self.max_workers, total_pages)
+        
+        if workers > 1 and total_pages >= self.min_parallel_pages:
+            pages = self._iter_parallel(file_path, total_pages, workers)
+        else:
+            pages = _iter_page_range(file_path, 0, total_pages)
+        
+        # Pages without text are skipped, each page is followed by a newline
+        offset = 0
+        pages_read = 0
+        try:
+            for page in pages:
+                page["start"] = offset
+                if page["text"]:
+                    offset += len(page["text"]) + 1
+                page["end"] = offset
+                pages_read += 1
+                yield page
+        finally:
+            # Also recorded when the consumer stops reading early
+            self.last_stats = {
+                "pages": total_pages,
+                "pages_read": pages_read,
+                "workers": workers if total_pages >= self.min_parallel_pages else 1,
+                "characters": offset,
+                "elapsed_seconds": round(time.perf_counter() - started, 3),
+                "peak_rss_mb": peak_rss_mb()
+            }
+            if hasattr(pages, "close"):
+                pages.close()
+    
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        """Yield the text of each page in order; joined it equals ``extract_text``"""
+        for page in self.iter_pages(file_path):
+            if page["text"]:
+                yield page["text"] + "\n"
+    
+    def extract_pages(self, file_path: str) -> List[Dict[str, Any]]:
+        """Extract every page in order with its offsets in the joined document text"""
+        return list(self.iter_pages(file_path))
+    
+    def extract_text(self, file_path: str) -> str:
+        """Extract the full text of a PDF"""
+        if self.page_count(file_path) >= self.large_document_pages:
+            with self.extract_to_spool(file_path) as spool:
+                return spool.read()
+        
+        return "".join(page["text"] + "\n" for page in self.iter_pages(file_path) if page["text"])
+    
+    def extract_to_spool(self, file_path: str) -> IO[str]:
+        """Write page text to a spooled temp file, keeping at most one page in memory
+        
+        The spool stays in memory until it passes ``spool_threshold`` characters
+        and then rolls over to disk. It is returned rewound to the start.
+        """
+        spool = tempfile.SpooledTemporaryFile(
+            max_size=self.spool_threshold, mode='w+', encoding='utf-8'
+        )
+        try:
+            for page in self.iter_pages(file_path):
+                if page["text"]:
+                    spool.write(page["text"])
+                    spool.write("\n")
+        except Exception:
+            spool.close()
+            raise
+        
+        self.last_stats["spooled_to_disk"] = bool(getattr(spool, "_rolled", False))
+        logger.info(
+            f"Extracted {self.last_stats['pages']} pages in large-document mode "
+            f"(peak RSS {self.last_stats['peak_rss_mb']} MB, "
+            f"spooled to disk: {self.last_stats['spooled_to_disk']})"
+        )
+        spool.seek(0)
+        return spool
+    
+    def _iter_parallel(self, file_path: str, total_pages: int, workers: int) -> Iterator[Dict[str, Any]]:
+        """Split the page range into contiguous chunks and extract them concurrently"""
+        # A few chunks per worker keeps the pool busy when pages vary in cost
+        chunk_count = min(total_pages, workers * 4)
+        bounds = [total_pages * i // chunk_count for i in range(chunk_count + 1)]
+        
+        logger.info(f"Extracting {total_pages} PDF pages with {workers} workers")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_extract_page_range, file_path, bounds[i], bounds[i + 1])
+                for i in range(chunk_count)
+            ]
+            try:
+                # Results are consumed in page order and released chunk by chunk
+                for i in range(chunk_count):
+                    pages = futures[i].result()
+                    futures[i] = None
+                    yield from pages
+            finally:
+                # Chunks not yet started are dropped if the consumer stops early
+                for future in futures:
+                    if future is not None:
+                        future.cancel()
@@ -0,0 +1,65 @@
+"""
+Helpers for streaming document text in paragraph blocks
+"""
+
+from typing import Iterable, Iterator, Tuple
+
+def iter_paragraph_blocks(lines: Iterable[str]) -> Iterator[str]:
+    """Group lines into paragraph blocks, each ending after its trailing blank lines
+    
+    Lines must keep their line endings; joining the blocks gives back the
+    original text exactly.
+    """
+    block = []
+    after_blank = False
+    
+    for line in lines:
+        blank = not line.strip()
+        if after_blank and not blank:
+            yield "".join(block)
+            block = []
+        block.append(line)
+        after_blank = blank
+    
+    if block:
+        yield "".join(block)
+
+def iter_text_file_blocks(file_path: str) -> Iterator[str]:
+    """Read a UTF-8 text file one paragraph block at a time"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        yield from iter_paragraph_blocks(f)
+
+def iter_text_chunks(text: str, max_length: int) -> Iterator[Tuple[int, str]]:
+    """Split a text into paragraph blocks no longer than ``max_length``, with offsets
+    
+    Yields (offset, chunk) pairs that rejoin to the original text. Blocks over
+    the limit are cut at the last line break that fits, else the last space,
+    else at the limit itself.
+    """
+    offset = 0
+    for block in iter_paragraph_blocks(text.splitlines(keepends=True)):
+        while len(block) > max_length:
+            cut = block.rfind("\n", 0, max_length) + 1 or block.rfind(" ", 0, max_length) + 1 or max_length
+            yield offset, block[:cut]
+            offset += cut
+            block = block[cut:]
+        if block:
+            yield offset, block
+            offset += len(block)
+
+def iter_with_lookahead(blocks: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Pair each block with the first line of the block after it
+    
+    Scanning ``block + lookahead`` and keeping only matches that start inside
+    the block finds values whose label ends one block and whose value starts
+    the next, as in "Vessel:" followed by a blank line and the name.
+    """
+    previous = None
+    for block in blocks:
+        if previous is not None:
+            first_line, newline, _ = block.partition("\n")
+            yield previous, first_line + newline
+        previous = block
+    
+    if previous is not None:
+        yield previous, ""
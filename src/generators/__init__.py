@@ -3,5 +3,7 @@ Generators package for Smart Charter Party Generator
 """
 
 from .cp_generator import CPGenerator
+from .clause_amender import ClauseAmender, find_amendments
+from .docx_patcher import DocxPatcher
 
-__all__ = ["CPGenerator"]
+__all__ = ["CPGenerator", "ClauseAmender", "find_amendments", "DocxPatcher"]
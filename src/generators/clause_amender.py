@@ -0,0 +1,260 @@
+"""
+Clause amendment engine applying recap instructions to template paragraphs
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.clause_index import ClauseIndex
+from ..utils.interval_index import IntervalIndex
+
+# Every instruction form in one pattern, so a recap is scanned once however many it holds
+AMENDMENT_PATTERN = re.compile(r"""
+    (?P<delete_clause>
+        \b(?:delete|strike\s+out|omit)\s+(?:clause|cl\.?)\s*(?P<delete_clause_from>\d+[a-z]?)\b
+      | \b(?:clause|cl\.?)\s*(?P<deleted_clause>\d+[a-z]?)\s+(?:is\s+|to\s+be\s+|shall\s+be\s+)?
+        (?:deleted|struck\s+out|omitted)\b
+    )
+  | (?P<delete_lines>
+        \b(?:delete|strike\s+out|omit)\s+lines?\s*(?P<delete_lines_from>\d+)
+        (?:\s*(?:-|–|to)\s*(?P<delete_lines_to>\d+))?\b
+      | \blines?\s*(?P<deleted_lines_from>\d+)(?:\s*(?:-|–|to)\s*(?P<deleted_lines_to>\d+))?
+        \s+(?:is\s+|are\s+|to\s+be\s+|shall\s+be\s+)?(?:deleted|struck\s+out|omitted)\b
+    )
+  | (?P<amend_clause>
+        \b(?:clause|cl\.?)\s*(?P<amend_clause_from>\d+[a-z]?)\s+(?:is\s+|to\s+be\s+|shall\s+be\s+)?
+        (?:amended|altered|replaced)\s*(?:to\s+read|as\s+follows|by|with)?\s*:?
+    )
+  | (?P<amend_lines>
+        \blines?\s*(?P<amend_lines_from>\d+)(?:\s*(?:-|–|to)\s*(?P<amend_lines_to>\d+))?
+        \s+(?:is\s+|are\s+|to\s+be\s+|shall\s+be\s+)?(?:amended\s+|altered\s+)?(?:to\s+read|as\s+follows)\s*:?
+    )
+""", re.IGNORECASE | re.VERBOSE)
+
+# Opening quote -> closing quote around replacement text
+QUOTES = {'"': '"', '“': '”', "'": "'", '‘': '’'}
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+# A template paragraph that opens a clause: "15.", "15)", "Clause 15." ...
+CLAUSE_HEADING = re.compile(r'^\s*(?:clause\s+)?(\d+[a-z]?)[.)]\s*(.*)', re.IGNORECASE)
+
+# A printed line number at the end of a template line, as on BIMCO-style forms
+PRINTED_LINE_NUMBER = re.compile(r'(?:^|[\s.])(\d{1,4})$')
+
+def find_amendments(text: str) -> List[Dict[str, Any]]:
+    """Find clause and line amendments in recap text, in the order they appear
+    
+    Each amendment has an ``action`` ("replace" or "delete"), a ``target``
+    ("clause" or "lines"), the clause number or line range, the replacement
+    ``text`` for replacements and the instruction ``source`` offsets. The
+    replacement text is the quoted text after the instruction, or else the
+    rest of its paragraph up to the next instruction.
+    """
+    matches = list(AMENDMENT_PATTERN.finditer(text))
+    amendments = []
+    
+    for i, match in enumerate(matches):
+        kind = match.lastgroup
+        groups = match.groupdict()
+        amendment = {"source": [match.start(), match.end()], "instruction": match.group(0).strip()}
+        
+        if kind == "delete_clause":
+            amendment.update(action="delete", target="clause",
+                             clause=(groups["delete_clause_from"] or groups["deleted_clause"]).lower())
+        elif kind == "delete_lines":
+            first = int(groups["delete_lines_from"] or groups["deleted_lines_from"])
+            last = groups["delete_lines_to"] or groups["deleted_lines_to"]
+            amendment.update(action="delete", target="lines", lines=[first, int(last) if last else first])
+        else:
+            limit = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            replacement = _replacement_text(text, match.end(), limit)
+            if not replacement:
+                continue
+            if kind == "amend_clause":
+                amendment.update(action="replace", target="clause", clause=groups["amend_clause_from"].lower())
+            else:
+                first = int(groups["amend_lines_from"])
+                last = groups["amend_lines_to"]
+                amendment.update(action="replace", target="lines", lines=[first, int(last) if last else first])
+            amendment["text"] = replacement
+        
+        amendments.append(amendment)
+    
+    return amendments
+
+def _replacement_text(text: str, start: int, limit: int) -> str:
+    """Get the replacement text following an instruction, before ``limit``"""
+    while start < limit and text[start] in " \t\r\n":
+        start += 1
+    if start >= limit:
+        return ""
+    
+    closing = QUOTES.get(text[start])
+    if closing:
+        end = text.find(closing, start + 1, limit)
+        if end != -1:
+            return text[start + 1:end].strip()
+    
+    paragraph_break = PARAGRAPH_BREAK.search(text, start, limit)
+    end = paragraph_break.start() if paragraph_break else limit
+    return text[start:end].strip()
+
+class ClauseAmender:
+    """Resolves amendments against a template's paragraphs through precomputed indexes
+    
+    The template is indexed once: a ClauseIndex of the clauses opened by
+    numbered headings, over the paragraph texts joined by newlines, or the
+    index stored with the processed template, and the printed line numbers
+    found at paragraph ends. Amendments then resolve to
+    paragraph ranges by dict and binary-search lookups, without walking the
+    template again.
+    """
+    
+    def __init__(self, paragraphs: List[str], clause_index: Optional[ClauseIndex] = None):
+        self.paragraphs = paragraphs
+        self.paragraph_count = len(paragraphs)
+        # Offset of each paragraph in the paragraphs joined by newlines
+        self._paragraph_starts = []
+        offset = 0
+        for paragraph in paragraphs:
+            self._paragraph_starts.append(offset)
+            offset += len(paragraph) + 1
+        self.text_length = max(offset - 1, 0)
+        
+        # A clause index stored with a processed template is used as it is
+        # when its offsets are in the same joined text
+        self._heading_prefixes = {}
+        if clause_index is None:
+            clause_index = ClauseIndex(self._clauses(paragraphs))
+        self.clause_index = clause_index
+        # Printed line numbers, increasing, and the paragraph each one ends
+        self._line_numbers, self._line_paragraphs = self._printed_lines(paragraphs)
+    
+    def _clauses(self, paragraphs: List[str]) -> List[Dict[str, Any]]:
+        """Treat each numbered heading paragraph as the start of a clause running to the next
+        
+        Spans are [start, end) like ClauseIndex's, ending after the clause's
+        last non-blank paragraph.
+        """
+        headings = []
+        for index, paragraph in enumerate(paragraphs):
+            heading = CLAUSE_HEADING.match(paragraph)
+            if heading:
+                headings.append((index, heading.group(1).lower(), heading.group(2).strip(),
+                                 paragraph[:heading.start(2)].lstrip()))
+        
+        # Heading text before the title, e.g. "15. ", kept when a clause is replaced
+        clauses = []
+        for k, (index, number, title, prefix) in enumerate(headings):
+            self._heading_prefixes[index] = prefix
+            last = (headings[k + 1][0] if k + 1 < len(headings) else len(paragraphs)) - 1
+            while last > index and not paragraphs[last].strip():
+                last -= 1
+            clauses.append({
+                "number": number,
+                "title": title,
+                "type": "numbered",
+                "position": index,
+                "start": self._paragraph_starts[index],
+                "end": self._paragraph_starts[last] + len(paragraphs[last])
+            })
+        return clauses
+    
+    def _printed_lines(self, paragraphs: List[str]) -> Tuple[List[int], List[int]]:
+        """Collect printed line numbers that increase steadily, skipping stray numbers"""
+        numbers, indexes = [], []
+        for index, paragraph in enumerate(paragraphs):
+            found = PRINTED_LINE_NUMBER.search(paragraph.rstrip())
+            if not found:
+                continue
+            number = int(found.group(1))
+            last = numbers[-1] if numbers else 0
+            if last < number <= last + 50:
+                numbers.append(number)
+                indexes.append(index)
+        return numbers, indexes
+    
+    def paragraph_at(self, offset: int) -> int:
+        """Get the index of the paragraph containing an offset of the joined text"""
+        return bisect_right(self._paragraph_starts, offset) - 1
+    
+    def line_paragraph(self, line: int) -> Optional[int]:
+        """Get the paragraph holding a line number
+        
+        With printed line numbers this is the paragraph ending with the first
+        printed number at or after the line; otherwise lines count paragraphs
+        from 1.
+        """
+        if self._line_numbers:
+            k = bisect_left(self._line_numbers, line)
+            return self._line_paragraphs[k] if k < len(self._line_numbers) else None
+        return line - 1 if 1 <= line <= self.paragraph_count else None
+    
+    def resolve(self, amendments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Give each amendment its paragraph range and a status
+        
+        Ranges are inclusive [first, last] paragraph indexes; a replaced
+        clause keeps its heading number. An amendment
+        whose target is not found is "unresolved"; one overlapping an earlier
+        amendment is a "conflict" and neither applies nor blocks later ones.
+        """
+        accepted = IntervalIndex()
+        resolved = []
+        
+        for amendment in amendments:
+            amendment = dict(amendment)
+            paragraphs = self._target_paragraphs(amendment)
+            if paragraphs is None:
+                amendment["status"] = "unresolved"
+            elif not accepted.add(paragraphs[0], paragraphs[1] + 1):
+                amendment["status"] = "conflict"
+            else:
+                amendment["status"] = "applied"
+                amendment["paragraphs"] = list(paragraphs)
+                if amendment["action"] == "replace" and amendment["target"] == "clause":
+                    amendment["text"] = self._heading_prefix(paragraphs[0]) + amendment["text"]
+            resolved.append(amendment)
+        
+        return resolved
+    
+    def text_span(self, amendment: Dict[str, Any]) -> Tuple[int, int]:
+        """Get the offsets an applied amendment covers in the paragraphs joined by newlines
+        
+        A deletion also covers the newline after its last paragraph, so no
+        empty line is left where the paragraphs were, and a deleted clause the
+        blank paragraphs separating it from the next.
+        """
+        first, last = amendment["paragraphs"]
+        if amendment["action"] == "delete" and amendment["target"] == "clause":
+            while last + 1 < self.paragraph_count and not self.paragraphs[last + 1].strip():
+                last += 1
+        start = self._paragraph_starts[first]
+        end = self._paragraph_starts[last] + len(self.paragraphs[last])
+        if amendment["action"] == "delete" and end < self.text_length:
+            end += 1
+        return start, end
+    
+    def _heading_prefix(self, index: int) -> str:
+        """Get the heading text before a clause title, e.g. "15. ", of a paragraph"""
+        prefix = self._heading_prefixes.get(index)
+        if prefix is None:
+            heading = CLAUSE_HEADING.match(self.paragraphs[index])
+            prefix = self.paragraphs[index][:heading.start(2)].lstrip() if heading else ""
+        return prefix
+    
+    def _target_paragraphs(self, amendment: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        """Look up the paragraph range an amendment targets"""
+        if amendment["target"] == "clause":
+            clause = self.clause_index.by_number(amendment["clause"])
+            if clause is None:
+                return None
+            return self.paragraph_at(clause["start"]), self.paragraph_at(max(clause["end"] - 1, clause["start"]))
+        
+        first_line, last_line = sorted(amendment["lines"])
+        first = self.line_paragraph(first_line)
+        last = self.line_paragraph(last_line)
+        if first is None or last is None:
+            return None
+        return first, last
@@ -5,6 +5,7 @@ Charter Party Generator - Core engine for generating filled charter parties
 import os
 import re
 import logging
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
@@ -13,26 +14,35 @@ try:
     from docx import Document
     from docx.shared import Inches, Pt
     from docx.enum.text import WD_COLOR_INDEX
-    import nltk
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    import numpy as np
 except ImportError:
     # Handle import errors gracefully
     Document = None
-    nltk = None
-    TfidfVectorizer = None
-    cosine_similarity = None
-    np = None
+
+from .clause_amender import ClauseAmender
+from .docx_patcher import DocxPatcher
+from ..utils.assignment import assign
+from ..utils.edit_buffer import EditBuffer
+from ..utils.nlp_resources import optional_import
 
 logger = logging.getLogger(__name__)
 
+# Assignment scores of direct and mapped terms, above any semantic similarity
+DIRECT_MAPPING_SCORES = {"direct": 3.0, "mapped": 2.0}
+
+# Run properties marking filled values in DOCX output
+FILLED_RUN_PROPERTIES = {"b": {}, "highlight": {"val": "yellow"}}
+
 class CPGenerator:
     """Charter Party Generator for creating filled CP documents"""
     
+    # Template DOCX files kept indexed for in-place output
+    MAX_TEMPLATE_PATCHERS = 8
+    
     def __init__(self):
         self.similarity_threshold = 0.3
         self.confidence_threshold = 0.6
+        # Largest score bonus for a recap term at the same relative position as a field
+        self.position_weight = 0.1
         
         # Term mapping rules
         self.term_mappings = {
@@ -50,35 +60,39 @@ class CPGenerator:
             'laytime': ['laytime', 'lay_time']
         }
         
-        # Initialize NLP components
-        self._initialize_nlp()
+        # NLP components for semantic matching are created on first use
+        self._vectorizer = None
+        self._vectorizer_loaded = False
+        
+        # (path, modification time, size) -> patcher of the template file
+        self._template_patchers: "OrderedDict[Tuple[str, int, int], DocxPatcher]" = OrderedDict()
     
-    def _initialize_nlp(self):
-        """Initialize NLP components for semantic matching"""
-        try:
-            if nltk:
-                nltk.download('punkt', quiet=True)
-                nltk.download('stopwords', quiet=True)
-            
-            if TfidfVectorizer:
-                self.vectorizer = TfidfVectorizer(
+    @property
+    def vectorizer(self):
+        """TF-IDF vectorizer for semantic matching, or None without scikit-learn"""
+        if not self._vectorizer_loaded:
+            self._vectorizer_loaded = True
+            sklearn_text = optional_import("sklearn.feature_extraction.text")
+            if sklearn_text:
+                self._vectorizer = sklearn_text.TfidfVectorizer(
                     stop_words='english',
                     max_features=1000,
                     ngram_range=(1, 2)
                 )
-            else:
-                self.vectorizer = None
-                
-            logger.info("NLP components initialized successfully")
-        except Exception as e:
-            logger.warning(f"Error initializing NLP components: {e}")
-            self.vectorizer = None
+                logger.info("NLP components initialized successfully")
+        return self._vectorizer
     
     async def generate(self, 
                       template_data: Dict[str, Any], 
                       recap_data: Dict[str, Any], 
-                      output_format: str = "docx") -> Dict[str, Any]:
-        """Generate a filled charter party document"""
+                      output_format: str = "docx",
+                      template_path: Optional[str] = None) -> Dict[str, Any]:
+        """Generate a filled charter party document
+        
+        With the path of the template's DOCX file, DOCX output is that file
+        with the fields filled in place rather than a rebuilt document. Clause
+        amendments found in the recap are applied along with the fields.
+        """
         try:
             logger.info("Starting charter party generation")
             
@@ -89,10 +103,11 @@ class CPGenerator:
             field_mappings = await self._map_terms_to_fields(recap_terms, template_data)
             
             # Generate the filled document
-            filled_document = await self._fill_template(template_data, field_mappings, output_format)
+            filled_document = await self._fill_template(template_data, field_mappings, output_format, template_path,
+                                                        recap_data.get("amendments"))
             
             # Track changes
-            changes = self._track_changes(template_data, field_mappings)
+            changes = self._track_changes(template_data, field_mappings, filled_document.get("modifications"))
             
             # Validate the generated document
             validation_result = self._validate_generated_document(filled_document, field_mappings)
@@ -102,6 +117,7 @@ class CPGenerator:
                 "changes": changes,
                 "field_mappings": field_mappings,
                 "validation": validation_result,
+                "amendments": filled_document.get("amendments", []),
                 "statistics": {
                     "fields_filled": len([m for m in field_mappings if m.get("filled", False)]),
                     "total_fields": len(field_mappings),
@@ -131,6 +147,7 @@ class CPGenerator:
                     "value": best_match.get("value", ""),
                     "confidence": best_match.get("confidence", 0.5),
                     "original_match": best_match.get("full_match", ""),
+                    "position": best_match.get("position"),
                     "source": "regex_extraction"
                 }
         
@@ -145,6 +162,7 @@ class CPGenerator:
                     "value": entity.get("text", ""),
                     "confidence": entity.get("confidence", 0.6),
                     "original_match": entity.get("text", ""),
+                    "position": (entity["start"], entity.get("end", entity["start"])) if "start" in entity else None,
                     "source": "nlp_extraction"
                 }
         
@@ -154,26 +172,69 @@ class CPGenerator:
     async def _map_terms_to_fields(self, 
                                   recap_terms: Dict[str, Any], 
                                   template_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Map recap terms to template fields using semantic matching"""
+        """Map recap terms to template fields with one assignment for all fields
+        
+        Fields of one type are the same blank repeated and share a term. Each
+        field type is scored against every recap term, direct and mapped
+        matches above any semantic similarity, and the terms are assigned to
+        the types with the best total score. A term fills one field type, or
+        every type it maps to directly, as the laycan fills both laycan_start
+        and laycan_end.
+        """
         field_mappings = []
         template_fields = template_data.get("structured_fields", [])
-        
-        for field in template_fields:
-            field_type = field.get("type", "")
-            field_context = field.get("context", "")
-            
-            # Try direct mapping first
-            mapped_term = self._find_direct_mapping(field_type, recap_terms)
-            
-            if not mapped_term:
-                # Try semantic mapping
-                mapped_term = await self._find_semantic_mapping(field, recap_terms)
-            
+        term_indexes = {term_type: j for j, term_type in enumerate(recap_terms)}
+        groups = self._field_groups(template_fields)
+        
+        # Try direct mapping first, once per field type
+        scores: Dict[Tuple[int, int], float] = {}
+        direct_methods: Dict[int, str] = {}
+        capacities = [0] * len(term_indexes)
+        for g, group in enumerate(groups):
+            direct = self._direct_term(template_fields[group[0]].get("type", ""), recap_terms)
+            if direct:
+                term_index = term_indexes[direct[0]]
+                scores[g, term_index] = DIRECT_MAPPING_SCORES[direct[1]]
+                direct_methods[g] = direct[1]
+                capacities[term_index] += 1
+        capacities = [max(capacity, 1) for capacity in capacities]
+        
+        # The remaining fields are scored semantically in one batch
+        semantic_fields, semantic_groups = [], []
+        for g, group in enumerate(groups):
+            if g not in direct_methods:
+                semantic_fields += group
+                semantic_groups += [g] * len(group)
+        similarities = self._semantic_similarities([template_fields[i] for i in semantic_fields], recap_terms)
+        if similarities is not None:
+            scores.update(self._semantic_scores(
+                similarities, semantic_groups, len(groups),
+                self._relative_positions(template_fields, semantic_fields), recap_terms
+            ))
+        
+        mapped_terms: List[Optional[Dict[str, Any]]] = [None] * len(template_fields)
+        semantic_rows = {i: k for k, i in enumerate(semantic_fields)}
+        term_keys = list(recap_terms)
+        for g, term_index in assign(scores, len(groups), capacities).items():
+            for i in groups[g]:
+                term = recap_terms[term_keys[term_index]].copy()
+                if g in direct_methods:
+                    term["mapping_method"] = direct_methods[g]
+                else:
+                    # Within a type, only fields similar enough to the term take it
+                    similarity = similarities[semantic_rows[i], term_index]
+                    if similarity <= self.similarity_threshold:
+                        continue
+                    term["mapping_method"] = "semantic"
+                    term["similarity_score"] = float(similarity)
+                mapped_terms[i] = term
+        
+        for field, mapped_term in zip(template_fields, mapped_terms):
             mapping = {
                 "field_id": field.get("id", ""),
-                "field_type": field_type,
+                "field_type": field.get("type", ""),
                 "field_position": field.get("position", (0, 0)),
-                "field_context": field_context,
+                "field_context": field.get("context", ""),
                 "mapped_term": mapped_term,
                 "filled": mapped_term is not None,
                 "confidence": mapped_term.get("confidence", 0.0) if mapped_term else 0.0,
@@ -185,113 +246,222 @@ class CPGenerator:
         logger.info(f"Mapped {len([m for m in field_mappings if m['filled']])} out of {len(field_mappings)} fields")
         return field_mappings
     
-    def _find_direct_mapping(self, field_type: str, recap_terms: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Find direct mapping between field type and recap terms"""
+    def _field_groups(self, fields: List[Dict[str, Any]]) -> List[List[int]]:
+        """Group field indexes by type in order of appearance; untyped fields stand alone"""
+        groups: List[List[int]] = []
+        by_type: Dict[str, int] = {}
+        for i, field in enumerate(fields):
+            field_type = field.get("type", "")
+            if field_type in ("", "unknown"):
+                groups.append([i])
+                continue
+            if field_type not in by_type:
+                by_type[field_type] = len(groups)
+                groups.append([])
+            groups[by_type[field_type]].append(i)
+        return groups
+    
+    def _direct_term(self, field_type: str, recap_terms: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Find the recap term a field type maps to directly, with the mapping method"""
         # Check for exact match
         if field_type in recap_terms:
-            term = recap_terms[field_type].copy()
-            term["mapping_method"] = "direct"
-            return term
+            return field_type, "direct"
         
         # Check for mapped term types
         for recap_term, mapped_types in self.term_mappings.items():
             if field_type in mapped_types and recap_term in recap_terms:
-                term = recap_terms[recap_term].copy()
-                term["mapping_method"] = "mapped"
-                return term
+                return recap_term, "mapped"
         
         return None
     
-    async def _find_semantic_mapping(self, field: Dict[str, Any], recap_terms: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Find semantic mapping using NLP similarity"""
-        if not self.vectorizer:
+    def _find_direct_mapping(self, field_type: str, recap_terms: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Find direct mapping between field type and recap terms"""
+        direct = self._direct_term(field_type, recap_terms)
+        if not direct:
             return None
         
-        field_context = field.get("context", "")
-        if not field_context:
-            return None
+        term = recap_terms[direct[0]].copy()
+        term["mapping_method"] = direct[1]
+        return term
+    
+    def _semantic_scores(self, similarities, row_groups: List[int], group_count: int,
+                         positions: List[float], recap_terms: Dict[str, Any]) -> Dict[Tuple[int, int], float]:
+        """Score field groups against recap terms from their fields' similarities
+        
+        A field scores a term by its similarity, when above the threshold, plus
+        up to ``position_weight`` for a term found at the same relative
+        position in the recap as the field in the template. A group scores a
+        term by its best field.
+        """
+        numpy = optional_import("numpy")
+        term_positions = [term_data.get("position") for term_data in recap_terms.values()]
+        known = [j for j, position in enumerate(term_positions) if position]
+        
+        bonus = numpy.zeros(similarities.shape)
+        if known:
+            starts = numpy.array([term_positions[j][0] for j in known], dtype=float)
+            term_relative = starts / max(starts.max(), 1.0)
+            bonus[:, known] = 1.0 - numpy.abs(numpy.array(positions)[:, None] - term_relative[None, :])
+        
+        field_scores = numpy.where(similarities > self.similarity_threshold,
+                                   similarities + self.position_weight * bonus, 0.0)
+        group_scores = numpy.zeros((group_count, similarities.shape[1]))
+        numpy.maximum.at(group_scores, numpy.array(row_groups, dtype=int), field_scores)
+        
+        rows, columns = numpy.nonzero(group_scores)
+        return {(int(g), int(j)): float(group_scores[g, j]) for g, j in zip(rows, columns)}
+    
+    def _relative_positions(self, fields: List[Dict[str, Any]], indexes: List[int]) -> List[float]:
+        """Get the start of some fields as a fraction of the last field start in the template"""
+        starts = [field.get("position", (0, 0))[0] for field in fields]
+        extent = max(max(starts, default=0), 1)
+        return [starts[i] / extent for i in indexes]
+    
+    def _semantic_similarities(self, fields: List[Dict[str, Any]], recap_terms: Dict[str, Any]):
+        """Get the fields x recap terms cosine similarity matrix, or None if unavailable
         
-        best_match = None
-        best_similarity = 0.0
+        All field contexts and recap term matches are vectorized with a single
+        TF-IDF fit and compared in one sparse matrix product. Fields without
+        context get no similarity to any term.
+        """
+        if not self.vectorizer or not fields or not recap_terms:
+            return None
         
-        # Create contexts for comparison
-        contexts = [field_context]
-        term_keys = []
+        numpy = optional_import("numpy")
+        with_context = [i for i, field in enumerate(fields) if field.get("context", "")]
+        if not with_context:
+            return None
         
-        for term_key, term_data in recap_terms.items():
-            contexts.append(term_data.get("original_match", ""))
-            term_keys.append(term_key)
+        contexts = [fields[i]["context"] for i in with_context]
+        contexts += [term_data.get("original_match", "") for term_data in recap_terms.values()]
         
         try:
-            # Calculate similarities
             tfidf_matrix = self.vectorizer.fit_transform(contexts)
-            similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:]).flatten()
-            
-            # Find best match above threshold
-            for i, similarity in enumerate(similarities):
-                if similarity > self.similarity_threshold and similarity > best_similarity:
-                    best_similarity = similarity
-                    best_match = recap_terms[term_keys[i]].copy()
-                    best_match["mapping_method"] = "semantic"
-                    best_match["similarity_score"] = float(similarity)
-            
         except Exception as e:
             logger.warning(f"Error in semantic mapping: {e}")
+            return None
         
-        return best_match
+        # TF-IDF rows are L2-normalised, so their dot products are cosine similarities
+        field_rows = tfidf_matrix[:len(with_context)]
+        term_rows = tfidf_matrix[len(with_context):]
+        similarities = numpy.zeros((len(fields), len(recap_terms)))
+        similarities[with_context] = (field_rows @ term_rows.T).toarray()
+        return similarities
     
     async def _fill_template(self, 
                            template_data: Dict[str, Any], 
                            field_mappings: List[Dict[str, Any]], 
-                           output_format: str) -> Dict[str, Any]:
-        """Fill the template with mapped values"""
+                           output_format: str,
+                           template_path: Optional[str] = None,
+                           amendments: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Fill the template with mapped values
+        
+        Every value is recorded as an edit of the original text and applied
+        in one pass when the output is rendered. Modifications keep their
+        original ``position`` and get their ``new_position`` in the filled
+        text. Where field spans overlap, the field earlier in the mappings,
+        which follow fill priority, is filled. Clause amendments are recorded
+        first, so fields inside an amended or deleted span are left out.
+        """
         original_text = template_data.get("original_data", {}).get("original_text", "")
-        filled_text = original_text
-        
-        # Sort mappings by position (reverse order to avoid position shifts)
-        sorted_mappings = sorted(
-            [m for m in field_mappings if m.get("filled", False)],
-            key=lambda x: x.get("field_position", (0, 0))[0],
-            reverse=True
-        )
+        buffer = EditBuffer(original_text)
+        resolved_amendments = self._apply_amendments(buffer, amendments or [])
         
-        modifications = []
-        
-        for mapping in sorted_mappings:
-            position = mapping.get("field_position", (0, 0))
+        for mapping in field_mappings:
+            if not mapping.get("filled", False):
+                continue
             mapped_term = mapping.get("mapped_term", {})
             value = mapped_term.get("value", "")
             
-            if value and position[0] < len(filled_text):
+            if value:
                 # Replace the field placeholder with the actual value
-                start, end = position
-                old_text = filled_text[start:end]
-                filled_text = filled_text[:start] + value + filled_text[end:]
-                
-                modifications.append({
-                    "position": position,
-                    "old_text": old_text,
-                    "new_text": value,
-                    "field_type": mapping.get("field_type", ""),
-                    "confidence": mapping.get("confidence", 0.0)
-                })
+                start, end = mapping.get("field_position", (0, 0))
+                buffer.replace(start, end, value,
+                               field_id=mapping.get("field_id", ""),
+                               field_type=mapping.get("field_type", ""),
+                               confidence=mapping.get("confidence", 0.0))
+        
+        modifications = buffer.edits
         
         # Create output based on format
         if output_format.lower() == "docx":
-            filled_document = await self._create_docx_output(filled_text, modifications)
+            filled_document = await self._create_docx_output(original_text, modifications, template_path)
         elif output_format.lower() == "html":
-            filled_document = await self._create_html_output(filled_text, modifications)
+            filled_document = await self._create_html_output(original_text, modifications)
         else:
             filled_document = {
-                "content": filled_text,
+                "content": buffer.text(),
                 "format": "text",
                 "modifications": modifications
             }
         
+        filled_document["amendments"] = resolved_amendments
         return filled_document
     
-    async def _create_docx_output(self, filled_text: str, modifications: List[Dict]) -> Dict[str, Any]:
-        """Create DOCX output with change tracking"""
+    def _apply_amendments(self, buffer: EditBuffer,
+                          amendments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Record recap clause amendments as edits of the original text
+        
+        Clauses are indexed from every numbered heading of the original text,
+        each running to the next heading, as DocumentProcessor does. The clause
+        index stored with the processed template is not used here: the
+        template parser leaves out short sections and cuts clauses at blank
+        lines. Returns every amendment with its status.
+        """
+        if not amendments:
+            return []
+        
+        amender = ClauseAmender(buffer.original.split("\n"))
+        resolved = amender.resolve(amendments)
+        
+        for number, amendment in enumerate(resolved, 1):
+            if amendment["status"] != "applied":
+                continue
+            start, end = amender.text_span(amendment)
+            buffer.replace(start, end, amendment.get("text", ""),
+                           field_id=f"amendment_{number}",
+                           field_type="amendment",
+                           confidence=1.0,
+                           instruction=amendment["instruction"])
+        
+        logger.info(f"Applied {sum(1 for a in resolved if a['status'] == 'applied')} of {len(resolved)} clause amendments")
+        return resolved
+    
+    def _edit_buffer(self, original_text: str, modifications: List[Dict]) -> EditBuffer:
+        """Load modifications into a piece table over the text their positions refer to"""
+        buffer = EditBuffer(original_text)
+        for modification in modifications:
+            start, end = modification["position"]
+            buffer.replace(start, end, modification["new_text"])
+        return buffer
+    
+    async def _create_docx_output(self, original_text: str, modifications: List[Dict],
+                                  template_path: Optional[str] = None) -> Dict[str, Any]:
+        """Create DOCX output with change tracking from modifications of the original text
+        
+        A DOCX template whose text is the original text is patched in place,
+        keeping its formatting, and returned as ``docx_bytes``. Otherwise a new
+        document is built from the text. Both start with the same title and
+        generation date paragraphs.
+        """
+        generated_on = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        
+        if template_path and Path(template_path).suffix.lower() == ".docx":
+            patcher = self._template_patcher(template_path)
+            if patcher.text == original_text:
+                heading = [
+                    {"text": "CHARTER PARTY", "run_properties": {"b": {}, "sz": {"val": "32"}},
+                     "paragraph_properties": {"jc": {"val": "center"}}},
+                    {"text": generated_on, "run_properties": {"i": {}, "sz": {"val": "20"}}}
+                ]
+                return {
+                    "docx_bytes": patcher.patch(modifications, FILLED_RUN_PROPERTIES, heading),
+                    "format": "docx",
+                    "modifications": modifications,
+                    "content": self._edit_buffer(original_text, modifications).text()
+                }
+            logger.warning(f"Template file text differs from the parsed template, rebuilding: {template_path}")
+        
         if not Document:
             raise ImportError("python-docx library not available")
         
@@ -306,42 +476,47 @@ class CPGenerator:
         
         # Add generation info
         info_para = doc.add_paragraph()
-        info_run = info_para.add_run(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        info_run = info_para.add_run(generated_on)
         info_run.font.size = Pt(10)
         info_run.italic = True
         
         # Add content with modifications highlighted
-        content_text = filled_text
-        current_pos = 0
-        
-        for modification in sorted(modifications, key=lambda x: x["position"][0]):
-            pos_start, pos_end = modification["position"]
-            
-            # Add text before modification
-            if current_pos < pos_start:
-                doc.add_paragraph(content_text[current_pos:pos_start])
+        buffer = self._edit_buffer(original_text, modifications)
+        for text, modification in buffer.pieces():
+            if modification is None:
+                doc.add_paragraph(text)
+                continue
             
             # Add modified text with highlighting
             modified_para = doc.add_paragraph()
-            modified_run = modified_para.add_run(modification["new_text"])
+            modified_run = modified_para.add_run(text)
             modified_run.font.highlight_color = WD_COLOR_INDEX.YELLOW
             modified_run.bold = True
-            
-            current_pos = pos_end
-        
-        # Add remaining text
-        if current_pos < len(content_text):
-            doc.add_paragraph(content_text[current_pos:])
         
         return {
             "document": doc,
             "format": "docx",
             "modifications": modifications,
-            "content": filled_text
+            "content": buffer.text()
         }
     
-    async def _create_html_output(self, filled_text: str, modifications: List[Dict]) -> Dict[str, Any]:
-        """Create HTML output with change tracking"""
+    def _template_patcher(self, template_path: str) -> DocxPatcher:
+        """Get the patcher of a template file, indexing it again only when the file changed"""
+        stat = os.stat(template_path)
+        key = (os.path.abspath(template_path), stat.st_mtime_ns, stat.st_size)
+        patcher = self._template_patchers.get(key)
+        if patcher is not None:
+            self._template_patchers.move_to_end(key)
+            return patcher
+        
+        patcher = DocxPatcher.from_file(template_path)
+        self._template_patchers[key] = patcher
+        while len(self._template_patchers) > self.MAX_TEMPLATE_PATCHERS:
+            self._template_patchers.popitem(last=False)
+        return patcher
+    
+    async def _create_html_output(self, original_text: str, modifications: List[Dict]) -> Dict[str, Any]:
+        """Create HTML output with change tracking from modifications of the original text"""
         html_content = f"""
         <!DOCTYPE html>
         <html>
@@ -359,7 +534,7 @@ class CPGenerator:
         <body>
             <div class="header">CHARTER PARTY</div>
             <div class="info">Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
-            <div class="content">{self._highlight_modifications_in_html(filled_text, modifications)}</div>
+            <div class="content">{self._highlight_modifications_in_html(original_text, modifications)}</div>
             
             <div class="change-summary">
                 <h3>Changes Made:</h3>
@@ -385,35 +560,19 @@ class CPGenerator:
         }
     
     def _highlight_modifications_in_html(self, text: str, modifications: List[Dict]) -> str:
-        """Highlight modifications in HTML"""
-        if not modifications:
-            return text
-        
-        # Sort modifications by position
-        sorted_mods = sorted(modifications, key=lambda x: x["position"][0])
-        
-        result = ""
-        current_pos = 0
-        
-        for mod in sorted_mods:
-            pos_start, pos_end = mod["position"]
-            
-            # Add text before modification
-            result += text[current_pos:pos_start]
-            
-            # Add highlighted modification
-            result += f'<span class="modified">{mod["new_text"]}</span>'
-            
-            current_pos = pos_end
-        
-        # Add remaining text
-        result += text[current_pos:]
-        
-        return result
+        """Apply modifications of a text with their new text highlighted in HTML"""
+        buffer = self._edit_buffer(text, modifications)
+        return buffer.render(lambda modification: f'<span class="modified">{modification["new_text"]}</span>')
     
-    def _track_changes(self, template_data: Dict[str, Any], field_mappings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Track all changes made to the template"""
+    def _track_changes(self, template_data: Dict[str, Any], field_mappings: List[Dict[str, Any]],
+                       modifications: Optional[List[Dict]] = None) -> List[Dict[str, Any]]:
+        """Track all changes made to the template
+        
+        With the modifications applied when filling, each change also gets
+        the ``new_position`` of its value in the filled document.
+        """
         changes = []
+        new_positions = {m.get("field_id"): m.get("new_position") for m in modifications or []}
         
         for mapping in field_mappings:
             if mapping.get("filled", False):
@@ -424,6 +583,7 @@ class CPGenerator:
                     "field_id": mapping.get("field_id", ""),
                     "field_type": mapping.get("field_type", ""),
                     "position": mapping.get("field_position", (0, 0)),
+                    "new_position": new_positions.get(mapping.get("field_id", "")),
                     "original_text": mapping.get("field_context", ""),
                     "new_value": mapped_term.get("value", ""),
                     "confidence": mapping.get("confidence", 0.0),
@@ -434,6 +594,23 @@ class CPGenerator:
                 
                 changes.append(change)
         
+        for modification in modifications or []:
+            if modification.get("field_type") != "amendment":
+                continue
+            changes.append({
+                "change_id": f"change_{len(changes) + 1}",
+                "field_id": modification["field_id"],
+                "field_type": "amendment",
+                "position": modification["position"],
+                "new_position": modification.get("new_position"),
+                "original_text": modification["old_text"],
+                "new_value": modification["new_text"],
+                "confidence": modification["confidence"],
+                "mapping_method": "amendment",
+                "source_term": modification["instruction"],
+                "timestamp": datetime.now().isoformat()
+            })
+        
         return changes
     
     def _validate_generated_document(self, filled_document: Dict[str, Any], field_mappings: List[Dict[str, Any]]) -> Dict[str, Any]:
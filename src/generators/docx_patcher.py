@@ -0,0 +1,439 @@
+"""
+In-place DOCX output: patching template runs in the original document XML
+"""
+
+import io
+import re
+import html
+import logging
+import zlib
+import zipfile
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape, quoteattr
+
+from ..extractors.docx_extractor import DOCXExtractor, MC_NS, W_NS
+from ..utils.edit_buffer import EditBuffer
+from ..utils.zip_patch import DEFLATED, Deflated, replace_members
+
+logger = logging.getLogger(__name__)
+
+# Element tags, without comments, processing instructions or declarations
+TAG = re.compile(r'<(/?)([^\s/>!?]+)([^>]*)>')
+NAMESPACE_DECLARATION = re.compile(r'xmlns:([\w.-]+)="([^"]*)"')
+
+# Children of w:rPr in schema order; Word rejects run properties out of order
+RUN_PROPERTY_ORDER = (
+    "rStyle", "rFonts", "b", "bCs", "i", "iCs", "caps", "smallCaps", "strike", "dstrike",
+    "outline", "shadow", "emboss", "imprint", "noProof", "snapToGrid", "vanish", "webHidden",
+    "color", "spacing", "w", "kern", "position", "sz", "szCs", "highlight", "u", "effect",
+    "bdr", "shd", "fitText", "vertAlign", "rtl", "cs", "em", "lang", "eastAsianLayout",
+    "specVanish", "oMath"
+)
+
+# Empty final block ending a raw deflate stream
+FINAL_BLOCK = b"\x03\x00"
+
+class DocxPatcher:
+    """Writes text edits into the runs of a DOCX file, leaving everything else as it was
+    
+    The document XML is indexed once: every ``w:t`` element gets the offsets
+    of its text in the text DOCXExtractor gives for the same file, so edits
+    positioned in that text, such as template fields, find their elements by
+    binary search. Patching splits the runs holding an edit so the new text
+    gets its own run, with the run's formatting plus the given marking, and
+    removes the replaced text from the other runs it covered. An edit
+    covering the newline after a body paragraph joins the paragraphs on
+    either side, dropping those it covers entirely. The XML is
+    spliced as a string; no other element is touched, and every other zip
+    member is copied byte for byte.
+    
+    The document XML itself is deflated once too, in chunks that each end
+    with a full flush so they inflate without what came before. A patch
+    deflates again only the chunks its edits fall in and reuses the others,
+    so its cost follows the number of edits rather than the document size.
+    """
+    
+    DOCUMENT_PART = DOCXExtractor.DOCUMENT_PART
+    # Characters of the document XML deflated together
+    CHUNK_SIZE = 1 << 16
+    
+    def __init__(self, docx: bytes, compresslevel: int = 6):
+        self.docx = docx
+        self.compresslevel = compresslevel
+        with zipfile.ZipFile(io.BytesIO(docx)) as archive:
+            self.xml = archive.read(self.DOCUMENT_PART).decode("utf-8")
+            deflated = archive.getinfo(self.DOCUMENT_PART).compress_type == DEFLATED
+        
+        # Namespaces are declared on the root element, whatever prefixes it gives them
+        root = TAG.search(self.xml)
+        prefixes = {uri: prefix for prefix, uri in NAMESPACE_DECLARATION.findall(root.group(3) if root else "")}
+        self.w = prefixes.get(W_NS, "w")
+        self._mc = prefixes.get(MC_NS, "mc")
+        
+        # Text offset, then (text, content start, content end, open tag end, preserved, run properties)
+        self._starts: List[int] = []
+        self._texts: List[Tuple[str, int, int, int, bool, str]] = []
+        # Body paragraphs in text order, as dicts of their text and XML offsets
+        self._paragraphs: List[Dict[str, Optional[int]]] = []
+        self.text = self._index()
+        self._paragraph_starts = [paragraph["text_start"] for paragraph in self._paragraphs]
+        
+        # (content, deflated) of each chunk of the XML; a stored part is written whole
+        self._chunks: List[Tuple[bytes, bytes]] = []
+        if deflated:
+            self._chunks = [self._deflate(self.xml[start:start + self.CHUNK_SIZE])
+                            for start in range(0, len(self.xml), self.CHUNK_SIZE)]
+    
+    @classmethod
+    def from_file(cls, file_path: str, compresslevel: int = 6) -> "DocxPatcher":
+        """Index the DOCX file at a path"""
+        with open(file_path, "rb") as f:
+            return cls(f.read(), compresslevel)
+    
+    def _index(self) -> str:
+        """Walk the XML as DOCXExtractor does, recording where each piece of text comes from"""
+        w, xml = self.w, self.xml
+        p, r, t, tc, tr, tbl = (f"{w}:{name}" for name in ("p", "r", "t", "tc", "tr", "tbl"))
+        rpr, ppr, br = f"{w}:rPr", f"{w}:pPr", f"{w}:br"
+        symbols = {f"{w}:tab": "\t", f"{w}:ptab": "\t", f"{w}:cr": "\n", f"{w}:noBreakHyphen": "-"}
+        fallback = f"{self._mc}:Fallback"
+        
+        # Open paragraphs and cells, innermost last, as [tag, pieces, XML offsets]
+        containers: List[List[Any]] = []
+        # Item index of each body paragraph, and its offsets
+        body_paragraphs: Dict[int, Dict[str, Optional[int]]] = {}
+        # Cells of the open rows, innermost table last
+        rows: List[List[List[Any]]] = []
+        # Properties of the open runs, innermost last, and where the open w:rPr starts
+        runs: List[str] = []
+        parents: List[str] = []
+        items: List[List[Any]] = []
+        run_properties_start = None
+        text_open = None
+        skip_depth = 0
+        
+        for match in TAG.finditer(xml):
+            closing, tag, attributes = match.group(1), match.group(2), match.group(3)
+            self_closing = attributes.endswith("/")
+            
+            if tag == fallback:
+                if not self_closing:
+                    skip_depth += -1 if closing else 1
+                continue
+            if skip_depth:
+                continue
+            
+            if not closing:
+                if tag == p:
+                    containers.append([p, [], {"xml_start": match.start(), "content_start": match.end()}])
+                elif tag == r:
+                    runs.append("")
+                elif tag == tc:
+                    containers.append([tc, [], None])
+                elif tag == tr:
+                    rows[-1] = []
+                elif tag == tbl:
+                    rows.append([])
+                elif tag == rpr and parents and parents[-1] == r:
+                    if self_closing:
+                        runs[-1] = match.group(0)
+                    else:
+                        run_properties_start = match.start()
+                elif tag == t:
+                    text_open = match
+                if not self_closing:
+                    parents.append(tag)
+                    continue
+            else:
+                parents.pop()
+            
+            # End of an element, whether closing or self-closing
+            if runs and containers and containers[-1][0] == p:
+                pieces = containers[-1][1]
+                if tag == t and closing and text_open is not None:
+                    start, end = text_open.end(), match.start()
+                    raw = xml[start:end]
+                    # Empty texts add nothing and have nowhere to put an edit
+                    if raw:
+                        preserved = 'xml:space="preserve"' in text_open.group(3)
+                        pieces.append((html.unescape(raw) if "&" in raw else raw, start, end,
+                                       text_open.end() - 1, preserved, runs[-1]))
+                elif tag in symbols:
+                    pieces.append(symbols[tag])
+                elif tag == br:
+                    # Page and column breaks have no text equivalent
+                    if re.search(rf'\b{w}:type="(?!textWrapping")', attributes) is None:
+                        pieces.append("\n")
+            
+            if tag == t:
+                text_open = None
+            elif tag == ppr and parents and parents[-1] == p:
+                # Runs moved into a paragraph go after its properties
+                containers[-1][2]["content_start"] = match.end()
+            elif tag == rpr and closing and run_properties_start is not None and parents and parents[-1] == r:
+                runs[-1] = xml[run_properties_start:match.end()]
+                run_properties_start = None
+            elif tag == r:
+                runs.pop()
+            elif tag == p:
+                _, pieces, offsets = containers.pop()
+                if containers and containers[-1][0] == tc:
+                    containers[-1][1].append(pieces)
+                else:
+                    if not containers:
+                        # A self-closing paragraph has no closing tag to join others into
+                        offsets.update(close_start=match.start() if closing else None, xml_end=match.end())
+                        body_paragraphs[len(items)] = offsets
+                    items.append(pieces + ["\n"])
+            elif tag == tc:
+                paragraphs = containers.pop()[1]
+                cell = []
+                for k, paragraph in enumerate(paragraphs):
+                    cell += (["\n"] if k else []) + paragraph
+                rows[-1].append(cell + ["\t"])
+            elif tag == tr:
+                # Cells are held until the row ends so the last one can end the line
+                if rows[-1]:
+                    rows[-1][-1].append("\n")
+                items.extend(rows[-1])
+                rows[-1] = []
+            elif tag == tbl:
+                rows.pop()
+        
+        offset = 0
+        text = []
+        for item, pieces in enumerate(items):
+            paragraph = body_paragraphs.get(item)
+            if paragraph is not None:
+                paragraph["text_start"] = offset
+                self._paragraphs.append(paragraph)
+            for piece in pieces:
+                if isinstance(piece, tuple):
+                    self._starts.append(offset)
+                    self._texts.append(piece)
+                    piece = piece[0]
+                text.append(piece)
+                offset += len(piece)
+            if paragraph is not None:
+                # Offset of the newline ending the paragraph
+                paragraph["text_end"] = offset - 1
+        return "".join(text)
+    
+    def patch(self, edits: List[Dict[str, Any]], run_properties: Optional[Dict[str, Dict[str, str]]] = None,
+              leading_paragraphs: Optional[List[Dict[str, Any]]] = None) -> bytes:
+        """Get the DOCX file with edits of its text applied
+        
+        Edits are dicts with a ``position`` (start, end) in ``text`` and the
+        ``new_text``, like generator modifications; newlines in the new text
+        become line breaks. ``run_properties`` marks the new text, e.g.
+        ``{"b": {}, "color": {"val": "FF0000"}}`` for bold red. Edits
+        overlapping an earlier one, or with new text and no run text left to
+        put it in, are skipped. ``leading_paragraphs`` are added before the first body
+        element, each a dict of its ``text`` and optional ``run_properties``
+        and ``paragraph_properties`` in the same form.
+        """
+        # (start, end, text) replacements of the XML
+        splices: List[Tuple[int, int, str]] = []
+        if leading_paragraphs:
+            body = re.search(rf'<{self.w}:body(?:\s[^>]*)?>', self.xml)
+            if body is None:
+                raise ValueError("Document has no body to add paragraphs to")
+            splices.append((body.end(), body.end(), "".join(
+                self._paragraph(**paragraph) for paragraph in leading_paragraphs
+            )))
+        preserved = set()
+        skipped = 0
+        last_end = -1
+        
+        for edit in sorted(edits, key=lambda edit: edit["position"][0]):
+            start, end = edit["position"]
+            first = max(bisect_right(self._starts, start) - 1, 0)
+            covered = [
+                k for k in range(first, bisect_right(self._starts, max(end - 1, start)))
+                if self._starts[k] + len(self._texts[k][0]) > start
+            ]
+            joined = self._joined_paragraphs(start, end, bool(edit["new_text"]))
+            if joined:
+                # Texts inside the removed XML go with it
+                covered = [k for k in covered if not joined[0] <= self._texts[k][1] < joined[1]]
+            if start < last_end or not (covered or joined and not edit["new_text"]):
+                skipped += 1
+                continue
+            last_end = end
+            if joined:
+                splices.append(joined)
+            
+            for n, k in enumerate(covered):
+                text, content_start, content_end, tag_end, is_preserved, properties = self._texts[k]
+                local_start = max(start - self._starts[k], 0)
+                local_end = min(end - self._starts[k], len(text))
+                raw_start = content_start + self._raw_length(content_start, content_end, local_start)
+                raw_end = content_start + self._raw_length(content_start, content_end, local_end)
+                
+                if not is_preserved and k not in preserved:
+                    preserved.add(k)
+                    splices.append((tag_end, tag_end, ' xml:space="preserve"'))
+                # The new text goes in its own run at the start of the first text covered
+                splices.append((raw_start, raw_end, self._new_run(edit["new_text"], properties, run_properties)
+                                if n == 0 else ""))
+        
+        if skipped:
+            logger.warning(f"{skipped} edits could not be placed in the document runs")
+        return replace_members(self.docx, {self.DOCUMENT_PART: self._patched_part(splices)})
+    
+    def _joined_paragraphs(self, start: int, end: int, keep_first: bool) -> Optional[Tuple[int, int, str]]:
+        """Get the XML splice joining the body paragraphs whose newlines an edit covers
+        
+        The paragraphs joined become one: the first, with the runs of the
+        others moved into it, unless the edit covers its whole text and has
+        no text of its own, in which case the paragraphs it covers entirely
+        are dropped and the last one stays. Without a paragraph after the
+        last newline, paragraphs covered entirely are dropped with it. Returns
+        None when the edit leaves the paragraph structure as it is.
+        """
+        k = bisect_right(self._paragraph_starts, start) - 1
+        if k < 0 or self._paragraphs[k]["text_end"] < start:
+            return None
+        
+        group = [self._paragraphs[k]]
+        open_end = False
+        while group[-1]["text_end"] < end:
+            following = self._paragraphs[k + len(group)] if k + len(group) < len(self._paragraphs) else None
+            if following is None or following["text_start"] != group[-1]["text_end"] + 1:
+                open_end = True
+                break
+            group.append(following)
+        
+        def whole(paragraph):
+            return start <= paragraph["text_start"] and paragraph["text_end"] <= end
+        
+        if open_end:
+            # The edit runs on into a table, or the body ends; only whole paragraphs can go
+            if keep_first or not all(whole(paragraph) for paragraph in group) or end > group[-1]["text_end"] + 1:
+                return None
+            return group[0]["xml_start"], group[-1]["xml_end"], ""
+        if len(group) == 1:
+            return None
+        
+        first, last = group[0], group[-1]
+        if keep_first or not whole(first) or all(whole(paragraph) for paragraph in group):
+            if first["close_start"] is None:
+                return None
+            if last["close_start"] is None:
+                return first["close_start"], last["xml_end"], f"</{self.w}:p>"
+            return first["close_start"], last["content_start"], ""
+        
+        kept = next(paragraph for paragraph in group if not whole(paragraph))
+        return first["xml_start"], kept["xml_start"], ""
+    
+    def _patched_part(self, splices: List[Tuple[int, int, str]]) -> Union[bytes, Deflated]:
+        """Get the document XML with splices applied, deflated from the cached chunks if it can be"""
+        if not self._chunks:
+            buffer = EditBuffer(self.xml)
+            for start, end, text in splices:
+                buffer.replace(start, end, text)
+            return buffer.text().encode("utf-8")
+        
+        # A splice dirties every chunk it touches; an insertion the chunk it lands in
+        size = self.CHUNK_SIZE
+        dirty = {k for start, end, _ in splices for k in range(start // size, max(start, end - 1) // size + 1)}
+        splices = sorted(splices)
+        
+        data, crc, length = [], 0, 0
+        k = next_splice = 0
+        while k < len(self._chunks):
+            if k not in dirty:
+                content, deflated = self._chunks[k]
+                k += 1
+            else:
+                # Consecutive dirty chunks are rebuilt together, holding every splice that starts in them
+                last = k
+                while last + 1 in dirty:
+                    last += 1
+                region_start, region_end = k * size, min((last + 1) * size, len(self.xml))
+                buffer = EditBuffer(self.xml[region_start:region_end])
+                while next_splice < len(splices) and splices[next_splice][0] < region_end:
+                    start, end, text = splices[next_splice]
+                    buffer.replace(start - region_start, end - region_start, text)
+                    next_splice += 1
+                content, deflated = self._deflate(buffer.text())
+                k = last + 1
+            data.append(deflated)
+            crc = zlib.crc32(content, crc)
+            length += len(content)
+        
+        data.append(FINAL_BLOCK)
+        return b"".join(data), crc, length
+    
+    def _deflate(self, text: str) -> Tuple[bytes, bytes]:
+        """Encode and deflate a piece of XML into blocks that end on a byte boundary"""
+        content = text.encode("utf-8")
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+        return content, compressor.compress(content) + compressor.flush(zlib.Z_FULL_FLUSH)
+    
+    def _raw_length(self, content_start: int, content_end: int, characters: int) -> int:
+        """Get the length of the escaped XML holding the first characters of a w:t's text"""
+        raw = self.xml[content_start:content_end]
+        if "&" not in raw:
+            return characters
+        position = 0
+        for _ in range(characters):
+            position = raw.index(";", position) + 1 if raw[position] == "&" else position + 1
+        return position
+    
+    def _new_run(self, text: str, properties: str, run_properties: Optional[Dict[str, Dict[str, str]]]) -> str:
+        """Close the current run, add one with the new text, and reopen the current run"""
+        w = self.w
+        marked = self._marked_properties(properties, run_properties) if run_properties else properties
+        return (f'</{w}:t></{w}:r><{w}:r>{marked}<{w}:t xml:space="preserve">{self._run_text(text)}</{w}:t></{w}:r>'
+                f'<{w}:r>{properties}<{w}:t xml:space="preserve">')
+    
+    def _run_text(self, text: str) -> str:
+        """Escape text for a w:t, turning newlines into line breaks within the run"""
+        w = self.w
+        return escape(text).replace("\n", f'</{w}:t><{w}:br/><{w}:t xml:space="preserve">')
+    
+    def _paragraph(self, text: str, run_properties: Optional[Dict[str, Dict[str, str]]] = None,
+                   paragraph_properties: Optional[Dict[str, Dict[str, str]]] = None) -> str:
+        """Build a paragraph of one run of text"""
+        w = self.w
+        paragraph = self._properties("pPr", paragraph_properties) if paragraph_properties else ""
+        run = self._marked_properties("", run_properties) if run_properties else ""
+        return f'<{w}:p>{paragraph}<{w}:r>{run}<{w}:t xml:space="preserve">{self._run_text(text)}</{w}:t></{w}:r></{w}:p>'
+    
+    def _properties(self, name: str, properties: Dict[str, Dict[str, str]]) -> str:
+        """Build a properties element, e.g. w:pPr, from ``{"jc": {"val": "center"}}``"""
+        w = self.w
+        children = "".join(
+            f"<{w}:{child}{''.join(f' {w}:{key}={quoteattr(value)}' for key, value in attributes.items())}/>"
+            for child, attributes in properties.items()
+        )
+        return f"<{w}:{name}>{children}</{w}:{name}>"
+    
+    def _marked_properties(self, properties: str, run_properties: Dict[str, Dict[str, str]]) -> str:
+        """Add properties to a run's w:rPr, replacing any with the same name, in schema order"""
+        w = self.w
+        children = []
+        if properties and not properties.endswith("/>"):
+            inner = properties[properties.index(">") + 1:properties.rindex("<")]
+            depth = 0
+            for match in TAG.finditer(inner):
+                if match.group(1):
+                    depth -= 1
+                else:
+                    if depth == 0:
+                        child_start = match.start()
+                    if not match.group(3).endswith("/"):
+                        depth += 1
+                if depth == 0:
+                    children.append((match.group(2), inner[child_start:match.end()]))
+        
+        children = [(tag, raw) for tag, raw in children if tag.split(":")[-1] not in run_properties]
+        for name, attributes in run_properties.items():
+            values = "".join(f" {w}:{key}={quoteattr(value)}" for key, value in attributes.items())
+            children.append((name, f"<{w}:{name}{values}/>"))
+        
+        order = {name: index for index, name in enumerate(RUN_PROPERTY_ORDER)}
+        children.sort(key=lambda child: order.get(child[0].split(":")[-1], len(order)))
+        return f"<{w}:rPr>{''.join(raw for _, raw in children)}</{w}:rPr>"
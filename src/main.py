@@ -22,6 +22,8 @@ from .parsers.template_parser import TemplateParser
 from .preprocessors.template_preprocessor import TemplatePreprocessor
 from .generators.cp_generator import CPGenerator
 from .utils.file_manager import FileManager
+from .utils.parse_cache import ParseCache
+from .utils.content_store import UploadRejectedError, UploadTooLargeError
 from .utils.logger import setup_logging
 
 # Setup logging
@@ -55,8 +57,12 @@ templates = Jinja2Templates(directory="templates")
 
 # Initialize components
 file_manager = FileManager()
-recap_parser = RecapParser()
-template_parser = TemplateParser()
+parse_cache = ParseCache("cache")
+recap_parser = RecapParser(cache=parse_cache)
+# Template families are kept in a subdirectory so parse cache eviction never removes them
+template_parser = TemplateParser(
+    cache=parse_cache, fingerprint_path=os.path.join("cache", "fingerprints", "template_families.json")
+)
 template_preprocessor = TemplatePreprocessor()
 cp_generator = CPGenerator()
 
@@ -81,9 +87,16 @@ async def health_check():
 async def upload_template(
     file: UploadFile = File(...),
     template_type: str = "GENCON",
+    sections: str = "",
     db = Depends(get_db)
 ):
-    """Upload and process a base CP template"""
+    """Upload and process a base CP template
+    
+    ``sections`` is a comma-separated list of the analysis sections to store
+    with the template now (template_structure, fillable_areas,
+    formatting_info) or "all". Generation needs none of them; any left out
+    are computed on first request to /api/templates/{id}/sections/{section}.
+    """
     try:
         logger.info(f"Uploading template: {file.filename}")
         
@@ -91,12 +104,14 @@ async def upload_template(
         if not file.filename.lower().endswith(('.pdf', '.docx', '.doc')):
             raise HTTPException(status_code=400, detail="Invalid file type. Only PDF and DOCX files are supported.")
         
+        requested = _requested_sections(sections)
+        
         # Save uploaded file
         file_path = await file_manager.save_upload(file, "templates")
         
         # Parse and preprocess template
         parsed_template = await template_parser.parse(file_path)
-        preprocessed_template = await template_preprocessor.process(parsed_template, template_type)
+        preprocessed_template = await template_preprocessor.process(parsed_template, template_type, requested)
         
         # Save to database
         template = CPTemplate(
@@ -114,19 +129,72 @@ async def upload_template(
             "filename": file.filename,
             "type": template_type,
             "fields_detected": len(preprocessed_template.get("fields", [])),
+            "sections": requested,
             "status": "processed"
         }
         
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error uploading template: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing template: {str(e)}")
 
+def _requested_sections(sections: str) -> List[str]:
+    """Parse the comma-separated sections parameter of a template upload"""
+    requested = [section.strip() for section in sections.split(",") if section.strip()]
+    if requested == ["all"]:
+        return list(TemplatePreprocessor.LAZY_SECTIONS)
+    
+    unknown = [section for section in requested if section not in TemplatePreprocessor.LAZY_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sections: {', '.join(unknown)}. Use all or any of: "
+                   f"{', '.join(TemplatePreprocessor.LAZY_SECTIONS)}"
+        )
+    return requested
+
+@app.get("/api/templates/{template_id}/sections/{section}")
+async def get_template_section(template_id: int, section: str, db = Depends(get_db)):
+    """Get an analysis section of a template, computing and storing it on first request"""
+    try:
+        if section not in TemplatePreprocessor.LAZY_SECTIONS:
+            raise HTTPException(status_code=404, detail=f"Unknown template section: {section}")
+        
+        template = CPTemplate.get_by_id(db, template_id)
+        if not template:
+            raise HTTPException(status_code=404, detail="Template not found")
+        
+        if section not in template.processed_data:
+            # The template file parses from the parse cache after its upload
+            parsed_template = await template_parser.parse(template.file_path)
+            template_preprocessor.materialize(template.processed_data, parsed_template, [section])
+            template.update_processed_data(db)
+        
+        return {"template_id": template_id, "section": section, "data": template.processed_data[section]}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting template section: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting template section: {str(e)}")
+
 @app.post("/api/upload-recap")
 async def upload_recap(
     file: UploadFile = File(...),
+    template_type: Optional[str] = None,
+    mode: str = "tiered",
     db = Depends(get_db)
 ):
-    """Upload and parse a recap document"""
+    """Upload and parse a recap document
+    
+    ``mode`` is fast (regex only), tiered (NLP only for terms regex missed)
+    or full (always NLP).
+    """
     try:
         logger.info(f"Uploading recap: {file.filename}")
         
@@ -134,11 +202,14 @@ async def upload_recap(
         if not file.filename.lower().endswith(('.pdf', '.docx', '.doc', '.txt')):
             raise HTTPException(status_code=400, detail="Invalid file type. Only PDF, DOCX, and TXT files are supported.")
         
+        if mode not in RecapParser.EXTRACTION_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid mode. Use one of: {', '.join(RecapParser.EXTRACTION_MODES)}")
+        
         # Save uploaded file
         file_path = await file_manager.save_upload(file, "recaps")
         
-        # Parse recap document
-        parsed_recap = await recap_parser.parse(file_path)
+        # Parse recap document, stopping early once the template's required terms are found
+        parsed_recap = await recap_parser.parse(file_path, template_type=template_type, mode=mode)
         
         # Save to database
         recap = RecapDocument(
@@ -154,9 +225,16 @@ async def upload_recap(
             "recap_id": recap_id,
             "filename": file.filename,
             "terms_extracted": len(parsed_recap.get("terms", [])),
+            "nlp_run": parsed_recap.get("extraction_info", {}).get("nlp_run"),
             "status": "processed"
         }
         
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error uploading recap: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing recap: {str(e)}")
@@ -183,7 +261,8 @@ async def generate_charter_party(
         generated_cp = await cp_generator.generate(
             template.processed_data,
             recap.parsed_data,
-            output_format
+            output_format,
+            template_path=template.file_path
         )
         
         # Save generated document
@@ -205,6 +284,7 @@ async def generate_charter_party(
             "cp_id": cp_id,
             "output_path": str(output_path),
             "changes_count": len(generated_cp.get("changes", [])),
+            "amendments_applied": sum(1 for a in generated_cp.get("amendments", []) if a["status"] == "applied"),
             "format": output_format,
             "status": "generated"
         }
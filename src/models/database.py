@@ -87,6 +87,13 @@ class CPTemplate(CPTemplateBase):
         db.refresh(db_template)
         return db_template.id
     
+    def update_processed_data(self, db: Session):
+        """Store the template's processed data, e.g. after adding sections to it"""
+        db.query(CPTemplateDB).filter(CPTemplateDB.id == self.id).update(
+            {"processed_data": dict(self.processed_data)}
+        )
+        db.commit()
+    
     @classmethod
     def get_by_id(cls, db: Session, template_id: int) -> Optional["CPTemplate"]:
         """Get template by ID"""
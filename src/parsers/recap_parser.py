@@ -4,34 +4,79 @@ Recap Document Parser for extracting commercial terms from recap documents
 
 import re
 import os
+from contextlib import closing
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Set, Tuple
 import logging
 
-import spacy
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
+from ..extractors.pdf_extractor import PDFExtractor
+from ..extractors.docx_extractor import DOCXExtractor
+from ..extractors.text_stream import (
+    iter_paragraph_blocks, iter_text_chunks, iter_text_file_blocks, iter_with_lookahead
+)
+from ..generators.clause_amender import find_amendments
+from ..preprocessors.template_preprocessor import TemplatePreprocessor
+from ..utils.interval_index import IntervalIndex
+from ..utils.nlp_resources import load_spacy_model, load_stopwords
+from ..utils.parse_cache import ParseCache, rules_hash, file_digest
+from ..utils.pattern_scanner import PatternScanner
+from ..utils.regex_guard import RegexGuard
 
 try:
     import PyPDF2
     import pdfplumber
-    from docx import Document
 except ImportError:
     # Handle import errors gracefully
     PyPDF2 = None
     pdfplumber = None
-    Document = None
 
 logger = logging.getLogger(__name__)
 
 class RecapParser:
     """Parser for extracting commercial terms from recap documents"""
     
-    def __init__(self):
-        self.nlp = None
-        self.stop_words = set()
-        self._initialize_nlp()
+    # Bump when extraction logic changes in a way the rule hash cannot see
+    PARSER_VERSION = "1.5"
+    NLP_MODEL = "en_core_web_sm"
+    # Pipeline components that neither doc.ents nor doc.noun_chunks depend on
+    NLP_UNUSED_COMPONENTS = ("lemmatizer", "senter", "textcat", "textcat_multilabel", "spancat")
+    NLP_ENTITY_LABELS = ('ORG', 'GPE', 'MONEY', 'DATE', 'PRODUCT')
+    # Term types that the entities above can stand in for when regex finds nothing
+    NLP_FILLABLE_TERMS = frozenset([
+        'charterer', 'owner',  # ORG
+        'load_port', 'discharge_port',  # GPE
+        'freight', 'demurrage', 'despatch',  # MONEY
+        'laycan',  # DATE
+        'cargo'  # PRODUCT
+    ])
+    
+    # fast: regex only; tiered: NLP only when regex leaves a fillable term
+    # missing or unconfident; full: always run NLP
+    EXTRACTION_MODES = ("fast", "tiered", "full")
+    
+    # Template required-field names that differ from this parser's term types
+    REQUIRED_FIELD_ALIASES = {
+        'vessel_name': 'vessel',
+        'freight_rate': 'freight'
+    }
+    
+    def __init__(self, cache: Optional[ParseCache] = None, min_confidence: float = 0.8,
+                 regex_time_budget: Optional[float] = 1.0,
+                 nlp_batch_size: int = 64, nlp_n_process: int = 1):
+        self.cache = cache
+        # Seconds each term pattern may spend on a document before it is skipped
+        self.regex_guard = RegexGuard(regex_time_budget)
+        self.pdf_extractor = PDFExtractor()
+        self.docx_extractor = DOCXExtractor()
+        self.template_preprocessor = TemplatePreprocessor()
+        # A required term counts as filled once a match reaches this confidence
+        self.min_confidence = min_confidence
+        # The spaCy model is loaded on first use, see the nlp property
+        self._nlp = None
+        self._nlp_loaded = False
+        # Paragraphs per nlp.pipe batch and worker processes for the NLP stage
+        self.nlp_batch_size = nlp_batch_size
+        self.nlp_n_process = nlp_n_process
         
         # Commercial terms patterns
         self.term_patterns = {
@@ -89,51 +134,109 @@ class RecapParser:
                 r'disponent[:\s]+(.+?)(?:\n|$)'
             ]
         }
-    
-    def _initialize_nlp(self):
-        """Initialize NLP components"""
-        try:
-            # Load spaCy model
-            self.nlp = spacy.load("en_core_web_sm")
-            logger.info("spaCy model loaded successfully")
-        except OSError:
-            logger.warning("spaCy model not found. NLP features will be limited.")
-            self.nlp = None
         
-        try:
-            # Download NLTK data if needed
-            nltk.download('punkt', quiet=True)
-            nltk.download('stopwords', quiet=True)
-            self.stop_words = set(stopwords.words('english'))
-            logger.info("NLTK components loaded successfully")
-        except Exception as e:
-            logger.warning(f"Error loading NLTK components: {e}")
+        # All term patterns compiled once and scanned with a shared prefilter
+        self.term_scanner = PatternScanner(
+            self.term_patterns, re.IGNORECASE | re.MULTILINE, guard=self.regex_guard
+        )
+    
+    @property
+    def nlp(self):
+        """The spaCy pipeline, loaded from locally installed models on first use"""
+        if not self._nlp_loaded:
+            self._nlp = load_spacy_model(self.NLP_MODEL)
+            self._nlp_loaded = True
+        return self._nlp
     
-    async def parse(self, file_path: str) -> Dict[str, Any]:
-        """Parse a recap document and extract commercial terms"""
+    @nlp.setter
+    def nlp(self, value):
+        self._nlp = value
+        self._nlp_loaded = True
+    
+    @property
+    def stop_words(self):
+        """English stopwords from local NLTK data, loaded on first use"""
+        return load_stopwords('english')
+    
+    async def parse(self, file_path: str, template_type: Optional[str] = None,
+                    mode: str = "tiered", with_amendments: bool = True) -> Dict[str, Any]:
+        """Parse a recap document and extract commercial terms
+        
+        When a template type is given, term extraction stops as soon as every
+        required field of that template that this parser can extract has been
+        found. ``mode`` is one of ``EXTRACTION_MODES`` and decides when NLP
+        runs. With ``with_amendments``, clause amendments may appear anywhere
+        in the recap, so the rest of the document is still read and
+        ``original_text`` is the whole recap; without it reading stops with
+        the terms and ``original_text`` is the part read.
+        """
+        if mode not in self.EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode: {mode}")
+        
         try:
-            # Extract text from file
-            text = await self._extract_text(file_path)
+            required_terms = self._required_terms(template_type)
+            
+            cache_key = self._cache_key(file_path, required_terms, mode, with_amendments)
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached:
+                    cached["file_info"]["filename"] = os.path.basename(file_path)
+                    logger.info(f"Parse cache hit for recap document: {file_path}")
+                    return cached
+            
+            # Extract commercial terms while the text is being read
+            self.regex_guard.reset()
+            # Every block taken from the document, including those read past the terms
+            document_blocks = []
+            with closing(self._iter_text(file_path)) as blocks:
+                stream = (document_blocks.append(block) or block for block in blocks) if with_amendments else blocks
+                terms, read_blocks, early_exit = self._extract_terms_stream(stream, required_terms)
+                if with_amendments:
+                    document_blocks.extend(blocks)
+            
+            text = "".join(document_blocks if with_amendments else read_blocks)
             if not text:
                 raise ValueError("No text could be extracted from the file")
             
-            # Extract commercial terms
-            terms = self._extract_terms(text)
+            amendments = find_amendments(text) if with_amendments else []
+            
+            # Terms the template needs, or every term without a template
+            missing_terms = self._missing_terms(terms, required_terms or set(self.term_patterns))
+            run_nlp = mode == "full" or (mode == "tiered" and bool(missing_terms & self.NLP_FILLABLE_TERMS))
             
             # Perform NLP analysis
-            nlp_analysis = self._perform_nlp_analysis(text)
+            nlp_analysis = self._perform_nlp_analysis(text) if run_nlp else self._empty_nlp_analysis()
             
             # Structure the parsed data
             parsed_data = {
                 "original_text": text,
                 "terms": terms,
+                "amendments": amendments,
                 "nlp_analysis": nlp_analysis,
                 "file_info": {
                     "filename": os.path.basename(file_path),
                     "file_type": Path(file_path).suffix.lower()
-                }
+                },
+                "stream_info": {
+                    "template_type": template_type,
+                    "blocks_read": len(read_blocks),
+                    "early_exit": early_exit
+                },
+                "extraction_info": {
+                    "mode": mode,
+                    "nlp_run": run_nlp,
+                    "missing_terms": sorted(missing_terms)
+                },
+                "tripped_rules": list(self.regex_guard.tripped)
             }
             
+            # A rule that ran out of time may succeed on a later attempt
+            if cache_key and not parsed_data["tripped_rules"]:
+                self.cache.put(cache_key, parsed_data)
+            
+            if early_exit:
+                skipped = "read the rest for amendments" if with_amendments else "skipped the rest"
+                logger.info(f"Required terms filled after {len(read_blocks)} blocks, {skipped} of {file_path}")
             logger.info(f"Successfully parsed recap document: {len(terms)} terms extracted")
             return parsed_data
             
@@ -141,105 +244,106 @@ class RecapParser:
             logger.error(f"Error parsing recap document {file_path}: {str(e)}")
             raise
     
-    async def _extract_text(self, file_path: str) -> str:
-        """Extract text from various file formats"""
-        file_ext = Path(file_path).suffix.lower()
-        
-        try:
-            if file_ext == '.txt':
-                return self._extract_from_txt(file_path)
-            elif file_ext == '.pdf':
-                return self._extract_from_pdf(file_path)
-            elif file_ext in ['.docx', '.doc']:
-                return self._extract_from_docx(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_ext}")
-        except Exception as e:
-            logger.error(f"Error extracting text from {file_path}: {str(e)}")
-            raise
+    def _cache_key(self, file_path: str, required_terms: Optional[Set[str]] = None,
+                   mode: str = "tiered", with_amendments: bool = True) -> Optional[str]:
+        """Build the parse cache key for a file, or None when caching is disabled"""
+        if not self.cache:
+            return None
+        return self.cache.make_key(
+            "recap",
+            file_digest(file_path),
+            self.PARSER_VERSION,
+            rules_hash(self.term_patterns, self.NLP_MODEL, sorted(required_terms or []), mode, with_amendments)
+        )
     
-    def _extract_from_txt(self, file_path: str) -> str:
-        """Extract text from TXT file"""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+    def _required_terms(self, template_type: Optional[str]) -> Set[str]:
+        """Map a template's required fields onto the term types this parser extracts"""
+        required = set()
+        for field in self.template_preprocessor.get_required_fields(template_type):
+            term_type = self.REQUIRED_FIELD_ALIASES.get(field, field)
+            # Fields without patterns cannot be filled by reading further
+            if term_type in self.term_patterns:
+                required.add(term_type)
+        return required
     
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
-        text = ""
-        
-        # Try pdfplumber first (better for tables and complex layouts)
-        if pdfplumber:
-            try:
-                with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                if text.strip():
-                    return text
-            except Exception as e:
-                logger.warning(f"pdfplumber failed: {e}, trying PyPDF2")
-        
-        # Fallback to PyPDF2
-        if PyPDF2:
-            try:
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                return text
-            except Exception as e:
-                logger.error(f"PyPDF2 also failed: {e}")
-                raise
-        
-        raise ImportError("No PDF processing library available")
-    
-    def _extract_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file"""
-        if not Document:
-            raise ImportError("python-docx library not available")
-        
-        doc = Document(file_path)
-        text = ""
-        
-        # Extract text from paragraphs
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        
-        # Extract text from tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    text += cell.text + "\t"
-                text += "\n"
+    def _iter_text(self, file_path: str) -> Iterator[str]:
+        """Yield the text of a document in order: pages for PDF, paragraphs otherwise"""
+        file_ext = Path(file_path).suffix.lower()
         
-        return text
+        if file_ext == '.txt':
+            yield from iter_text_file_blocks(file_path)
+        elif file_ext == '.pdf':
+            if not pdfplumber and not PyPDF2:
+                raise ImportError("No PDF processing library available")
+            yield from self.pdf_extractor.iter_text(file_path)
+        elif file_ext in ['.docx', '.doc']:
+            yield from iter_paragraph_blocks(self.docx_extractor.iter_text(file_path))
+        else:
+            raise ValueError(f"Unsupported file format: {file_ext}")
     
     def _extract_terms(self, text: str) -> Dict[str, Any]:
         """Extract commercial terms using regex patterns"""
-        terms = {}
-        text_lower = text.lower()
+        terms, _, _ = self._extract_terms_stream([text])
+        return terms
+    
+    def _extract_terms_stream(self,
+                              blocks: Iterable[str],
+                              required_terms: Optional[Set[str]] = None) -> Tuple[Dict[str, Any], List[str], bool]:
+        """Extract commercial terms block by block
         
-        for term_type, patterns in self.term_patterns.items():
-            matches = []
-            
-            for pattern in patterns:
-                regex_matches = re.finditer(pattern, text_lower, re.IGNORECASE | re.MULTILINE)
-                for match in regex_matches:
-                    if match.groups():
-                        matches.append({
-                            "value": match.group(1).strip() if len(match.groups()) >= 1 else match.group(0).strip(),
-                            "full_match": match.group(0).strip(),
-                            "confidence": 0.8,  # Base confidence for regex matches
-                            "position": match.span()
-                        })
+        Returns the terms, the blocks that were read and whether reading
+        stopped early because all required terms were confidently filled.
+        Match positions are relative to the joined text of the blocks read.
+        """
+        matches_by_term: Dict[str, List[Dict]] = {term_type: [] for term_type in self.term_patterns}
+        read_blocks = []
+        offset = 0
+        early_exit = False
+        
+        for block, lookahead in iter_with_lookahead(blocks):
+            read_blocks.append(block)
+            self._collect_term_matches(block + lookahead, offset, matches_by_term, match_before=len(block))
+            offset += len(block)
             
+            if required_terms and self._terms_filled(matches_by_term, required_terms):
+                early_exit = True
+                break
+        
+        terms = {}
+        for term_type, matches in matches_by_term.items():
             if matches:
                 # Remove duplicates and keep the best match
-                unique_matches = self._deduplicate_matches(matches)
-                terms[term_type] = unique_matches
+                terms[term_type] = self._deduplicate_matches(matches)
         
-        return terms
+        return terms, read_blocks, early_exit
+    
+    def _collect_term_matches(self, text: str, offset: int, matches_by_term: Dict[str, List[Dict]],
+                              match_before: Optional[int] = None):
+        """Add the regex matches found in one block of text
+        
+        Only matches starting before ``match_before`` are kept, so a block can
+        be scanned together with the start of the next one.
+        """
+        for term_type, match in self.term_scanner.iter_matches(text.lower(), match_before):
+            if match.groups():
+                start, end = match.span()
+                matches_by_term[term_type].append({
+                    "value": match.group(1).strip() if len(match.groups()) >= 1 else match.group(0).strip(),
+                    "full_match": match.group(0).strip(),
+                    "confidence": 0.8,  # Base confidence for regex matches
+                    "position": (start + offset, end + offset)
+                })
+    
+    def _terms_filled(self, matches_by_term: Dict[str, List[Dict]], required_terms: Set[str]) -> bool:
+        """Check whether every required term has a confident match"""
+        return not self._missing_terms(matches_by_term, required_terms)
+    
+    def _missing_terms(self, matches_by_term: Dict[str, List[Dict]], term_types: Set[str]) -> Set[str]:
+        """Get the term types without a match reaching ``min_confidence``"""
+        return {
+            term_type for term_type in term_types
+            if not any(match["confidence"] >= self.min_confidence for match in matches_by_term.get(term_type, []))
+        }
     
     def _deduplicate_matches(self, matches: List[Dict]) -> List[Dict]:
         """Remove duplicate matches and keep the best ones"""
@@ -249,57 +353,37 @@ class RecapParser:
         # Sort by confidence and position
         matches.sort(key=lambda x: (x['confidence'], -x['position'][0]), reverse=True)
         
-        # Remove near-duplicates
+        # Remove near-duplicates: a match overlapping a better one is dropped
         unique_matches = []
+        accepted = IntervalIndex()
         for match in matches:
-            is_duplicate = False
-            for existing in unique_matches:
-                # Check if positions overlap significantly
-                overlap = min(match['position'][1], existing['position'][1]) - max(match['position'][0], existing['position'][0])
-                if overlap > 0:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
+            if accepted.add(*match['position']):
                 unique_matches.append(match)
         
         return unique_matches
     
     def _perform_nlp_analysis(self, text: str) -> Dict[str, Any]:
-        """Perform NLP analysis on the text"""
-        analysis = {
-            "entities": [],
-            "key_phrases": [],
-            "sentiment": None,
-            "language": "en"
-        }
+        """Perform NLP analysis on the text
         
-        if not self.nlp:
+        Paragraphs are sent through ``nlp.pipe`` in batches with the components
+        that ``doc.ents`` and ``doc.noun_chunks`` do not need disabled.
+        Paragraphs longer than the model's ``max_length`` are split, and all
+        offsets refer to the whole text.
+        """
+        analysis = self._empty_nlp_analysis()
+        
+        nlp = self.nlp
+        if not nlp:
             return analysis
         
         try:
-            # Process text with spaCy
-            doc = self.nlp(text)
-            
-            # Extract named entities
-            for ent in doc.ents:
-                if ent.label_ in ['ORG', 'GPE', 'MONEY', 'DATE', 'PRODUCT']:
-                    analysis["entities"].append({
-                        "text": ent.text,
-                        "label": ent.label_,
-                        "confidence": 0.8,
-                        "start": ent.start_char,
-                        "end": ent.end_char
-                    })
+            chunks = ((chunk, offset) for offset, chunk in iter_text_chunks(text, nlp.max_length) if chunk.strip())
+            unused = [name for name in nlp.pipe_names if name in self.NLP_UNUSED_COMPONENTS]
             
-            # Extract key phrases (noun chunks)
-            for chunk in doc.noun_chunks:
-                if len(chunk.text.split()) > 1 and chunk.text.lower() not in self.stop_words:
-                    analysis["key_phrases"].append({
-                        "text": chunk.text,
-                        "pos": chunk.root.pos_,
-                        "confidence": 0.6
-                    })
+            with nlp.select_pipes(disable=unused):
+                docs = nlp.pipe(chunks, as_tuples=True, batch_size=self.nlp_batch_size, n_process=self.nlp_n_process)
+                for doc, offset in docs:
+                    self._collect_nlp_results(doc, offset, analysis)
             
             logger.info(f"NLP analysis completed: {len(analysis['entities'])} entities, {len(analysis['key_phrases'])} key phrases")
             
@@ -307,3 +391,37 @@ class RecapParser:
             logger.warning(f"Error in NLP analysis: {e}")
         
         return analysis
+    
+    def _empty_nlp_analysis(self) -> Dict[str, Any]:
+        """The NLP analysis of a text without entities or key phrases"""
+        return {
+            "entities": [],
+            "key_phrases": [],
+            "sentiment": None,
+            "language": "en"
+        }
+    
+    def _collect_nlp_results(self, doc, offset: int, analysis: Dict[str, Any]):
+        """Add the entities and key phrases of one paragraph's doc"""
+        # Extract named entities
+        for ent in doc.ents:
+            if ent.label_ in self.NLP_ENTITY_LABELS:
+                analysis["entities"].append({
+                    "text": ent.text,
+                    "label": ent.label_,
+                    "confidence": 0.8,
+                    "start": ent.start_char + offset,
+                    "end": ent.end_char + offset
+                })
+        
+        # Extract key phrases (noun chunks), which need the dependency parse
+        if not doc.has_annotation("DEP"):
+            return
+        for chunk in doc.noun_chunks:
+            if len(chunk.text.split()) > 1 and chunk.text.lower() not in self.stop_words:
+                analysis["key_phrases"].append({
+                    "text": chunk.text,
+                    "pos": chunk.root.pos_,
+                    "confidence": 0.6
+                })
+
@@ -5,27 +5,58 @@ Template Parser for processing base CP templates and identifying fillable fields
 import re
 import os
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import logging
+from bisect import bisect_right
 
 try:
     import PyPDF2
     import pdfplumber
-    from docx import Document
     from pdf2docx import Converter
 except ImportError:
     # Handle import errors gracefully
     PyPDF2 = None
     pdfplumber = None
-    Document = None
     Converter = None
 
+from ..extractors.pdf_extractor import PDFExtractor
+from ..extractors.docx_extractor import DOCXExtractor
+from ..utils.interval_index import IntervalIndex
+from ..utils.parse_cache import ParseCache, rules_hash, file_digest
+from ..utils.pattern_scanner import PatternScanner
+from ..utils.regex_guard import RegexGuard
+from ..utils.template_fingerprint import TemplateFingerprintIndex, stable_hash
+
 logger = logging.getLogger(__name__)
 
 class TemplateParser:
     """Parser for extracting structure and fields from CP templates"""
     
-    def __init__(self):
+    # Bump when extraction logic changes in a way the rule hash cannot see
+    PARSER_VERSION = "1.2"
+    
+    # Blank lines separate the sections clauses are cut from
+    SECTION_SEPARATOR = re.compile(r'\n\s*\n')
+    
+    # Blanks every field pattern reaches: underscore lines and bracketed names
+    FIELD_BLANKS = ("___", "[")
+    
+    def __init__(self, cache: Optional[ParseCache] = None, regex_time_budget: Optional[float] = 1.0,
+                 fingerprints: Optional[TemplateFingerprintIndex] = None,
+                 fingerprint_path: Optional[str] = None):
+        self.cache = cache
+        # Known template families are saved here after each update so restarts keep them
+        self.fingerprint_path = fingerprint_path
+        # Known template families; sections unchanged from a family member are not re-parsed
+        if fingerprints is None:
+            fingerprints = (TemplateFingerprintIndex.load(fingerprint_path)
+                            if fingerprint_path else TemplateFingerprintIndex())
+        self.fingerprints = fingerprints
+        # Seconds each field pattern may spend on a template before it is skipped
+        self.regex_guard = RegexGuard(regex_time_budget)
+        self.pdf_extractor = PDFExtractor()
+        self.docx_extractor = DOCXExtractor()
+        
         # Common CP field patterns
         self.field_patterns = {
             'vessel_name': [
@@ -119,6 +150,13 @@ class TemplateParser:
             ]
         }
         
+        # All field patterns compiled once; the blanks are found in one pass and
+        # each pattern is only tried around the blanks it can reach
+        self.field_scanner = PatternScanner(
+            self.field_patterns, re.IGNORECASE | re.MULTILINE, guard=self.regex_guard,
+            anchors=self.FIELD_BLANKS
+        )
+        
         # Template type identifiers
         self.template_identifiers = {
             'GENCON': [
@@ -148,6 +186,14 @@ class TemplateParser:
     async def parse(self, file_path: str) -> Dict[str, Any]:
         """Parse a CP template and extract structure and fields"""
         try:
+            cache_key = self._cache_key(file_path)
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached:
+                    cached["file_info"]["filename"] = os.path.basename(file_path)
+                    logger.info(f"Parse cache hit for template: {file_path}")
+                    return cached
+            
             # Extract text from template
             text = await self._extract_text(file_path)
             if not text:
@@ -156,15 +202,14 @@ class TemplateParser:
             # Identify template type
             template_type = self._identify_template_type(text)
             
-            # Extract fillable fields
-            fields = self._extract_fields(text)
+            # Extract fillable fields and clauses, reusing the sections a
+            # known template family already has
+            self.regex_guard.reset()
+            fields, clauses, family = self._extract_fields_and_clauses(text)
             
             # Analyze document structure
             structure = self._analyze_structure(text)
             
-            # Extract clauses
-            clauses = self._extract_clauses(text)
-            
             parsed_data = {
                 "original_text": text,
                 "template_type": template_type,
@@ -174,9 +219,15 @@ class TemplateParser:
                 "file_info": {
                     "filename": os.path.basename(file_path),
                     "file_type": Path(file_path).suffix.lower()
-                }
+                },
+                "family": family,
+                "tripped_rules": list(self.regex_guard.tripped)
             }
             
+            # A rule that ran out of time may succeed on a later attempt
+            if cache_key and not parsed_data["tripped_rules"]:
+                self.cache.put(cache_key, parsed_data)
+            
             logger.info(f"Successfully parsed template: {template_type}, {len(fields)} fields found")
             return parsed_data
             
@@ -184,80 +235,39 @@ class TemplateParser:
             logger.error(f"Error parsing template {file_path}: {str(e)}")
             raise
     
+    def _cache_key(self, file_path: str) -> Optional[str]:
+        """Build the parse cache key for a file, or None when caching is disabled"""
+        if not self.cache:
+            return None
+        return self.cache.make_key(
+            "template",
+            file_digest(file_path),
+            self.PARSER_VERSION,
+            rules_hash(self.field_patterns, self.template_identifiers)
+        )
+    
     async def _extract_text(self, file_path: str) -> str:
         """Extract text from template file"""
         file_ext = Path(file_path).suffix.lower()
         
         try:
             if file_ext == '.txt':
-                return self._extract_from_txt(file_path)
+                with open(file_path, 'r', encoding='utf-8') as file:
+                    return file.read()
             elif file_ext == '.pdf':
-                return self._extract_from_pdf(file_path)
+                if not pdfplumber and not PyPDF2:
+                    raise ImportError("No PDF processing library available")
+                # Pages are extracted in parallel, each falling back to PyPDF2 on its own
+                return self.pdf_extractor.extract_text(file_path)
             elif file_ext in ['.docx', '.doc']:
-                return self._extract_from_docx(file_path)
+                # Paragraph and table text in document order
+                return self.docx_extractor.extract_text(file_path)
             else:
                 raise ValueError(f"Unsupported file format: {file_ext}")
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
             raise
     
-    def _extract_from_txt(self, file_path: str) -> str:
-        """Extract text from TXT file"""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
-    
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
-        text = ""
-        
-        # Try pdfplumber first for better formatting preservation
-        if pdfplumber:
-            try:
-                with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                if text.strip():
-                    return text
-            except Exception as e:
-                logger.warning(f"pdfplumber failed: {e}, trying PyPDF2")
-        
-        # Fallback to PyPDF2
-        if PyPDF2:
-            try:
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                return text
-            except Exception as e:
-                logger.error(f"PyPDF2 also failed: {e}")
-                raise
-        
-        raise ImportError("No PDF processing library available")
-    
-    def _extract_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file"""
-        if not Document:
-            raise ImportError("python-docx library not available")
-        
-        doc = Document(file_path)
-        text = ""
-        
-        # Extract text from paragraphs
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        
-        # Extract text from tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    text += cell.text + "\t"
-                text += "\n"
-        
-        return text
-    
     def _identify_template_type(self, text: str) -> str:
         """Identify the type of CP template"""
         text_lower = text.lower()
@@ -272,25 +282,7 @@ class TemplateParser:
     
     def _extract_fields(self, text: str) -> List[Dict[str, Any]]:
         """Extract fillable fields from the template"""
-        fields = []
-        text_lower = text.lower()
-        
-        for field_type, patterns in self.field_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text_lower, re.IGNORECASE | re.MULTILINE)
-                for match in matches:
-                    field = {
-                        "type": field_type,
-                        "pattern": pattern,
-                        "match": match.group(0),
-                        "position": match.span(),
-                        "context": self._get_context(text, match.span(), 50),
-                        "confidence": 0.8
-                    }
-                    
-                    # Avoid duplicates
-                    if not self._is_duplicate_field(fields, field):
-                        fields.append(field)
+        fields = self._scan_fields(text, text.lower())
         
         # Sort fields by position
         fields.sort(key=lambda x: x['position'][0])
@@ -298,14 +290,199 @@ class TemplateParser:
         logger.info(f"Extracted {len(fields)} fields from template")
         return fields
     
-    def _is_duplicate_field(self, existing_fields: List[Dict], new_field: Dict) -> bool:
-        """Check if a field is a duplicate"""
-        for field in existing_fields:
-            # Check if positions overlap
-            if (field['position'][0] <= new_field['position'][1] and 
-                field['position'][1] >= new_field['position'][0]):
-                return True
-        return False
+    def _scan_fields(self, text: str, window: str, offset: int = 0,
+                     match_before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Find fields in a lowercased window of the text starting at ``offset``"""
+        fields = []
+        # Spans of the fields accepted so far, for O(log n) duplicate checks
+        occupied = IntervalIndex(closed=True)
+        
+        for field_type, match in self.field_scanner.iter_matches(window, match_before=match_before):
+            # Avoid duplicates
+            if occupied.overlaps(*match.span()):
+                continue
+            
+            fields.append(self._field_entry(
+                text, field_type, match.re.pattern, match.group(0),
+                (match.start() + offset, match.end() + offset)
+            ))
+            occupied.add(*match.span())
+        
+        return fields
+    
+    def _field_entry(self, text: str, field_type: str, pattern: str, matched: str,
+                     position: Tuple[int, int]) -> Dict[str, Any]:
+        """Build the field record for a match at a position in the text"""
+        return {
+            "type": field_type,
+            "pattern": pattern,
+            "match": matched,
+            "position": position,
+            "context": self._get_context(text, position, 50),
+            "confidence": 0.8
+        }
+    
+    def _split_sections(self, text: str) -> List[Tuple[int, int]]:
+        """Get the (start, end) offsets of the blank-line separated sections of a text"""
+        sections = []
+        start = 0
+        for separator in self.SECTION_SEPARATOR.finditer(text):
+            sections.append((start, separator.start()))
+            start = separator.end()
+        sections.append((start, len(text)))
+        return sections
+    
+    def _extract_fields_and_clauses(self, text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]],
+                                                                 Optional[Dict[str, Any]]]:
+        """Extract fields and clauses, re-parsing only sections new to the template's family
+        
+        The template is fingerprinted by its section hashes and looked up
+        among the families seen so far. Sections identical to the family's latest member, with identical
+        neighbours, take their fields and clause from it; the other sections
+        are scanned, together with the next section so fields running across
+        a blank line are still found. The result equals a full parse.
+        """
+        text_lower = text.lower()
+        if len(text_lower) != len(text):
+            # Offsets in the lowercased text would not line up with the sections
+            return self._extract_fields(text), self._extract_clauses(text), None
+        
+        sections = self._split_sections(text)
+        hashes = [stable_hash(text[start:end]) for start, end in sections]
+        
+        # Sections are the shingles, so similar templates are those sharing sections
+        signature = self.fingerprints.signature(hashes)
+        found = self.fingerprints.lookup(signature)
+        record = self.fingerprints.get(found[0]) if found else None
+        # Section index -> stored section whose fields can be reused
+        reused = self._reusable_sections(hashes, record) if record else {}
+        
+        fields = []
+        index = 0
+        while index < len(sections):
+            if index in reused:
+                start = sections[index][0]
+                for field_type, pattern, matched, field_start, field_end in reused[index]["fields"]:
+                    fields.append(self._field_entry(
+                        text, field_type, pattern, matched, (start + field_start, start + field_end)
+                    ))
+                index += 1
+                continue
+            
+            end = index + 1
+            while True:
+                while end < len(sections) and end not in reused:
+                    end += 1
+                run_fields = self._scan_sections(text, text_lower, sections, index, end)
+                # A field running into the next section makes that section new too
+                if end < len(sections) and any(f["position"][1] > sections[end - 1][1] for f in run_fields):
+                    del reused[end]
+                    continue
+                break
+            fields.extend(run_fields)
+            index = end
+        
+        fields.sort(key=lambda x: x['position'][0])
+        logger.info(f"Extracted {len(fields)} fields from template")
+        
+        # Clauses depend on their section alone
+        stored_clauses = {}
+        if record:
+            stored_clauses = {section["hash"]: section["clause"] for section in record["sections"]}
+        clauses = []
+        section_clauses = []
+        for i, (start, end) in enumerate(sections):
+            if hashes[i] in stored_clauses:
+                clause = stored_clauses[hashes[i]]
+                if clause:
+                    clause_start, clause_end = self._clause_span(text[start:end], start)
+                    clause = dict(clause, position=i, start=clause_start, end=clause_end)
+            else:
+                clause = self._parse_clause(text[start:end], i, start)
+            section_clauses.append(clause)
+            if clause:
+                clauses.append(clause)
+        logger.info(f"Extracted {len(clauses)} clauses from template")
+        
+        family_id = found[0] if found else None
+        # Fields cut short by the time budget must not be reused
+        if not self.regex_guard.tripped:
+            family_id = self.fingerprints.add(
+                signature, self._family_record(sections, hashes, fields, section_clauses), family_id
+            )
+            if self.fingerprint_path:
+                self.fingerprints.save(self.fingerprint_path)
+        
+        family = {
+            "id": family_id,
+            "similarity": round(found[1], 3) if found else None,
+            "sections": len(sections),
+            "reused_sections": len(reused)
+        }
+        return fields, clauses, family
+    
+    def _reusable_sections(self, hashes: List[int], record: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        """Match sections to stored ones with the same text and the same neighbours"""
+        stored = record["sections"]
+        stored_hashes = [section["hash"] for section in stored]
+        by_hash: Dict[int, List[int]] = {}
+        for k, section_hash in enumerate(stored_hashes):
+            by_hash.setdefault(section_hash, []).append(k)
+        
+        def neighbour(sequence, k):
+            return sequence[k] if 0 <= k < len(sequence) else None
+        
+        reused = {}
+        for i, section_hash in enumerate(hashes):
+            for k in by_hash.get(section_hash, ()):
+                if (stored[k]["sealed"]
+                        and neighbour(stored_hashes, k - 1) == neighbour(hashes, i - 1)
+                        and neighbour(stored_hashes, k + 1) == neighbour(hashes, i + 1)):
+                    reused[i] = stored[k]
+                    break
+        return reused
+    
+    def _scan_sections(self, text: str, text_lower: str, sections: List[Tuple[int, int]],
+                       first: int, end: int) -> List[Dict[str, Any]]:
+        """Find the fields starting in sections ``first`` to ``end - 1``"""
+        window_start = sections[first][0]
+        if end < len(sections):
+            # Read on through the next section for fields that cross the blank line
+            window_end = sections[end][1]
+            match_before = sections[end][0] - window_start
+        else:
+            window_end = len(text)
+            match_before = None
+        return self._scan_fields(text, text_lower[window_start:window_end], window_start, match_before)
+    
+    def _family_record(self, sections: List[Tuple[int, int]], hashes: List[int],
+                       fields: List[Dict[str, Any]], clauses: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Store each section's hash, clause and fields relative to the section start
+        
+        Sections touched by a field that crosses a section boundary are not
+        sealed and are always re-scanned.
+        """
+        records = [
+            {"hash": section_hash, "clause": dict(clause) if clause else None, "fields": [], "sealed": True}
+            for section_hash, clause in zip(hashes, clauses)
+        ]
+        starts = [start for start, _ in sections]
+        
+        for field in fields:
+            field_start, field_end = field["position"]
+            first = max(bisect_right(starts, field_start) - 1, 0)
+            last = max(bisect_right(starts, field_end) - 1, 0)
+            section_start, section_end = sections[first]
+            if first == last and field_end <= section_end:
+                records[first]["fields"].append([
+                    field["type"], field["pattern"], field["match"],
+                    field_start - section_start, field_end - section_start
+                ])
+            else:
+                for k in range(first, last + 1):
+                    records[k]["sealed"] = False
+        
+        return {"sections": records}
     
     def _get_context(self, text: str, position: tuple, context_length: int = 50) -> str:
         """Get context around a matched position"""
@@ -362,43 +539,59 @@ class TemplateParser:
         
         # Split text into potential clauses
         # Look for numbered sections, paragraph breaks, etc.
-        sections = re.split(r'\n\s*\n', text)
-        
-        for i, section in enumerate(sections):
-            section = section.strip()
-            if len(section) < 50:  # Skip very short sections
-                continue
-            
-            # Check if it's a numbered clause
-            clause_match = re.match(r'^\s*(\d+)\.\s*(.+)', section, re.DOTALL)
-            if clause_match:
-                clause_number = clause_match.group(1)
-                clause_text = clause_match.group(2)
-                
-                clauses.append({
-                    "number": clause_number,
-                    "title": self._extract_clause_title(clause_text),
-                    "text": clause_text[:500] + "..." if len(clause_text) > 500 else clause_text,
-                    "full_text": clause_text,
-                    "position": i,
-                    "type": "numbered"
-                })
-            else:
-                # Try to identify clause by content
-                title = self._extract_clause_title(section)
-                if title:
-                    clauses.append({
-                        "number": None,
-                        "title": title,
-                        "text": section[:500] + "..." if len(section) > 500 else section,
-                        "full_text": section,
-                        "position": i,
-                        "type": "paragraph"
-                    })
+        for i, (start, end) in enumerate(self._split_sections(text)):
+            clause = self._parse_clause(text[start:end], i, start)
+            if clause:
+                clauses.append(clause)
         
         logger.info(f"Extracted {len(clauses)} clauses from template")
         return clauses
     
+    def _parse_clause(self, section: str, position: int, offset: int = 0) -> Optional[Dict[str, Any]]:
+        """Turn the section at ``offset`` into a clause, or None if it does not look like one"""
+        start, end = self._clause_span(section, offset)
+        section = section.strip()
+        if len(section) < 50:  # Skip very short sections
+            return None
+        
+        # Check if it's a numbered clause
+        clause_match = re.match(r'^\s*(\d+)\.\s*(.+)', section, re.DOTALL)
+        if clause_match:
+            clause_number = clause_match.group(1)
+            clause_text = clause_match.group(2)
+            
+            return {
+                "number": clause_number,
+                "title": self._extract_clause_title(clause_text),
+                "text": clause_text[:500] + "..." if len(clause_text) > 500 else clause_text,
+                "full_text": clause_text,
+                "position": position,
+                "start": start,
+                "end": end,
+                "type": "numbered"
+            }
+        
+        # Try to identify clause by content
+        title = self._extract_clause_title(section)
+        if title:
+            return {
+                "number": None,
+                "title": title,
+                "text": section[:500] + "..." if len(section) > 500 else section,
+                "full_text": section,
+                "position": position,
+                "start": start,
+                "end": end,
+                "type": "paragraph"
+            }
+        return None
+    
+    def _clause_span(self, section: str, offset: int) -> Tuple[int, int]:
+        """Get the text offsets of a section without its surrounding whitespace"""
+        stripped = section.lstrip()
+        start = offset + len(section) - len(stripped)
+        return start, start + len(stripped.rstrip())
+    
     def _extract_clause_title(self, text: str) -> str:
         """Extract title from clause text"""
         # Take first line or first sentence as title
@@ -3,5 +3,6 @@ Preprocessors package for Smart Charter Party Generator
 """
 
 from .template_preprocessor import TemplatePreprocessor
+from .formatting_analyzer import FormattingAnalyzer, analyze_formatting
 
-__all__ = ["TemplatePreprocessor"]
+__all__ = ["TemplatePreprocessor", "FormattingAnalyzer", "analyze_formatting"]
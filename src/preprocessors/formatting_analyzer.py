@@ -0,0 +1,91 @@
+"""
+Single-pass formatting statistics for template text
+"""
+
+import re
+from typing import Any, Dict, Set
+
+# Numbering opening a line after its indentation; a line opens at most one kind
+NUMBERING_SCHEME = re.compile(
+    r'(?P<numeric_dot>\d+\.)'
+    r'|(?P<letter_parenthesis>[a-z]\))'
+    r'|(?P<parenthesis_letter>\([a-z]\))'
+    r'|(?P<roman_dot>[ivx]+\.)'
+)
+NUMBERING_SCHEMES = ("numeric_dot", "letter_parenthesis", "parenthesis_letter", "roman_dot")
+
+# Characters that might be significant, by the name of their count
+SPECIAL_CHARACTERS = {
+    "underscores": "_",
+    "brackets": "[]",
+    "parentheses": "()",
+    "dollar_signs": "$",
+    "percent_signs": "%"
+}
+
+class FormattingAnalyzer:
+    """Collects line, paragraph, indentation, numbering and character statistics in one pass
+    
+    Text is fed in chunks of any size, such as the blocks of a streamed file.
+    Lines are split on newlines, a partial line waiting for the next chunk.
+    A paragraph break is a run of blank lines between two newlines, which is
+    what the pattern ``\\n\\s*\\n`` counts.
+    """
+    
+    def __init__(self):
+        self.line_breaks = 0
+        self.paragraph_breaks = 0
+        # Leading whitespace width -> number of non-blank lines, in order of appearance
+        self.indentation: Dict[int, int] = {}
+        self.special_characters = {name: 0 for name in SPECIAL_CHARACTERS}
+        self._schemes: Set[str] = set()
+        self._pending = ""
+        self._first_line = True
+        self._in_break = False
+    
+    def feed(self, chunk: str):
+        """Add the next chunk of text"""
+        self.line_breaks += chunk.count('\n')
+        for name, characters in SPECIAL_CHARACTERS.items():
+            self.special_characters[name] += sum(chunk.count(character) for character in characters)
+        
+        lines = chunk.split('\n')
+        lines[0] = self._pending + lines[0]
+        self._pending = lines.pop()
+        for line in lines:
+            self._add_line(line, terminated=True)
+    
+    def finish(self) -> Dict[str, Any]:
+        """Add the final line and get the statistics; no text may be fed after"""
+        self._add_line(self._pending, terminated=False)
+        self._pending = ""
+        return {
+            "line_breaks": self.line_breaks,
+            "paragraph_breaks": self.paragraph_breaks,
+            "indentation_patterns": self.indentation,
+            "numbering_schemes": [scheme for scheme in NUMBERING_SCHEMES if scheme in self._schemes],
+            "special_characters": self.special_characters
+        }
+    
+    def _add_line(self, line: str, terminated: bool):
+        """Count one line, ``terminated`` when a newline follows it"""
+        content = line.lstrip()
+        if content:
+            indent = len(line) - len(content)
+            self.indentation[indent] = self.indentation.get(indent, 0) + 1
+            if len(self._schemes) < len(NUMBERING_SCHEMES):
+                numbering = NUMBERING_SCHEME.match(content)
+                if numbering:
+                    self._schemes.add(numbering.lastgroup)
+            self._in_break = False
+        elif terminated and not self._first_line and not self._in_break:
+            # The first blank line of a run between two newlines opens a break
+            self.paragraph_breaks += 1
+            self._in_break = True
+        self._first_line = False
+
+def analyze_formatting(text: str) -> Dict[str, Any]:
+    """Get the formatting statistics of a whole text"""
+    analyzer = FormattingAnalyzer()
+    analyzer.feed(text)
+    return analyzer.finish()
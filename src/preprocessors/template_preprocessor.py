@@ -4,15 +4,39 @@ Template Preprocessor for converting and structuring CP templates
 
 import re
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional
 from pathlib import Path
 
+from .formatting_analyzer import analyze_formatting
+from ..utils.clause_index import ClauseIndex
+from ..utils.pattern_scanner import PatternScanner
+from ..utils.regex_guard import RegexGuard
+
 logger = logging.getLogger(__name__)
 
 class TemplatePreprocessor:
     """Preprocessor for structuring CP templates and preparing them for filling"""
     
-    def __init__(self):
+    # Analysis sections generation does not read, computed only when asked for
+    LAZY_SECTIONS = ("template_structure", "fillable_areas", "formatting_info")
+    
+    # Parsed template keys kept in original_data; fields and clauses are
+    # already carried by structured_fields and clause_index
+    ORIGINAL_DATA_KEYS = ("original_text", "template_type", "file_info", "family", "tripped_rules")
+    
+    def __init__(self, regex_time_budget: Optional[float] = 1.0):
+        # Seconds each blank pattern may spend on a template before it is skipped
+        self.regex_guard = RegexGuard(regex_time_budget)
+        
+        # Find blank lines or spaces that might be fillable
+        self.fillable_scanner = PatternScanner({
+            'pattern_1': [r'_{3,}'],  # Multiple underscores
+            'pattern_2': [r'\.{3,}'],  # Multiple dots
+            'pattern_3': [r'\s{10,}'],  # Large spaces
+            'pattern_4': [r'\[.*?\]'],  # Bracketed placeholders
+            'pattern_5': [r'\(.*?\)'],  # Parenthetical placeholders
+        }, guard=self.regex_guard)
+        
         # Template-specific configurations
         self.template_configs = {
             'GENCON': {
@@ -92,29 +116,46 @@ class TemplatePreprocessor:
             }
         }
     
-    async def process(self, parsed_template: Dict[str, Any], template_type: str) -> Dict[str, Any]:
-        """Process and structure a parsed template"""
+    def get_required_fields(self, template_type: Optional[str]) -> List[str]:
+        """Get the required fields for a template type, or an empty list if unknown"""
+        if not template_type:
+            return []
+        config = self.template_configs.get(template_type.upper(), {})
+        return list(config.get('required_fields', []))
+    
+    async def process(self, parsed_template: Dict[str, Any], template_type: str,
+                      sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Process and structure a parsed template
+        
+        ``sections`` names the ``LAZY_SECTIONS`` to compute now, all of them
+        when None; the others can be added later with ``materialize``.
+        """
         try:
             logger.info(f"Processing template of type: {template_type}")
+            sections = self.LAZY_SECTIONS if sections is None else self._check_sections(sections)
             
             # Get template configuration
             config = self.template_configs.get(template_type, self.template_configs['GENCON'])
             
             # Structure the template data
+            self.regex_guard.reset()
             processed_data = {
                 "template_type": template_type,
-                "original_data": parsed_template,
+                "original_data": {
+                    key: parsed_template[key] for key in self.ORIGINAL_DATA_KEYS if key in parsed_template
+                },
                 "structured_fields": self._structure_fields(parsed_template.get("fields", []), config),
                 "field_mapping": self._create_field_mapping(parsed_template.get("fields", [])),
                 "validation_rules": self._get_validation_rules(config),
-                "template_structure": self._analyze_template_structure(parsed_template),
-                "fillable_areas": self._identify_fillable_areas(parsed_template),
-                "formatting_info": self._extract_formatting_info(parsed_template)
+                # Offsets, numbers and titles of the clauses for position lookups
+                "clause_index": ClauseIndex.from_clauses(parsed_template.get("clauses", [])).to_dict()
             }
             
             # Validate template completeness
             validation_result = self._validate_template_completeness(processed_data, config)
             processed_data["validation"] = validation_result
+            processed_data["tripped_rules"] = []
+            self.materialize(processed_data, parsed_template, sections)
             
             logger.info(f"Template processing completed: {len(processed_data['structured_fields'])} fields structured")
             return processed_data
@@ -123,6 +164,38 @@ class TemplatePreprocessor:
             logger.error(f"Error processing template: {str(e)}")
             raise
     
+    def materialize(self, processed_data: Dict[str, Any], parsed_template: Dict[str, Any],
+                    sections: Iterable[str]) -> List[str]:
+        """Add lazy sections missing from processed data, computed from its parsed template
+        
+        Sections already present are kept as they are. Returns the names of
+        the sections computed.
+        """
+        builders = {
+            "template_structure": self._analyze_template_structure,
+            "fillable_areas": self._identify_fillable_areas,
+            "formatting_info": self._extract_formatting_info
+        }
+        computed = []
+        
+        for section in self._check_sections(sections):
+            if section in processed_data:
+                continue
+            self.regex_guard.reset()
+            processed_data[section] = builders[section](parsed_template)
+            processed_data.setdefault("tripped_rules", []).extend(self.regex_guard.tripped)
+            computed.append(section)
+        
+        return computed
+    
+    def _check_sections(self, sections: Iterable[str]) -> List[str]:
+        """Validate section names against ``LAZY_SECTIONS``"""
+        sections = list(sections)
+        unknown = [section for section in sections if section not in self.LAZY_SECTIONS]
+        if unknown:
+            raise ValueError(f"Unknown template sections: {', '.join(unknown)}")
+        return sections
+    
     def _structure_fields(self, fields: List[Dict], config: Dict) -> List[Dict[str, Any]]:
         """Structure fields with enhanced metadata"""
         structured_fields = []
@@ -251,43 +324,33 @@ class TemplatePreprocessor:
         fillable_areas = []
         text = parsed_template.get("original_text", "")
         
-        # Find blank lines or spaces that might be fillable
-        blank_patterns = [
-            r'_{3,}',  # Multiple underscores
-            r'\.{3,}',  # Multiple dots
-            r'\s{10,}',  # Large spaces
-            r'\[.*?\]',  # Bracketed placeholders
-            r'\(.*?\)',  # Parenthetical placeholders
-        ]
-        
-        for i, pattern in enumerate(blank_patterns):
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                area = {
-                    "id": f"area_{len(fillable_areas) + 1}",
-                    "pattern_type": f"pattern_{i + 1}",
-                    "position": match.span(),
-                    "original_text": match.group(0),
-                    "context": self._get_context(text, match.span(), 30),
-                    "estimated_field_type": self._estimate_field_type_from_context(
-                        self._get_context(text, match.span(), 50)
-                    )
-                }
-                fillable_areas.append(area)
+        for pattern_type, match in self.fillable_scanner.iter_matches(text):
+            area = {
+                "id": f"area_{len(fillable_areas) + 1}",
+                "pattern_type": pattern_type,
+                "position": match.span(),
+                "original_text": match.group(0),
+                "context": self._get_context(text, match.span(), 30),
+                "estimated_field_type": self._estimate_field_type_from_context(
+                    self._get_context(text, match.span(), 50)
+                )
+            }
+            fillable_areas.append(area)
         
         return fillable_areas
     
     def _extract_formatting_info(self, parsed_template: Dict) -> Dict[str, Any]:
         """Extract formatting information to preserve document structure"""
-        text = parsed_template.get("original_text", "")
+        # Line, paragraph, indentation, numbering and character statistics in one pass
+        stats = analyze_formatting(parsed_template.get("original_text", ""))
         
         formatting = {
-            "line_breaks": text.count('\n'),
-            "paragraph_breaks": len(re.findall(r'\n\s*\n', text)),
-            "indentation_patterns": self._analyze_indentation(text),
+            "line_breaks": stats["line_breaks"],
+            "paragraph_breaks": stats["paragraph_breaks"],
+            "indentation_patterns": stats["indentation_patterns"],
             "heading_styles": self._analyze_heading_styles(parsed_template.get("structure", {})),
-            "numbering_schemes": self._analyze_numbering_schemes(text),
-            "special_characters": self._count_special_characters(text)
+            "numbering_schemes": stats["numbering_schemes"],
+            "special_characters": stats["special_characters"]
         }
         
         return formatting
@@ -433,18 +496,6 @@ class TemplatePreprocessor:
         
         return "unknown"
     
-    def _analyze_indentation(self, text: str) -> Dict[str, int]:
-        """Analyze indentation patterns in the text"""
-        lines = text.split('\n')
-        indentation_counts = {}
-        
-        for line in lines:
-            if line.strip():  # Skip empty lines
-                leading_spaces = len(line) - len(line.lstrip())
-                indentation_counts[leading_spaces] = indentation_counts.get(leading_spaces, 0) + 1
-        
-        return indentation_counts
-    
     def _analyze_heading_styles(self, structure: Dict) -> List[Dict]:
         """Analyze heading styles"""
         styles = []
@@ -458,28 +509,3 @@ class TemplatePreprocessor:
             })
         
         return styles
-    
-    def _analyze_numbering_schemes(self, text: str) -> List[str]:
-        """Analyze numbering schemes used in the document"""
-        schemes = []
-        
-        if re.search(r'^\s*\d+\.', text, re.MULTILINE):
-            schemes.append("numeric_dot")
-        if re.search(r'^\s*[a-z]\)', text, re.MULTILINE):
-            schemes.append("letter_parenthesis")
-        if re.search(r'^\s*\([a-z]\)', text, re.MULTILINE):
-            schemes.append("parenthesis_letter")
-        if re.search(r'^\s*[ivx]+\.', text, re.MULTILINE):
-            schemes.append("roman_dot")
-        
-        return schemes
-    
-    def _count_special_characters(self, text: str) -> Dict[str, int]:
-        """Count special characters that might be significant"""
-        return {
-            "underscores": text.count('_'),
-            "brackets": text.count('[') + text.count(']'),
-            "parentheses": text.count('(') + text.count(')'),
-            "dollar_signs": text.count('$'),
-            "percent_signs": text.count('%')
-        }
@@ -0,0 +1,59 @@
+"""
+Capacitated assignment of rows to columns maximising the total score
+"""
+
+import logging
+from typing import Dict, Sequence, Tuple
+
+from .nlp_resources import optional_import
+
+logger = logging.getLogger(__name__)
+
+def assign(scores: Dict[Tuple[int, int], float], rows: int, capacities: Sequence[int]) -> Dict[int, int]:
+    """Assign rows to columns so that the total score is highest
+    
+    ``scores`` holds the positive score of each allowed (row, column) pair;
+    pairs left out are never assigned. A row takes at most one column and
+    column ``j`` at most ``capacities[j]`` rows. The optimum is found by
+    scipy's linear sum assignment over the columns repeated by capacity;
+    without scipy the pairs are taken greedily, best score first.
+    
+    Returns the column of each assigned row.
+    """
+    if not scores:
+        return {}
+    
+    optimize = optional_import("scipy.optimize")
+    if optimize is None:
+        logger.warning("scipy is not available, assigning greedily; the result may not be optimal")
+        return greedy_assign(scores, capacities)
+    
+    numpy = optional_import("numpy")
+    pairs = numpy.array(list(scores), dtype=int)
+    base = numpy.zeros((rows, len(capacities)))
+    base[pairs[:, 0], pairs[:, 1]] = list(scores.values())
+    
+    # One slot per unit of capacity, each a copy of its column's scores
+    slot_columns = numpy.repeat(numpy.arange(len(capacities)), capacities)
+    assigned_rows, slots = optimize.linear_sum_assignment(base[:, slot_columns], maximize=True)
+    
+    assignment = {}
+    for row, column in zip(assigned_rows.tolist(), slot_columns[slots].tolist()):
+        # Rows without an allowed column still get a slot with score zero
+        if base[row, column] > 0:
+            assignment[row] = column
+    return assignment
+
+def greedy_assign(scores: Dict[Tuple[int, int], float], capacities: Sequence[int]) -> Dict[int, int]:
+    """Assign rows to columns taking the best remaining pair first
+    
+    Ties keep the order of ``scores``. The result can fall short of the
+    optimum when an early pick blocks two better-combined ones.
+    """
+    remaining = list(capacities)
+    assignment = {}
+    for (row, column), score in sorted(scores.items(), key=lambda pair: -pair[1]):
+        if row not in assignment and remaining[column] > 0:
+            assignment[row] = column
+            remaining[column] -= 1
+    return assignment
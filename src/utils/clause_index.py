@@ -0,0 +1,82 @@
+"""
+Offset index of template clauses with logarithmic position lookups
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List, Optional
+
+# Fields kept for each clause; the clause text itself stays in the template text
+CLAUSE_INDEX_FIELDS = ("number", "title", "type", "position", "start", "end")
+
+def normalize_title(title: str) -> str:
+    """Normalise a clause title for lookups, ignoring case, spacing and trailing dots"""
+    return re.sub(r'\s+', ' ', title).strip().rstrip('.:').strip().casefold()
+
+class ClauseIndex:
+    """Clauses of one template by character offset, number and title
+    
+    Clauses come from disjoint sections of the template text, so sorting them
+    by start also sorts them by end and the clause containing an offset is
+    found by binary search. Numbers and titles map to the first clause that
+    carries them.
+    """
+    
+    def __init__(self, clauses: List[Dict[str, Any]]):
+        self._clauses = sorted(
+            ({field: clause.get(field) for field in CLAUSE_INDEX_FIELDS} for clause in clauses),
+            key=lambda clause: clause["start"]
+        )
+        self._starts = [clause["start"] for clause in self._clauses]
+        self._ends = [clause["end"] for clause in self._clauses]
+        
+        self._by_number: Dict[str, int] = {}
+        self._by_title: Dict[str, int] = {}
+        for i, clause in enumerate(self._clauses):
+            if clause["number"] is not None:
+                self._by_number.setdefault(str(clause["number"]), i)
+            if clause["title"]:
+                self._by_title.setdefault(normalize_title(clause["title"]), i)
+    
+    @classmethod
+    def from_clauses(cls, clauses: List[Dict[str, Any]]) -> "ClauseIndex":
+        """Index parsed clauses, skipping any without character offsets"""
+        return cls([clause for clause in clauses if clause.get("start") is not None])
+    
+    def __len__(self) -> int:
+        return len(self._clauses)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._clauses)
+    
+    def clause_at(self, offset: int) -> Optional[Dict[str, Any]]:
+        """Get the clause containing a character offset, if any"""
+        index = bisect_right(self._starts, offset) - 1
+        if index >= 0 and offset < self._ends[index]:
+            return self._clauses[index]
+        return None
+    
+    def clauses_between(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Get the clauses overlapping the character range [start, end)"""
+        first = bisect_right(self._ends, start)
+        last = bisect_left(self._starts, end)
+        return self._clauses[first:last]
+    
+    def by_number(self, number: Any) -> Optional[Dict[str, Any]]:
+        """Get the clause with a number, given as an int or a string"""
+        index = self._by_number.get(str(number))
+        return self._clauses[index] if index is not None else None
+    
+    def by_title(self, title: str) -> Optional[Dict[str, Any]]:
+        """Get the clause with a title, ignoring case and spacing"""
+        index = self._by_title.get(normalize_title(title))
+        return self._clauses[index] if index is not None else None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialise the index to JSON-compatible data"""
+        return {"clauses": [dict(clause) for clause in self._clauses]}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ClauseIndex":
+        """Rebuild an index serialised with ``to_dict``"""
+        return cls(data["clauses"])
@@ -0,0 +1,296 @@
+"""
+Content-addressed store for uploaded documents
+"""
+
+import os
+import json
+import time
+import stat
+import asyncio
+import shutil
+import hashlib
+import tempfile
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Uploads are read and written in chunks of this size so memory stays flat
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Leading bytes that identify each supported document format
+MAGIC_SIGNATURES = {
+    '.pdf': [b'%PDF-'],
+    '.docx': [b'PK\x03\x04'],
+    '.doc': [b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', b'PK\x03\x04'],
+}
+
+# Blobs and the upload paths linked to them are shared, so they are never writable
+READ_ONLY_MODE = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+# Unreferenced blobs younger than this are left alone, since an upload that
+# deduplicated onto them may not have recorded its ref yet
+GC_GRACE_SECONDS = 300
+
+class UploadRejectedError(ValueError):
+    """Raised when an upload fails validation while it is being streamed"""
+
+class UploadTooLargeError(UploadRejectedError):
+    """Raised when an upload exceeds its byte limit"""
+
+class UploadTypeError(UploadRejectedError):
+    """Raised when an upload's content does not match its file extension"""
+
+def check_magic_bytes(head: bytes, file_ext: str) -> None:
+    """Check the first chunk of an upload against the signature for its extension"""
+    file_ext = file_ext.lower()
+    
+    if file_ext == '.txt':
+        # Plain text must not contain NUL bytes, which only appear in binary files
+        if b'\x00' in head:
+            raise UploadTypeError("File content is not plain text")
+        return
+    
+    signatures = MAGIC_SIGNATURES.get(file_ext)
+    if signatures is None:
+        return
+    
+    if file_ext == '.pdf':
+        # PDF readers accept a short preamble before the %PDF- header
+        matched = any(sig in head[:1024] for sig in signatures)
+    else:
+        matched = any(head.startswith(sig) for sig in signatures)
+    
+    if not matched:
+        raise UploadTypeError(f"File content does not match the {file_ext} file type")
+
+class ContentStore:
+    """Keeps one blob per distinct upload, addressed by the hash of its bytes"""
+    
+    def __init__(self, root: str, fanout: int = 2, hash_name: str = "sha256"):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.ref_dir = self.root / "refs"
+        self.tmp_dir = self.root / "tmp"
+        
+        # Number of two-character directory levels used to spread blobs out
+        self.fanout = fanout
+        self.hash_name = hash_name
+        
+        for directory in (self.blob_dir, self.ref_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+    
+    def blob_path(self, digest: str) -> Path:
+        """Get the path of the blob for a digest, e.g. blobs/ab/cd/abcd..."""
+        parts = [digest[i * 2:i * 2 + 2] for i in range(self.fanout)]
+        return self.blob_dir.joinpath(*parts, digest)
+    
+    def has(self, digest: str) -> bool:
+        """Check whether a blob is already stored"""
+        return self.blob_path(digest).exists()
+    
+    def put_chunks(self, chunks: Iterable[bytes]) -> Dict[str, Any]:
+        """Hash and store content as it arrives, keeping a single copy per digest"""
+        hasher = hashlib.new(self.hash_name)
+        size = 0
+        
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in chunks:
+                    hasher.update(chunk)
+                    tmp_file.write(chunk)
+                    size += len(chunk)
+            
+            return self._commit(tmp_path, hasher.hexdigest(), size)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    
+    async def put_upload(self,
+                         file: Any,
+                         max_size: Optional[int] = None,
+                         file_ext: Optional[str] = None,
+                         chunk_size: int = UPLOAD_CHUNK_SIZE) -> Dict[str, Any]:
+        """Stream an UploadFile to disk in bounded chunks while hashing it
+        
+        The type is checked from magic bytes on the first chunk and the byte
+        limit is enforced during the stream, so oversized or mislabelled
+        uploads are rejected without being buffered in memory.
+        """
+        hasher = hashlib.new(self.hash_name)
+        size = 0
+        
+        # Disk calls run on worker threads so large uploads never block the event loop
+        fd, tmp_path = await asyncio.to_thread(tempfile.mkstemp, dir=self.tmp_dir)
+        try:
+            tmp_file = await asyncio.to_thread(os.fdopen, fd, 'wb')
+            try:
+                while True:
+                    chunk = await file.read(chunk_size)
+                    if not chunk:
+                        break
+                    
+                    if size == 0 and file_ext:
+                        check_magic_bytes(chunk, file_ext)
+                    
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise UploadTooLargeError(
+                            f"File too large. Max size: {max_size / (1024*1024):.1f}MB"
+                        )
+                    
+                    hasher.update(chunk)
+                    await asyncio.to_thread(tmp_file.write, chunk)
+            finally:
+                await asyncio.to_thread(tmp_file.close)
+            
+            if size == 0:
+                raise UploadRejectedError("Uploaded file is empty")
+            
+            return await asyncio.to_thread(self._commit, tmp_path, hasher.hexdigest(), size)
+        except Exception:
+            if os.path.exists(tmp_path):
+                await asyncio.to_thread(os.unlink, tmp_path)
+            raise
+    
+    def put_bytes(self, data: bytes) -> Dict[str, Any]:
+        """Store an in-memory upload"""
+        return self.put_chunks([data])
+    
+    def _commit(self, tmp_path: str, digest: str, size: int) -> Dict[str, Any]:
+        """Move a fully written temp file into place, or drop it if the blob exists"""
+        blob = self.blob_path(digest)
+        deduplicated = blob.exists()
+        
+        if deduplicated:
+            os.unlink(tmp_path)
+            # Refresh the mtime so a concurrent sweep treats the blob as in use
+            os.utime(blob)
+            logger.info(f"Upload matches existing blob {digest[:12]}, reusing it")
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(tmp_path, READ_ONLY_MODE)
+            os.replace(tmp_path, blob)
+            logger.info(f"Stored new blob {digest[:12]} ({size} bytes)")
+        
+        return {
+            "digest": digest,
+            "size": size,
+            "blob_path": str(blob),
+            "deduplicated": deduplicated
+        }
+    
+    def link(self, digest: str, dest: Path) -> Path:
+        """Expose a blob under an upload-specific path without copying its bytes
+        
+        Hard links share the blob's inode, so the blob is kept read-only and an
+        in-place write through one upload path cannot change the others.
+        """
+        blob = self.blob_path(digest)
+        if not blob.exists():
+            raise FileNotFoundError(f"No blob stored for digest {digest}")
+        os.chmod(blob, READ_ONLY_MODE)
+        
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() or dest.is_symlink():
+            dest.unlink()
+        
+        try:
+            os.link(blob, dest)
+        except OSError:
+            # Hard links are not available across devices or on some filesystems
+            try:
+                os.symlink(blob.resolve(), dest)
+            except OSError:
+                shutil.copyfile(blob, dest)
+                os.chmod(dest, READ_ONLY_MODE)
+        
+        return dest
+    
+    def add_ref(self, ref_id: str, digest: str, **metadata) -> Dict[str, Any]:
+        """Record that an upload ID refers to a stored blob"""
+        ref = {
+            "id": ref_id,
+            "digest": digest,
+            "created_at": datetime.now().isoformat(),
+            **metadata
+        }
+        with open(self.ref_dir / f"{ref_id}.json", 'w', encoding='utf-8') as f:
+            json.dump(ref, f)
+        return ref
+    
+    def resolve(self, ref_id: str) -> Optional[Dict[str, Any]]:
+        """Look up the blob reference recorded for an upload ID"""
+        ref_path = self.ref_dir / f"{ref_id}.json"
+        if not ref_path.exists():
+            return None
+        
+        with open(ref_path, 'r', encoding='utf-8') as f:
+            ref = json.load(f)
+        ref["blob_path"] = str(self.blob_path(ref["digest"]))
+        return ref
+
+    
+    def remove_ref(self, ref_id: str, grace_seconds: float = GC_GRACE_SECONDS) -> bool:
+        """Drop an upload ID, its linked path and its blob once nothing else refers to it"""
+        ref = self.resolve(ref_id)
+        if ref is None:
+            return False
+        
+        (self.ref_dir / f"{ref_id}.json").unlink()
+        
+        linked_path = ref.get("path")
+        if linked_path and (os.path.exists(linked_path) or os.path.islink(linked_path)):
+            os.unlink(linked_path)
+        
+        referenced = self._referenced_digests()
+        if referenced is not None and ref["digest"] not in referenced:
+            self._remove_blob(ref["digest"], grace_seconds)
+        return True
+    
+    def collect_garbage(self, grace_seconds: float = GC_GRACE_SECONDS) -> int:
+        """Delete blobs that no ref points to, returning how many were removed"""
+        referenced = self._referenced_digests()
+        if referenced is None:
+            return 0
+        removed = 0
+        
+        for blob in self.blob_dir.rglob("*"):
+            if blob.is_file() and blob.name not in referenced:
+                if self._remove_blob(blob.name, grace_seconds):
+                    removed += 1
+        
+        if removed:
+            logger.info(f"Removed {removed} unreferenced blobs")
+        return removed
+    
+    def _referenced_digests(self) -> Optional[set]:
+        """Collect the digests that at least one ref still points to, or None if a ref is unreadable"""
+        digests = set()
+        for ref_path in self.ref_dir.glob("*.json"):
+            try:
+                with open(ref_path, 'r', encoding='utf-8') as f:
+                    digests.add(json.load(f)["digest"])
+            except (OSError, ValueError, KeyError) as e:
+                # Keep every blob when a ref cannot be read rather than risk deleting live data
+                logger.warning(f"Could not read ref {ref_path.name}: {e}")
+                return None
+        return digests
+    
+    def _remove_blob(self, digest: str, grace_seconds: float = GC_GRACE_SECONDS) -> bool:
+        """Delete an unreferenced blob unless an upload reused it within the grace period"""
+        blob = self.blob_path(digest)
+        try:
+            if time.time() - blob.stat().st_mtime < grace_seconds:
+                return False
+            blob.unlink()
+        except FileNotFoundError:
+            return False
+        
+        logger.info(f"Removed unreferenced blob {digest[:12]}")
+        return True
@@ -0,0 +1,113 @@
+"""
+Piece table of text replacements with original-to-new offset mapping
+"""
+
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+class EditBuffer:
+    """A text and a set of replacements of its spans, applied when rendered
+    
+    The original text is never copied or changed. Each replacement is an edit
+    over an original span ``[start, end)``, kept sorted by position, and the
+    edited text is the sequence of pieces alternating between untouched
+    original spans and replacement texts. Any number of edits is applied in
+    one pass over the pieces, and the same pieces render plain text, markup
+    around the replacements or any other output.
+    
+    Edits may not overlap, though an insertion (an empty span) may touch a
+    replacement, so each one is positioned in original offsets whatever the
+    order they are added in.
+    """
+    
+    def __init__(self, text: str):
+        self.original = text
+        self._edits: List[Dict[str, Any]] = []
+        # (start, end, order added) of each edit, sorted like the edits
+        self._keys: List[Tuple[int, int, int]] = []
+        self._shifts: Optional[List[int]] = None
+    
+    def __len__(self) -> int:
+        return len(self._edits)
+    
+    def replace(self, start: int, end: int, text: str, **info) -> Optional[Dict[str, Any]]:
+        """Replace the original span [start, end) with text
+        
+        Returns the edit, a dict of its ``position``, ``old_text``, ``new_text``
+        and the given ``info``, or None if the span is outside the text or
+        overlaps an earlier edit.
+        """
+        if not 0 <= start <= end <= len(self.original):
+            return None
+        
+        # Edits never overlap, so only the neighbours in position order can
+        key = (start, end, len(self._keys))
+        index = bisect_right(self._keys, key)
+        if index > 0 and self._keys[index - 1][1] > start:
+            return None
+        if index < len(self._keys) and self._keys[index][0] < end:
+            return None
+        
+        edit = {"position": (start, end), "old_text": self.original[start:end], "new_text": text, **info}
+        self._keys.insert(index, key)
+        self._edits.insert(index, edit)
+        self._shifts = None
+        return edit
+    
+    @property
+    def edits(self) -> List[Dict[str, Any]]:
+        """The edits in document order, each with its ``new_position`` in the edited text"""
+        shifts = self._offset_shifts()
+        for edit, shift in zip(self._edits, shifts):
+            start = edit["position"][0] + shift
+            edit["new_position"] = (start, start + len(edit["new_text"]))
+        return self._edits
+    
+    def pieces(self) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """Walk the edited text as (text, edit) pieces, with edit None for original text"""
+        current = 0
+        for edit in self._edits:
+            start, end = edit["position"]
+            if current < start:
+                yield self.original[current:start], None
+            yield edit["new_text"], edit
+            current = end
+        if current < len(self.original):
+            yield self.original[current:], None
+    
+    def render(self, replacement: Optional[Callable[[Dict[str, Any]], str]] = None) -> str:
+        """Get the edited text, each replacement formatted by ``replacement`` if given"""
+        if replacement is None:
+            return "".join(text for text, _ in self.pieces())
+        return "".join(replacement(edit) if edit else text for text, edit in self.pieces())
+    
+    def text(self) -> str:
+        """Get the edited text"""
+        return self.render()
+    
+    def new_offset(self, offset: int) -> int:
+        """Map an offset of the original text to the edited text
+        
+        An offset inside a replaced span maps to the start of its replacement;
+        text inserted at an offset comes before it.
+        """
+        index = bisect_right(self._keys, (offset, float("inf"))) - 1
+        if index < 0:
+            return offset
+        
+        start, end = self._edits[index]["position"]
+        shift = self._offset_shifts()[index]
+        if offset < end:
+            return start + shift
+        return offset + shift + len(self._edits[index]["new_text"]) - (end - start)
+    
+    def _offset_shifts(self) -> List[int]:
+        """Length change of the text before each edit, computed once per set of edits"""
+        if self._shifts is None:
+            self._shifts = []
+            shift = 0
+            for edit in self._edits:
+                self._shifts.append(shift)
+                start, end = edit["position"]
+                shift += len(edit["new_text"]) - (end - start)
+        return self._shifts
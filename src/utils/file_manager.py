@@ -5,11 +5,14 @@ File Manager for handling file uploads, storage, and retrieval
 import os
 import shutil
 import uuid
+import asyncio
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
 from datetime import datetime
 
+from .content_store import ContentStore
+
 try:
     from fastapi import UploadFile
     import aiofiles
@@ -31,6 +34,9 @@ class FileManager:
         # Create directories
         self._create_directories()
         
+        # Deduplicated storage backing every upload
+        self.content_store = ContentStore(self.upload_dir / "store")
+        
         # File type mappings
         self.allowed_extensions = {
             'templates': ['.pdf', '.docx', '.doc', '.txt'],
@@ -70,12 +76,23 @@ class FileManager:
             filename = self._generate_filename(file.filename)
             file_path = self.upload_dir / file_type / filename
             
-            # Save file
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
+            # Stream content into the store, enforcing type and size as it arrives
+            stored = await self.content_store.put_upload(
+                file,
+                max_size=self.max_file_sizes.get(file_type),
+                file_ext=Path(file.filename).suffix.lower()
+            )
+            await asyncio.to_thread(self.content_store.link, stored["digest"], file_path)
+            await asyncio.to_thread(
+                self.content_store.add_ref,
+                Path(filename).stem,
+                stored["digest"],
+                filename=file.filename,
+                file_type=file_type,
+                path=str(file_path)
+            )
             
-            logger.info(f"File saved: {file_path}")
+            logger.info(f"File saved: {file_path} (sha256 {stored['digest'][:12]})")
             return file_path
             
         except Exception as e:
@@ -89,8 +106,14 @@ class FileManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"charter_party_{timestamp}.{output_format}"
             file_path = self.output_dir / filename
+            # Generation results hold the output in their filled document
+            cp_data = cp_data.get("filled_document", cp_data)
             
-            if output_format.lower() == "docx" and "document" in cp_data:
+            if output_format.lower() == "docx" and "docx_bytes" in cp_data:
+                # Save a DOCX template patched in place
+                async with aiofiles.open(file_path, 'wb') as f:
+                    await f.write(cp_data["docx_bytes"])
+            elif output_format.lower() == "docx" and "document" in cp_data:
                 # Save DOCX document
                 cp_data["document"].save(str(file_path))
             elif output_format.lower() == "html":
@@ -176,6 +199,11 @@ class FileManager:
     def delete_file(self, file_path: Path) -> bool:
         """Delete a file"""
         try:
+            # Uploads are links into the content store; dropping the ref also frees the blob
+            if self.upload_dir in file_path.parents and self.content_store.remove_ref(file_path.stem):
+                logger.info(f"File deleted: {file_path}")
+                return True
+            
             if file_path.exists():
                 file_path.unlink()
                 logger.info(f"File deleted: {file_path}")
@@ -0,0 +1,51 @@
+"""
+Sorted index of non-overlapping intervals with logarithmic overlap checks
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import List
+
+class IntervalIndex:
+    """Non-overlapping intervals kept sorted by start
+    
+    Because accepted intervals never overlap, sorting them by start also sorts
+    them by end, so the only candidate for an overlap is the last interval
+    starting before the new one ends. Half-open intervals ``[start, end)`` may
+    touch; with ``closed=True`` intervals are ``[start, end]`` and touching
+    counts as overlapping.
+    """
+    
+    def __init__(self, closed: bool = False):
+        self.closed = closed
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+    
+    def __len__(self) -> int:
+        return len(self._starts)
+    
+    def overlaps(self, start: int, end: int) -> bool:
+        """Check whether an interval overlaps any interval in the index"""
+        if self.closed:
+            index = bisect_right(self._starts, end)
+            return index > 0 and self._ends[index - 1] >= start
+        
+        # An empty half-open interval overlaps nothing
+        if end <= start:
+            return False
+        index = bisect_left(self._starts, end)
+        return index > 0 and self._ends[index - 1] > start
+    
+    def add(self, start: int, end: int) -> bool:
+        """Add an interval unless it overlaps one already in the index
+        
+        Returns whether the interval was added.
+        """
+        if self.overlaps(start, end):
+            return False
+        
+        # Empty half-open intervals can never cause an overlap, so they are not stored
+        if self.closed or end > start:
+            index = bisect_left(self._starts, start)
+            self._starts.insert(index, start)
+            self._ends.insert(index, end)
+        return True
@@ -0,0 +1,68 @@
+"""
+Lazy, offline loading of optional NLP libraries and models
+"""
+
+import time
+import logging
+import importlib
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent on each import and load so far in this process
+LOAD_TIMES: Dict[str, float] = {}
+
+@lru_cache(maxsize=None)
+def optional_import(module_name: str) -> Optional[Any]:
+    """Import a module on first use, or return None if it is not installed"""
+    started = time.perf_counter()
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        logger.warning(f"{module_name} is not installed")
+        return None
+    finally:
+        LOAD_TIMES[f"import {module_name}"] = round(time.perf_counter() - started, 3)
+
+@lru_cache(maxsize=None)
+def load_spacy_model(name: str) -> Optional[Any]:
+    """Load an installed spaCy model once per process, or None if unavailable
+    
+    Models are never downloaded; install them with the image instead, e.g.
+    ``python -m spacy download en_core_web_sm``.
+    """
+    spacy = optional_import("spacy")
+    if spacy is None:
+        return None
+    
+    started = time.perf_counter()
+    try:
+        nlp = spacy.load(name)
+        logger.info(f"spaCy model {name} loaded")
+        return nlp
+    except OSError:
+        logger.warning(f"spaCy model {name} not found. NLP features will be limited.")
+        return None
+    finally:
+        LOAD_TIMES[f"spacy model {name}"] = round(time.perf_counter() - started, 3)
+
+@lru_cache(maxsize=None)
+def load_stopwords(language: str = "english") -> FrozenSet[str]:
+    """Load NLTK stopwords from local data once per process, empty if unavailable
+    
+    Only the local NLTK data path is searched; nothing is downloaded. Install
+    the corpus with ``python -m nltk.downloader stopwords``.
+    """
+    corpus = optional_import("nltk.corpus")
+    if corpus is None:
+        return frozenset()
+    
+    started = time.perf_counter()
+    try:
+        return frozenset(corpus.stopwords.words(language))
+    except LookupError:
+        logger.warning("NLTK stopwords corpus not found locally. Stopword filtering is disabled.")
+        return frozenset()
+    finally:
+        LOAD_TIMES[f"nltk stopwords {language}"] = round(time.perf_counter() - started, 3)
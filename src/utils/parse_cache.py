@@ -0,0 +1,122 @@
+"""
+Persistent cache for extracted text and parse results
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class ParseCache:
+    """On-disk LRU cache keyed by document hash, parser version and rule-set hash"""
+    
+    def __init__(self, cache_dir: str = "cache", max_size_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_bytes
+        
+        self.hits = 0
+        self.misses = 0
+    
+    def make_key(self, namespace: str, content_hash: str, parser_version: str, rules_hash: str) -> str:
+        """Build a cache key; changing any component makes older entries unreachable"""
+        raw = f"{namespace}:{content_hash}:{parser_version}:{rules_hash}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, marking it as recently used"""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        
+        # The file mtime doubles as the LRU timestamp
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        
+        self.hits += 1
+        return value
+    
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON-serialisable value and evict old entries over the size cap"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            logger.warning(f"Could not write cache entry {key[:12]}: {e}")
+            return
+        
+        self._evict()
+    
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits its size cap"""
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+        
+        if total_size <= self.max_size_bytes:
+            return
+        
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.unlink(path)
+                total_size -= size
+                evicted += 1
+            except OSError:
+                continue
+        
+        logger.info(f"Evicted {evicted} parse cache entries")
+    
+    def clear(self) -> None:
+        """Remove every cache entry"""
+        for entry in self.cache_dir.glob("*.json"):
+            entry.unlink()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        entries = list(self.cache_dir.glob("*.json"))
+        return {
+            "entries": len(entries),
+            "size_bytes": sum(e.stat().st_size for e in entries),
+            "max_size_bytes": self.max_size_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+def rules_hash(*rule_sets: Any) -> str:
+    """Hash extraction rules so cached results are invalidated when they change"""
+    serialized = json.dumps(rule_sets, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:16]
+
+def file_digest(file_path: str, hash_name: str = "sha256", chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file on disk without loading it into memory"""
+    hasher = hashlib.new(hash_name)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,412 @@
+"""
+Precompiled multi-pattern regex scanner with a literal-prefix prefilter
+"""
+
+import re
+from typing import Any, Dict, List, Iterator, Iterable, Optional, Set, Tuple
+
+from .regex_guard import RegexGuard
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    # Python < 3.11
+    import sre_parse
+
+def literal_prefix(pattern: str, flags: int = 0) -> str:
+    """Get the literal text every match of a pattern must start with"""
+    return _literal_prefix(sre_parse.parse(pattern, flags))
+
+def _literal_prefix(items) -> str:
+    """Get the literal text every match of a parsed sequence must start with"""
+    prefix = []
+    for op, av in items:
+        if op is sre_parse.AT:
+            # Anchors such as ^ constrain where a match starts, not what it starts with
+            continue
+        char = _single_literal(op, av)
+        if char is not None:
+            prefix.append(char)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and len(av[2]) == 1:
+            # A repeated character such as the blank in ___+ starts with its minimum count
+            low, high, (item,) = av
+            char = _single_literal(*item)
+            if char is None:
+                break
+            prefix.append(char * low)
+            if low != high:
+                break
+        else:
+            break
+    return "".join(prefix)
+
+def _single_literal(op, av) -> Optional[str]:
+    """Get the character matched by a literal item or a one-character class"""
+    if op is sre_parse.LITERAL:
+        return chr(av)
+    if op is sre_parse.IN and len(av) == 1 and av[0][0] is sre_parse.LITERAL:
+        return chr(av[0][1])
+    return None
+
+def required_literals(pattern: str, flags: int = 0) -> List[str]:
+    """Get literals one of which every match of a pattern must contain
+    
+    Returns an empty list when no such literal can be derived.
+    """
+    return _required_literals(sre_parse.parse(pattern, flags)) or []
+
+def _required_literals(items) -> Optional[List[str]]:
+    """Pick the most selective literal requirement from a parsed sequence"""
+    candidates = []
+    run = []
+    
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        
+        if run:
+            candidates.append(["".join(run)])
+            run = []
+        
+        if op is sre_parse.SUBPATTERN:
+            inner = _required_literals(av[-1])
+            if inner:
+                candidates.append(inner)
+        elif op is sre_parse.BRANCH:
+            # Every alternative must contribute a literal for the branch to count
+            alternatives = [_required_literals(branch) for branch in av[1]]
+            if all(alternatives):
+                candidates.append(sorted({literal for alt in alternatives for literal in alt}))
+    
+    if run:
+        candidates.append(["".join(run)])
+    if not candidates:
+        return None
+    # The requirement whose shortest literal is longest is the rarest
+    return max(candidates, key=lambda literals: min(len(literal) for literal in literals))
+
+_ASCII_LETTER = re.compile(r'[a-z]', re.IGNORECASE)
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+def _has_case_aliases(text: str) -> bool:
+    """Check for non-ASCII characters that IGNORECASE equates with ASCII letters
+    
+    Such characters (e.g. the long s) would be missed by a plain substring
+    search for an ASCII prefix.
+    """
+    if text.isascii():
+        return False
+    return any(_ASCII_LETTER.match(char) for char in set(_NON_ASCII.findall(text)))
+
+# Character class text for the categories sre_parse produces from \d, \s and \w
+_CATEGORY_CLASSES = {
+    sre_parse.CATEGORY_DIGIT: r'\d',
+    sre_parse.CATEGORY_NOT_DIGIT: r'\D',
+    sre_parse.CATEGORY_SPACE: r'\s',
+    sre_parse.CATEGORY_NOT_SPACE: r'\S',
+    sre_parse.CATEGORY_WORD: r'\w',
+    sre_parse.CATEGORY_NOT_WORD: r'\W',
+}
+
+def _char_class(op, av, flags: int) -> Optional["re.Pattern"]:
+    """Compile a one-character item back into a pattern, or None for other items"""
+    if op is sre_parse.LITERAL:
+        members = [(op, av)]
+    elif op is sre_parse.NOT_LITERAL:
+        members = [(sre_parse.NEGATE, None), (sre_parse.LITERAL, av)]
+    elif op is sre_parse.IN:
+        members = av
+    else:
+        return None
+    
+    parts = []
+    for member_op, member_av in members:
+        if member_op is sre_parse.NEGATE:
+            parts.append('^')
+        elif member_op is sre_parse.LITERAL:
+            parts.append(re.escape(chr(member_av)))
+        elif member_op is sre_parse.RANGE:
+            parts.append(f"{re.escape(chr(member_av[0]))}-{re.escape(chr(member_av[1]))}")
+        elif member_op is sre_parse.CATEGORY and member_av in _CATEGORY_CLASSES:
+            parts.append(_CATEGORY_CLASSES[member_av])
+        else:
+            return None
+    return re.compile(f"[{''.join(parts)}]", flags & (re.IGNORECASE | re.ASCII))
+
+def anchor_context(pattern: str, anchors: Iterable[str],
+                   flags: int = 0) -> Optional[Tuple[str, List[Tuple["re.Pattern", int, int]]]]:
+    """Split a pattern into the anchor its matches continue with and the context before it
+    
+    Returns the anchor and the steps of the context, last step first, each a
+    (character class, minimum count, maximum count); or None when the pattern
+    does not reach an anchor through one-character items and their repeats.
+    """
+    items = list(sre_parse.parse(pattern, flags))
+    ignorecase = flags & re.IGNORECASE
+    steps = []
+    
+    for k, (op, av) in enumerate(items):
+        prefix = _literal_prefix(items[k:])
+        for anchor in anchors:
+            if (prefix.lower() if ignorecase else prefix).startswith(anchor):
+                return anchor, steps[::-1]
+        
+        if op is sre_parse.AT:
+            continue
+        if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and len(av[2]) == 1:
+            low, high, (item,) = av
+            char_class = _char_class(*item, flags)
+        else:
+            low = high = 1
+            char_class = _char_class(op, av, flags)
+        if char_class is None:
+            return None
+        steps.append((char_class, low, high))
+    
+    return None
+
+def _reversed_context(steps: List[Tuple["re.Pattern", int, int]]) -> str:
+    """Write context steps, last step first, as a pattern matching the context in reversed text"""
+    parts = []
+    for char_class, low, high in steps:
+        flags = "".join(letter for flag, letter in ((re.IGNORECASE, "i"), (re.ASCII, "a"))
+                        if char_class.flags & flag)
+        item = f"(?{flags}:{char_class.pattern})" if flags else char_class.pattern
+        parts.append(f"{item}{{{low},{'' if high == sre_parse.MAXREPEAT else high}}}")
+    return "".join(parts)
+
+class LiteralIndex:
+    """Finds literal occurrences in a text, reused while the same text is scanned
+    
+    Scanners sharing an index lowercase and search each text only once, however
+    many of them run over it.
+    """
+    
+    def __init__(self, ignorecase: bool = True):
+        self.ignorecase = ignorecase
+        self._text: Optional[str] = None
+        self._haystack: Optional[str] = None
+        self._positions: Dict[str, List[int]] = {}
+    
+    def load(self, text: str) -> Optional[str]:
+        """Get the text to search for literals in, or None if the prefilter is unsafe"""
+        if text is not self._text:
+            self._text = text
+            self._haystack = self._make_haystack(text)
+            self._positions = {}
+        return self._haystack
+    
+    def positions(self, literal: str) -> List[int]:
+        """Get every (possibly overlapping) occurrence of a literal in the loaded text"""
+        positions = self._positions.get(literal)
+        if positions is None:
+            positions = []
+            index = self._haystack.find(literal)
+            while index != -1:
+                positions.append(index)
+                index = self._haystack.find(literal, index + 1)
+            self._positions[literal] = positions
+        return positions
+    
+    def _make_haystack(self, text: str) -> Optional[str]:
+        if not self.ignorecase:
+            return text
+        
+        haystack = text.lower()
+        # Offsets must line up, and no character may match a literal only by case folding
+        if len(haystack) != len(text) or _has_case_aliases(haystack):
+            return None
+        return haystack
+
+class PatternScanner:
+    """Runs a fixed set of named regex rules over text, compiled once
+    
+    Rules that start with a literal prefix are only tried where that prefix
+    occurs, found by substring search instead of a regex scan per rule. Other
+    rules are skipped when the text lacks a literal they require. The matches
+    are identical to ``re.finditer`` for every rule; text the prefilter cannot
+    handle exactly is scanned in full. A ``RegexGuard`` bounds the time each
+    rule may spend on a text.
+    
+    With ``anchors``, blank tokens each made of one repeated character (such
+    as "___" or "["), the anchors are found once per text by character search.
+    A rule whose matches reach an anchor after a short context (as in
+    ``vessel:?\\s*___+``) is then only tried where that context ends at an
+    anchor, found by walking back from each anchor.
+    """
+    
+    # Shorter prefixes occur so often that trying each occurrence costs more
+    MIN_PREFIX_LENGTH = 2
+    
+    def __init__(self, rules: Dict[Any, Iterable[str]], flags: int = 0,
+                 literal_index: Optional[LiteralIndex] = None,
+                 guard: Optional[RegexGuard] = None,
+                 anchors: Iterable[str] = ()):
+        self.flags = flags
+        self.guard = guard or RegexGuard(time_budget=None)
+        # (name, compiled pattern, prefix or "", required literals or [])
+        self.rules: List[Tuple[Any, "re.Pattern", str, List[str]]] = []
+        # Per rule, (cache key, anchor, context steps) or None when not anchored
+        self.contexts: List[Optional[Tuple[Any, str, List[Tuple["re.Pattern", int, int]]]]] = []
+        
+        self.anchors = sorted(set(anchors), key=len, reverse=True)
+        for anchor in self.anchors:
+            # Letters would need case folding to be found exactly
+            if len(set(anchor)) != 1 or anchor.lower() != anchor.upper():
+                raise ValueError(f"Anchor must repeat a single uncased character: {anchor!r}")
+        
+        for name, patterns in rules.items():
+            for pattern in patterns:
+                compiled = self.guard.compile(pattern, flags)
+                # Inline flags such as (?i) count too
+                pattern_flags = re.compile(pattern, flags).flags
+                
+                prefix = literal_prefix(pattern, pattern_flags)
+                if len(prefix) < self.MIN_PREFIX_LENGTH or not prefix.isascii():
+                    prefix = ""
+                
+                required = required_literals(pattern, pattern_flags)
+                if not all(literal.isascii() for literal in required):
+                    required = []
+                
+                if pattern_flags & re.IGNORECASE:
+                    prefix = prefix.lower()
+                    required = [literal.lower() for literal in required]
+                self.rules.append((name, compiled, prefix, required))
+                self.contexts.append(self._context(pattern, pattern_flags))
+        
+        ignorecase = any(compiled.flags & re.IGNORECASE for _, compiled, _, _ in self.rules)
+        if literal_index is None or literal_index.ignorecase != ignorecase:
+            literal_index = LiteralIndex(ignorecase)
+        self.literal_index = literal_index
+        
+        # Runs of each anchor character; an anchor occurs wherever a run is long enough
+        self._anchor_runs = {anchor[0]: re.compile(f"{re.escape(anchor[0])}+") for anchor in self.anchors}
+        # Distinct contexts by key, and per anchor one pattern over the reversed
+        # text whose groups tell which contexts can end at an anchor
+        self._context_steps: Dict[Any, Tuple[str, List[Tuple["re.Pattern", int, int]]]] = {}
+        for context in self.contexts:
+            if context is not None:
+                self._context_steps.setdefault(context[0], context[1:])
+        self._dispatch: Dict[str, Tuple["re.Pattern", List[Any], bool]] = {}
+        for anchor in self.anchors:
+            keys = [key for key, (context_anchor, steps) in self._context_steps.items()
+                    if context_anchor == anchor and steps]
+            if keys:
+                pattern = "".join(f"(?:(?=({_reversed_context(self._context_steps[key][1])})))?" for key in keys)
+                # Unless a context can take in the anchor's character, one inside a
+                # run of it ends only contexts that may be empty
+                crossing = any(char_class.match(anchor[0])
+                               for key in keys for char_class, _, _ in self._context_steps[key][1])
+                self._dispatch[anchor] = (re.compile(pattern), keys, crossing)
+        
+        self._anchor_text: Optional[str] = None
+        self._candidates: Dict[Any, List[int]] = {}
+    
+    def _context(self, pattern: str, flags: int):
+        """Analyse the context before a rule's anchor, keyed so equal contexts share candidates"""
+        if not self.anchors:
+            return None
+        context = anchor_context(pattern, self.anchors, flags)
+        if context is None:
+            return None
+        anchor, steps = context
+        key = (anchor, tuple((char_class.pattern, char_class.flags, low, high)
+                             for char_class, low, high in steps))
+        return key, anchor, steps
+    
+    def iter_matches(self, text: str, match_before: Optional[int] = None,
+                     first_only: bool = False) -> Iterator[Tuple[Any, "re.Match"]]:
+        """Yield (rule name, match) in rule order, each rule's matches by position
+        
+        With ``match_before`` only matches starting before that offset are
+        yielded. With ``first_only`` only the first match for each name is
+        yielded and the name's remaining patterns are not run.
+        """
+        haystack = self.literal_index.load(text)
+        found = set()
+        
+        for (name, compiled, prefix, required), context in zip(self.rules, self.contexts):
+            if first_only and name in found:
+                continue
+            # Candidate start positions, or None to scan the whole text
+            positions = None
+            if haystack is not None:
+                if context is not None:
+                    positions = self._anchored_positions(text, context)
+                elif prefix:
+                    positions = self.literal_index.positions(prefix)
+                elif required and not any(literal in haystack for literal in required):
+                    continue
+            
+            for match in self.guard.finditer(name, compiled, text, positions):
+                if match_before is not None and match.start() >= match_before:
+                    break
+                yield name, match
+                if first_only:
+                    found.add(name)
+                    break
+    
+    def _anchored_positions(self, text: str, context) -> List[int]:
+        """Get the offsets where an anchored rule may match, from the anchors in the text"""
+        if text is not self._anchor_text:
+            self._anchor_text = text
+            self._candidates = self._find_candidates(text)
+        return self._candidates[context[0]]
+    
+    def _find_candidates(self, text: str) -> Dict[Any, List[int]]:
+        """Classify every anchor in a text by the contexts that can end at it"""
+        anchor_positions = self._find_anchors(text)
+        candidates = {
+            key: anchor_positions[anchor]
+            for key, (anchor, steps) in self._context_steps.items() if not steps
+        }
+        
+        reversed_text = text[::-1] if self._dispatch else ""
+        for anchor, (dispatch, keys, crossing) in self._dispatch.items():
+            starts: Dict[Any, Set[int]] = {key: set() for key in keys}
+            optional = [key for key in keys if all(low == 0 for _, low, _ in self._context_steps[key][1])]
+            for position in anchor_positions[anchor]:
+                if not crossing and position and text[position - 1] == anchor[0]:
+                    for key in optional:
+                        starts[key].add(position)
+                    continue
+                # One match tells which contexts end here; only those are walked
+                groups = dispatch.match(reversed_text, len(text) - position).groups()
+                for key, group in zip(keys, groups):
+                    if group is not None:
+                        starts[key].update(self._context_starts(text, position, self._context_steps[key][1]))
+            for key in keys:
+                candidates[key] = sorted(starts[key])
+        return candidates
+    
+    def _find_anchors(self, text: str) -> Dict[str, List[int]]:
+        """Get every (possibly overlapping) occurrence of each anchor in one pass per character"""
+        positions = {anchor: [] for anchor in self.anchors}
+        for char, run in self._anchor_runs.items():
+            start = text.find(char)
+            while start != -1:
+                end = run.match(text, start).end()
+                for anchor in self.anchors:
+                    if anchor[0] == char and end - start >= len(anchor):
+                        positions[anchor].extend(range(start, end - len(anchor) + 1))
+                start = text.find(char, end)
+        return positions
+    
+    def _context_starts(self, text: str, position: int, steps) -> List[int]:
+        """Get every offset from which a context could run up to an anchor at ``position``"""
+        ends = [position]
+        for char_class, low, high in steps:
+            starts = []
+            for end in ends:
+                count = 0
+                while count < high and end - count > 0 and char_class.match(text, end - count - 1):
+                    count += 1
+                if count >= low:
+                    starts.extend(range(end - count, end - low + 1))
+            # Overlapping ranges from several ends repeat offsets
+            ends = starts if len(starts) < 2 else list(set(starts))
+            if not ends:
+                break
+        return ends
@@ -0,0 +1,127 @@
+"""
+Time budgets for regex rules, against catastrophic backtracking on long lines
+"""
+
+import re
+import time
+import logging
+from typing import Any, Dict, List, Iterator, Optional
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+logger = logging.getLogger(__name__)
+
+class RegexGuard:
+    """Runs regex rules within a time budget and reports the rules that overrun it
+    
+    The budget covers one rule scanning one text. When the ``regex`` package is
+    installed patterns are compiled with it and a runaway match is interrupted
+    by its timeout; with only ``re`` a match cannot be interrupted, so the
+    overrun is detected once the call returns. Either way the rule stops
+    scanning that text (matches already found are kept), a warning is logged
+    and the rule is recorded in ``tripped``. With ``time_budget=None`` patterns
+    are compiled with ``re`` and run unguarded.
+    """
+    
+    def __init__(self, time_budget: Optional[float] = 1.0):
+        self.time_budget = time_budget
+        self.interruptible = time_budget is not None and regex is not None
+        # Rules that overran their budget since the last reset
+        self.tripped: List[Dict[str, Any]] = []
+    
+    def compile(self, pattern: str, flags: int = 0):
+        """Compile a pattern with the engine the guard can interrupt"""
+        if self.interruptible:
+            # Validated with re so both engines accept the same patterns;
+            # VERSION0 keeps re's matching behaviour
+            re.compile(pattern, flags)
+            return regex.compile(pattern, int(flags) | regex.VERSION0)
+        return re.compile(pattern, flags)
+    
+    def reset(self):
+        """Forget the rules that tripped so far"""
+        self.tripped = []
+    
+    def finditer(self, rule: Any, compiled, text: str,
+                 positions: Optional[List[int]] = None) -> Iterator[Any]:
+        """Yield the matches of ``compiled.finditer(text)`` within the rule's budget
+        
+        With ``positions`` the pattern is only tried at those offsets, which
+        gives the same matches as long as every match starts at one of them.
+        """
+        if positions is None:
+            matches = compiled.finditer(text, **self._timeout(self.time_budget))
+        else:
+            matches = self._match_at(compiled, text, positions)
+        
+        if self.time_budget is None:
+            yield from matches
+            return
+        
+        # Only time spent in the regex engine counts, not in the consumer
+        spent = 0.0
+        while True:
+            started = time.perf_counter()
+            try:
+                match = next(matches, None)
+            except TimeoutError:
+                self._trip(rule, compiled, text, spent + time.perf_counter() - started, interrupted=True)
+                return
+            spent += time.perf_counter() - started
+            
+            if match is not None:
+                yield match
+            if spent > self.time_budget:
+                self._trip(rule, compiled, text, spent, interrupted=False)
+                return
+            if match is None:
+                return
+    
+    def _match_at(self, compiled, text: str, positions: List[int]) -> Iterator[Any]:
+        """Reproduce ``finditer`` by trying the pattern only at candidate positions
+        
+        Positions without a match never reach the caller, so the budget is
+        also enforced here, raising ``TimeoutError`` once it is spent.
+        """
+        spent = 0.0
+        started = time.perf_counter()
+        resume = 0
+        for start in positions:
+            # Like finditer, matches never overlap an earlier match
+            if start < resume:
+                continue
+            
+            if self.time_budget is None:
+                match = compiled.match(text, start)
+            else:
+                remaining = self.time_budget - spent - (time.perf_counter() - started)
+                if remaining <= 0:
+                    raise TimeoutError("regex timed out")
+                match = compiled.match(text, start, **self._timeout(remaining))
+            
+            if match:
+                spent += time.perf_counter() - started
+                yield match
+                started = time.perf_counter()
+                resume = max(match.end(), start + 1)
+    
+    def _timeout(self, seconds: float) -> Dict[str, float]:
+        """Keyword arguments bounding a single regex call"""
+        return {"timeout": seconds} if self.interruptible else {}
+    
+    def _trip(self, rule: Any, compiled, text: str, elapsed: float, interrupted: bool):
+        """Record and log a rule that overran its budget"""
+        self.tripped.append({
+            "rule": rule,
+            "pattern": compiled.pattern,
+            "text_length": len(text),
+            "elapsed_seconds": round(elapsed, 3),
+            "interrupted": interrupted
+        })
+        logger.warning(
+            f"Regex rule {rule!r} ({compiled.pattern}) exceeded its {self.time_budget}s budget "
+            f"on {len(text)} characters after {elapsed:.2f}s and was skipped"
+        )
@@ -0,0 +1,159 @@
+"""
+MinHash fingerprints for recognising template families across uploads
+"""
+
+import os
+import json
+import heapq
+import hashlib
+import logging
+import tempfile
+import uuid
+from pathlib import Path
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+def stable_hash(text: str, digest_size: int = 8) -> int:
+    """Hash text to an integer that is the same in every process"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=digest_size).digest(), 'big')
+
+def minhash_signature(hashes: Iterable[int], num_hashes: int = 128) -> List[int]:
+    """Get the bottom-k MinHash signature of a shingle set, smallest hashes first"""
+    return heapq.nsmallest(num_hashes, set(hashes))
+
+def estimate_similarity(first: List[int], second: List[int], num_hashes: int = 128) -> float:
+    """Estimate the Jaccard similarity of two shingle sets from their signatures"""
+    if not first or not second:
+        return 0.0
+    # The k smallest hashes of the union, and how many both sets contain
+    union = heapq.nsmallest(num_hashes, set(first) | set(second))
+    shared = set(first) & set(second)
+    return sum(1 for value in union if value in shared) / len(union)
+
+class TemplateFingerprintIndex:
+    """Index of template families by MinHash signature
+    
+    Each family keeps the signature and a caller-defined record of its latest
+    member. Candidate families are found through an inverted index of
+    signature values, so a lookup only compares signatures that share at
+    least one value with the query. Families beyond ``max_families`` are
+    evicted least recently used first.
+    """
+    
+    def __init__(self, threshold: float = 0.7, num_hashes: int = 128, max_families: int = 256):
+        self.threshold = threshold
+        self.num_hashes = num_hashes
+        self.max_families = max_families
+        # family id -> {"signature": [...], "record": {...}}, least recently used first
+        self._families: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # signature value -> ids of the families whose signature contains it
+        self._postings: Dict[int, Set[str]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._families)
+    
+    def signature(self, shingles: Iterable[int]) -> List[int]:
+        """Fingerprint a template from the hashes of its shingles"""
+        return minhash_signature(shingles, self.num_hashes)
+    
+    def lookup(self, signature: List[int]) -> Optional[Tuple[str, float]]:
+        """Find the most similar family at or above the threshold, as (id, similarity)"""
+        shared = Counter()
+        for value in signature:
+            shared.update(self._postings.get(value, ()))
+        
+        best = None
+        for family_id, _ in shared.most_common():
+            similarity = estimate_similarity(
+                signature, self._families[family_id]["signature"], self.num_hashes
+            )
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (family_id, similarity)
+        
+        if best:
+            self._families.move_to_end(best[0])
+        return best
+    
+    def get(self, family_id: str) -> Optional[Dict[str, Any]]:
+        """Get the record stored for a family"""
+        family = self._families.get(family_id)
+        return family["record"] if family else None
+    
+    def add(self, signature: List[int], record: Dict[str, Any],
+            family_id: Optional[str] = None) -> str:
+        """Store a template as the latest member of a family, or start a new family"""
+        if family_id in self._families:
+            self._unpost(family_id)
+        else:
+            family_id = family_id or uuid.uuid4().hex
+        
+        self._families[family_id] = {"signature": list(signature), "record": record}
+        self._families.move_to_end(family_id)
+        for value in signature:
+            self._postings.setdefault(value, set()).add(family_id)
+        
+        while len(self._families) > self.max_families:
+            oldest = next(iter(self._families))
+            self._unpost(oldest)
+            del self._families[oldest]
+        return family_id
+    
+    def _unpost(self, family_id: str):
+        """Remove a family's signature values from the inverted index"""
+        for value in self._families[family_id]["signature"]:
+            family_ids = self._postings.get(value)
+            if family_ids is not None:
+                family_ids.discard(family_id)
+                if not family_ids:
+                    del self._postings[value]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialise the index to JSON-compatible data"""
+        return {
+            "threshold": self.threshold,
+            "num_hashes": self.num_hashes,
+            "max_families": self.max_families,
+            "families": [
+                {"id": family_id, "signature": family["signature"], "record": family["record"]}
+                for family_id, family in self._families.items()
+            ]
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TemplateFingerprintIndex":
+        """Rebuild an index serialised with ``to_dict``"""
+        index = cls(data["threshold"], data["num_hashes"], data["max_families"])
+        for family in data["families"]:
+            index.add(family["signature"], family["record"], family["id"])
+        return index
+    
+    def save(self, path: str) -> None:
+        """Write the index to a JSON file, replacing it atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            logger.warning(f"Could not save template fingerprint index to {path}: {e}")
+    
+    @classmethod
+    def load(cls, path: str, **defaults) -> "TemplateFingerprintIndex":
+        """Read an index saved with ``save``, or start an empty one if there is none"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = cls.from_dict(json.load(f))
+        except FileNotFoundError:
+            return cls(**defaults)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not load template fingerprint index from {path}: {e}")
+            return cls(**defaults)
+        
+        logger.info(f"Loaded {len(index)} template families from {path}")
+        return index
@@ -0,0 +1,113 @@
+"""
+Rewriting some members of a zip archive while copying the others' stored bytes
+"""
+
+import struct
+import zlib
+from typing import Dict, Tuple, Union
+
+# Local file header, central directory header and end of central directory record
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+END_RECORD = struct.Struct("<4s4H2LH")
+
+LOCAL_SIGNATURE = b"PK\x03\x04"
+CENTRAL_SIGNATURE = b"PK\x01\x02"
+END_SIGNATURE = b"PK\x05\x06"
+DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+
+# General purpose flags: sizes in a data descriptor after the data, UTF-8 names
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+
+STORED = 0
+DEFLATED = 8
+
+# Raw deflate data, CRC-32 and size of the content it inflates to
+Deflated = Tuple[bytes, int, int]
+
+def replace_members(archive: bytes, replacements: Dict[str, Union[bytes, Deflated]],
+                    compresslevel: int = 6) -> bytes:
+    """Get a copy of a zip archive with the content of some members replaced
+    
+    Every other member is copied as stored, compressed bytes and headers
+    alike, so the work is proportional to the replaced content. Members keep
+    their order, names, dates and compression method. A replacement is the
+    new content, or for a deflated member the already deflated content as a
+    ``(data, crc, size)`` tuple. ZIP64 and encrypted archives are not
+    supported and raise ValueError, as does a replacement for a missing
+    member.
+    """
+    end_at = archive.rfind(END_SIGNATURE)
+    if end_at < 0:
+        raise ValueError("Not a zip archive")
+    end_record = list(END_RECORD.unpack_from(archive, end_at))
+    entries, directory_size, directory_offset = end_record[4], end_record[5], end_record[6]
+    if entries == 0xFFFF or 0xFFFFFFFF in (directory_size, directory_offset):
+        raise ValueError("ZIP64 archives are not supported")
+    
+    output = bytearray()
+    directory = bytearray()
+    missing = set(replacements)
+    position = directory_offset
+    
+    for _ in range(entries):
+        central = list(CENTRAL_HEADER.unpack_from(archive, position))
+        if central[0] != CENTRAL_SIGNATURE:
+            raise ValueError("Corrupt zip central directory")
+        flags, method, name_length = central[3], central[4], central[10]
+        record_end = position + CENTRAL_HEADER.size + name_length + central[11] + central[12]
+        name_bytes = archive[position + CENTRAL_HEADER.size:position + CENTRAL_HEADER.size + name_length]
+        name = name_bytes.decode("utf-8" if flags & FLAG_UTF8 else "cp437")
+        if flags & 0x01:
+            raise ValueError("Encrypted zip archives are not supported")
+        
+        local_offset = central[16]
+        local = list(LOCAL_HEADER.unpack_from(archive, local_offset))
+        if local[0] != LOCAL_SIGNATURE:
+            raise ValueError("Corrupt zip local header")
+        data_offset = local_offset + LOCAL_HEADER.size + local[9] + local[10]
+        central[16] = len(output)
+        
+        if name in replacements:
+            missing.discard(name)
+            content = replacements[name]
+            if isinstance(content, tuple):
+                if method != DEFLATED:
+                    raise ValueError(f"Deflated content given for {name}, which is not deflated")
+                stored, crc, size = content
+            elif method == DEFLATED:
+                compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+                stored, crc, size = compressor.compress(content) + compressor.flush(), zlib.crc32(content), len(content)
+            elif method == STORED:
+                stored, crc, size = content, zlib.crc32(content), len(content)
+            else:
+                raise ValueError(f"Unsupported compression method {method} for {name}")
+            
+            # The new sizes go in the headers, so no data descriptor follows
+            local[2] &= ~FLAG_DATA_DESCRIPTOR
+            local[6:9] = [crc, len(stored), size]
+            central[3] &= ~FLAG_DATA_DESCRIPTOR
+            central[7:10] = [crc, len(stored), size]
+            output += LOCAL_HEADER.pack(*local)
+            output += archive[local_offset + LOCAL_HEADER.size:data_offset]
+            output += stored
+        else:
+            block_end = data_offset + central[8]
+            if flags & FLAG_DATA_DESCRIPTOR:
+                has_signature = archive[block_end:block_end + 4] == DESCRIPTOR_SIGNATURE
+                block_end += 16 if has_signature else 12
+            output += archive[local_offset:block_end]
+        
+        directory += CENTRAL_HEADER.pack(*central)
+        directory += archive[position + CENTRAL_HEADER.size:record_end]
+        position = record_end
+    
+    if missing:
+        raise ValueError(f"Members not in the archive: {', '.join(sorted(missing))}")
+    
+    end_record[5], end_record[6] = len(directory), len(output)
+    output += directory
+    output += END_RECORD.pack(*end_record)
+    output += archive[end_at + END_RECORD.size:]
+    return bytes(output)
@@ -0,0 +1,75 @@
+"""
+Tests for the capacitated row/column assignment
+"""
+
+import itertools
+import random
+
+import pytest
+
+from src.utils import assignment
+from src.utils.assignment import assign, greedy_assign
+
+
+def brute_force_best(scores, rows, capacities):
+    """Reference result: the best total over every assignment of rows to columns or nothing"""
+    best = 0.0
+    for choice in itertools.product([None] + list(range(len(capacities))), repeat=rows):
+        if any(column is not None and (row, column) not in scores for row, column in enumerate(choice)):
+            continue
+        if any(choice.count(column) > capacity for column, capacity in enumerate(capacities)):
+            continue
+        best = max(best, sum(scores[row, column] for row, column in enumerate(choice) if column is not None))
+    return best
+
+
+def total(scores, result):
+    return sum(scores[row, column] for row, column in result.items())
+
+
+class TestAssignment:
+    """Test cases for assign and greedy_assign"""
+    
+    def test_optimum_beats_greedy(self):
+        """Test that the solver gives up the single best pair when two others sum higher"""
+        pytest.importorskip("scipy")
+        scores = {(0, 0): 0.9, (0, 1): 0.8, (1, 0): 0.7}
+        
+        assert greedy_assign(scores, [1, 1]) == {0: 0}
+        assert assign(scores, 2, [1, 1]) == {0: 1, 1: 0}
+    
+    def test_capacity(self):
+        """Test that a column takes up to its capacity of rows"""
+        scores = {(0, 0): 2.0, (1, 0): 2.0, (2, 0): 1.0, (2, 1): 0.5}
+        
+        for result in (assign(scores, 3, [2, 1]), greedy_assign(scores, [2, 1])):
+            assert result == {0: 0, 1: 0, 2: 1}
+    
+    def test_rows_without_scores_stay_unassigned(self):
+        """Test that only allowed pairs are assigned"""
+        assert assign({(1, 0): 0.4}, 3, [5]) == {1: 0}
+        assert assign({}, 3, [1]) == {}
+    
+    def test_matches_brute_force(self):
+        """Test the solver's total against exhaustive search on small random problems"""
+        pytest.importorskip("scipy")
+        rng = random.Random(5)
+        for _ in range(200):
+            rows, columns = rng.randint(1, 5), rng.randint(1, 3)
+            capacities = [rng.randint(1, 2) for _ in range(columns)]
+            scores = {(r, c): rng.choice([0.5, 1.0, rng.random()])
+                      for r in range(rows) for c in range(columns) if rng.random() < 0.6}
+            result = assign(scores, rows, capacities)
+            
+            assert all((row, column) in scores for row, column in result.items())
+            assert all(list(result.values()).count(c) <= capacities[c] for c in range(columns))
+            assert total(scores, result) == pytest.approx(brute_force_best(scores, rows, capacities))
+    
+    def test_greedy_fallback_without_scipy(self, monkeypatch, caplog):
+        """Test that the greedy assignment is used, with a warning, when scipy is not installed"""
+        monkeypatch.setattr(assignment, "optional_import", lambda name: None)
+        scores = {(0, 0): 0.9, (0, 1): 0.8, (1, 0): 0.7}
+        
+        with caplog.at_level("WARNING", logger=assignment.__name__):
+            assert assign(scores, 2, [1, 1]) == greedy_assign(scores, [1, 1])
+        assert "assigning greedily" in caplog.text
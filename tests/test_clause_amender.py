@@ -0,0 +1,147 @@
+"""
+Tests for the clause amendment engine
+"""
+
+import pytest
+
+from src.generators.clause_amender import ClauseAmender, find_amendments
+
+RECAP_TEXT = """
+OTHERWISE AS PER GENCON 94 WITH FOLLOWING AMENDMENTS:
+
+Clause 2 amended to read: "Owners to be responsible for loss of or damage to the goods."
+
+Delete lines 45-47
+Clause 4 deleted
+Lines 9 to 10 to read: Freight payable within 3 banking days after completion of loading.
+
+Cl. 99 deleted
+"""
+
+TEMPLATE_PARAGRAPHS = [
+    "GENCON CHARTER PARTY",
+    "1. Vessel. The said vessel shall proceed to the loading port 1",
+    "or so near thereto as she may safely get. 2",
+    "2. Owners' Responsibility Clause. Owners are to be responsible 3",
+    "for loss of or damage to the goods or for delay in delivery 4",
+    "of the goods only in case the loss has been caused by 5",
+    "3. Deviation Clause. The vessel has liberty to call at any port 6",
+    "4. Payment of Freight. The freight shall be paid in cash 7",
+    "without discount on delivery of the cargo. 8",
+    "Freight payable on intaken quantity 9",
+    "at the rate agreed. 10",
+]
+
+
+class TestFindAmendments:
+    """Test cases for finding amendments in recap text"""
+    
+    def test_instruction_forms(self):
+        """Test that each instruction form is found in recap order"""
+        amendments = find_amendments(RECAP_TEXT)
+        summary = [(a["action"], a["target"], a.get("clause"), a.get("lines")) for a in amendments]
+        
+        assert summary == [
+            ("replace", "clause", "2", None),
+            ("delete", "lines", None, [45, 47]),
+            ("delete", "clause", "4", None),
+            ("replace", "lines", None, [9, 10]),
+            ("delete", "clause", "99", None),
+        ]
+        assert amendments[0]["text"] == "Owners to be responsible for loss of or damage to the goods."
+        assert amendments[3]["text"] == "Freight payable within 3 banking days after completion of loading."
+    
+    def test_references_are_not_instructions(self):
+        """Test that mentions of clauses and lines are not taken as amendments"""
+        assert find_amendments("Laytime as per clause 6, see lines 45-47 of the C/P.") == []
+
+
+class TestClauseAmender:
+    """Test cases for resolving amendments against a template"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.amender = ClauseAmender(TEMPLATE_PARAGRAPHS)
+    
+    def test_clause_ranges(self):
+        """Test that clauses run from their heading to the next heading"""
+        resolved = self.amender.resolve(find_amendments("Clause 2 deleted\nClause 4 deleted"))
+        assert [a["paragraphs"] for a in resolved] == [[3, 5], [7, 10]]
+    
+    def test_clause_spans_exclude_next_heading(self):
+        """Test that clause spans are [start, end) and stop before blank paragraphs"""
+        paragraphs = ["1. Vessel. Name ____", "", "2. Freight.", "Rate ____", ""]
+        amender = ClauseAmender(paragraphs)
+        text = "\n".join(paragraphs)
+        
+        first = amender.clause_index.by_number("1")
+        second = amender.clause_index.by_number("2")
+        assert text[first["start"]:first["end"]] == "1. Vessel. Name ____"
+        assert text[second["start"]:second["end"]] == "2. Freight.\nRate ____"
+        assert amender.clause_index.clause_at(first["end"]) is None
+    
+    def test_printed_line_numbers(self):
+        """Test that line numbers resolve through the numbers printed on the form"""
+        assert self.amender.line_paragraph(4) == 4
+        assert self.amender.line_paragraph(11) is None
+        
+        unnumbered = ClauseAmender(["first line", "second line"])
+        assert unnumbered.line_paragraph(2) == 1
+    
+    def test_statuses(self):
+        """Test applied, conflicting and unresolved amendments"""
+        resolved = self.amender.resolve(find_amendments(RECAP_TEXT))
+        
+        assert [a["status"] for a in resolved] == ["applied", "unresolved", "applied", "conflict", "unresolved"]
+        # A replaced clause keeps its heading number
+        assert resolved[0]["text"].startswith("2. Owners to be responsible")
+
+
+class TestDocumentAmendments:
+    """Test cases for applying amendments to a document"""
+    
+    def test_apply_to_document(self):
+        """Test that amendments splice the document paragraphs"""
+        docx = pytest.importorskip("docx")
+        from document_processor import DocumentProcessor
+        
+        doc = docx.Document()
+        for paragraph in TEMPLATE_PARAGRAPHS:
+            doc.add_paragraph(paragraph)
+        
+        recap = 'Clause 2 amended to read "Owners liable for cargo claims."\nClause 4 deleted\nLine 2 deleted'
+        resolved = DocumentProcessor().apply_clause_amendments(doc, recap)
+        
+        assert [a["status"] for a in resolved] == ["applied", "applied", "applied"]
+        assert [p.text for p in doc.paragraphs] == [
+            "GENCON CHARTER PARTY",
+            "1. Vessel. The said vessel shall proceed to the loading port 1",
+            "2. Owners liable for cargo claims.",
+            "3. Deviation Clause. The vessel has liberty to call at any port 6",
+        ]
+        assert doc.paragraphs[2].runs[0].bold
+    
+    def test_amendments_found_in_recap_read(self, tmp_path, monkeypatch):
+        """Test that amendments past the required fields come from the same single read"""
+        pytest.importorskip("docx")
+        from document_processor import DocumentProcessor
+        
+        recap_path = tmp_path / "recap.txt"
+        recap_path.write_text(
+            "Vessel: OCEAN STAR\n\n" + "Other terms as agreed.\n\n" * 20 + "Clause 4 deleted\n",
+            encoding="utf-8"
+        )
+        processor = DocumentProcessor()
+        monkeypatch.setattr(processor, "_required_fields", lambda template_type: {"vessel_name"})
+        
+        reads = []
+        extract_text_blocks = processor.extract_text_blocks
+        monkeypatch.setattr(processor, "extract_text_blocks",
+                            lambda path: reads.append(path) or extract_text_blocks(path))
+        
+        fields_only = processor.parse_recap_document(str(recap_path), "GENCON")
+        data, amendments = processor._parse_recap(str(recap_path), "GENCON", with_amendments=True)
+        
+        assert data == fields_only
+        assert [(a["action"], a["clause"]) for a in amendments] == [("delete", "4")]
+        assert len(reads) == 2
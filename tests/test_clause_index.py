@@ -0,0 +1,69 @@
+"""
+Tests for ClauseIndex
+"""
+
+import json
+
+from src.parsers.template_parser import TemplateParser
+from src.utils.clause_index import ClauseIndex
+
+TEMPLATE_TEXT = """CHARTER PARTY
+
+1. VESSEL DESCRIPTION
+The vessel shall be described as follows in this clause of the charter.
+
+2. CARGO TERMS
+The cargo specifications are set out in full in this clause of the charter.
+
+GENERAL CONDITIONS
+These general conditions apply to every voyage performed under this charter.
+
+15. DEMURRAGE AND DESPATCH
+Demurrage shall be paid at the rate agreed per day or pro rata for part of a day.
+"""
+
+
+class TestClauseIndex:
+    """Test cases for ClauseIndex"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.clauses = TemplateParser()._extract_clauses(TEMPLATE_TEXT)
+        self.index = ClauseIndex.from_clauses(self.clauses)
+    
+    def test_offsets_cover_clause_text(self):
+        """Test that clause offsets index the clause in the template text"""
+        assert len(self.index) == 4
+        for clause in self.clauses:
+            assert TEMPLATE_TEXT[clause["start"]:clause["end"]].endswith(clause["full_text"])
+    
+    def test_clause_at(self):
+        """Test position lookups inside, at the edges of and between clauses"""
+        demurrage = TEMPLATE_TEXT.index("pro rata")
+        assert self.index.clause_at(demurrage)["number"] == "15"
+        
+        cargo = self.index.by_number(2)
+        assert self.index.clause_at(cargo["start"]) == cargo
+        assert self.index.clause_at(cargo["end"]) is None
+        assert self.index.clause_at(0) is None
+    
+    def test_clauses_between(self):
+        """Test range lookups return every overlapping clause in order"""
+        start = TEMPLATE_TEXT.index("follows")
+        end = TEMPLATE_TEXT.index("general conditions apply")
+        numbers = [c["number"] for c in self.index.clauses_between(start, end)]
+        assert numbers == ["1", "2", None]
+        assert self.index.clauses_between(0, 5) == []
+    
+    def test_number_and_title_lookups(self):
+        """Test lookups by clause number and normalised title"""
+        assert self.index.by_number("15")["title"] == "DEMURRAGE AND DESPATCH"
+        assert self.index.by_number(99) is None
+        assert self.index.by_title("  demurrage  and despatch: ")["number"] == "15"
+        assert self.index.by_title("General Conditions")["type"] == "paragraph"
+    
+    def test_round_trip(self):
+        """Test that the index survives JSON serialisation"""
+        restored = ClauseIndex.from_dict(json.loads(json.dumps(self.index.to_dict())))
+        assert list(restored) == list(self.index)
+        assert restored.clause_at(TEMPLATE_TEXT.index("pro rata"))["number"] == "15"
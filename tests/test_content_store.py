@@ -0,0 +1,170 @@
+"""
+Tests for ContentStore
+"""
+
+import os
+import shutil
+import tempfile
+import io
+from pathlib import Path
+
+import pytest
+
+from src.utils.content_store import (
+    ContentStore, UploadRejectedError, UploadTooLargeError, UploadTypeError
+)
+
+
+class FakeUpload:
+    """Minimal async stand-in for FastAPI's UploadFile"""
+    
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+        self.read_sizes = []
+    
+    async def read(self, size: int = -1) -> bytes:
+        self.read_sizes.append(size)
+        return self._buffer.read(size)
+
+
+class TestContentStore:
+    """Test cases for ContentStore"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = ContentStore(self.temp_dir)
+    
+    def teardown_method(self):
+        """Cleanup after each test method"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_blob_path_fanout(self):
+        """Test that blobs are spread over fan-out subdirectories"""
+        digest = "abcdef0123456789"
+        path = self.store.blob_path(digest)
+        
+        assert path == Path(self.temp_dir) / "blobs" / "ab" / "cd" / digest
+    
+    def test_identical_uploads_share_one_blob(self):
+        """Test that byte-identical uploads are stored once"""
+        first = self.store.put_chunks([b"%PDF-1.4 ", b"recap body"])
+        second = self.store.put_bytes(b"%PDF-1.4 recap body")
+        
+        assert first["digest"] == second["digest"]
+        assert first["deduplicated"] is False
+        assert second["deduplicated"] is True
+        assert first["size"] == 19
+        
+        blobs = [p for p in (Path(self.temp_dir) / "blobs").rglob("*") if p.is_file()]
+        assert len(blobs) == 1
+        assert os.listdir(self.store.tmp_dir) == []
+    
+    def test_different_uploads_get_different_blobs(self):
+        """Test that different content is stored separately"""
+        first = self.store.put_bytes(b"template one")
+        second = self.store.put_bytes(b"template two")
+        
+        assert first["digest"] != second["digest"]
+        assert self.store.has(first["digest"])
+        assert self.store.has(second["digest"])
+    
+    def test_link_and_resolve_reference(self):
+        """Test linking an upload ID to an existing blob"""
+        stored = self.store.put_bytes(b"recap content")
+        dest = Path(self.temp_dir) / "uploads" / "recap_123.txt"
+        
+        self.store.link(stored["digest"], dest)
+        self.store.add_ref("123", stored["digest"], filename="recap.txt")
+        
+        assert dest.read_bytes() == b"recap content"
+        
+        ref = self.store.resolve("123")
+        assert ref["digest"] == stored["digest"]
+        assert ref["filename"] == "recap.txt"
+        assert ref["blob_path"] == stored["blob_path"]
+        
+        assert self.store.resolve("missing") is None
+    
+    def test_linked_paths_are_read_only(self):
+        """Test that an upload path cannot be written through to the shared blob"""
+        stored = self.store.put_bytes(b"shared template")
+        first = self.store.link(stored["digest"], Path(self.temp_dir) / "uploads" / "a.docx")
+        second = self.store.link(stored["digest"], Path(self.temp_dir) / "uploads" / "b.docx")
+        
+        assert os.stat(stored["blob_path"]).st_mode & 0o222 == 0
+        assert os.stat(first).st_mode & 0o222 == 0
+        assert second.read_bytes() == b"shared template"
+    
+    def test_remove_ref_frees_unshared_blob(self):
+        """Test that a blob is deleted once its last ref is removed"""
+        stored = self.store.put_bytes(b"recap content")
+        first = Path(self.temp_dir) / "uploads" / "recap_1.pdf"
+        second = Path(self.temp_dir) / "uploads" / "recap_2.pdf"
+        for ref_id, dest in (("1", first), ("2", second)):
+            self.store.link(stored["digest"], dest)
+            self.store.add_ref(ref_id, stored["digest"], path=str(dest))
+        
+        assert self.store.remove_ref("1", grace_seconds=0) is True
+        assert not first.exists()
+        assert self.store.has(stored["digest"])
+        assert second.read_bytes() == b"recap content"
+        
+        assert self.store.remove_ref("2", grace_seconds=0) is True
+        assert not second.exists()
+        assert not self.store.has(stored["digest"])
+        assert self.store.remove_ref("2") is False
+    
+    def test_collect_garbage(self):
+        """Test that the sweep drops only unreferenced blobs past the grace period"""
+        kept = self.store.put_bytes(b"referenced")
+        orphan = self.store.put_bytes(b"orphan")
+        self.store.add_ref("kept", kept["digest"])
+        
+        assert self.store.collect_garbage() == 0
+        assert self.store.collect_garbage(grace_seconds=0) == 1
+        assert self.store.has(kept["digest"])
+        assert not self.store.has(orphan["digest"])
+    
+    @pytest.mark.asyncio
+    async def test_put_upload_streams_in_chunks(self):
+        """Test that uploads are streamed in bounded chunks and hashed"""
+        data = b"%PDF-1.7\n" + b"x" * 10000
+        upload = FakeUpload(data)
+        
+        stored = await self.store.put_upload(upload, max_size=20000, file_ext=".pdf", chunk_size=4096)
+        
+        assert stored["size"] == len(data)
+        assert Path(stored["blob_path"]).read_bytes() == data
+        assert all(size == 4096 for size in upload.read_sizes)
+        
+        again = await self.store.put_upload(FakeUpload(data), file_ext=".pdf")
+        assert again["deduplicated"] is True
+    
+    @pytest.mark.asyncio
+    async def test_put_upload_rejects_wrong_magic_bytes(self):
+        """Test that content not matching the extension is rejected on the first chunk"""
+        upload = FakeUpload(b"PK\x03\x04 zip data" + b"x" * 10000)
+        
+        with pytest.raises(UploadTypeError):
+            await self.store.put_upload(upload, file_ext=".pdf", chunk_size=1024)
+        
+        assert upload.read_sizes == [1024]
+        assert os.listdir(self.store.tmp_dir) == []
+    
+    @pytest.mark.asyncio
+    async def test_put_upload_enforces_size_limit_during_stream(self):
+        """Test that the byte limit is enforced without reading the whole upload"""
+        upload = FakeUpload(b"PK\x03\x04" + b"x" * 100000)
+        
+        with pytest.raises(UploadTooLargeError):
+            await self.store.put_upload(upload, max_size=5000, file_ext=".docx", chunk_size=1024)
+        
+        assert len(upload.read_sizes) == 5
+        assert os.listdir(self.store.tmp_dir) == []
+    
+    @pytest.mark.asyncio
+    async def test_put_upload_rejects_empty_file(self):
+        """Test that empty uploads are rejected"""
+        with pytest.raises(UploadRejectedError):
+            await self.store.put_upload(FakeUpload(b""), file_ext=".txt")
@@ -64,6 +64,80 @@ class TestCPGenerator:
         assert terms['vessel']['value'] == "OCEAN STAR"
         assert terms['vessel']['confidence'] == 0.9
     
+    @pytest.mark.asyncio
+    async def test_semantic_mapping_batch(self):
+        """Test that fields without a direct mapping are matched semantically in one batch"""
+        pytest.importorskip("sklearn")
+        recap_terms = {
+            "ice": {"value": "Not to force ice", "confidence": 0.7,
+                    "original_match": "vessel not to force ice at loading port"},
+            "brokerage": {"value": "1.25%", "confidence": 0.8,
+                          "original_match": "brokerage commission payable on freight"}
+        }
+        template_data = {
+            "structured_fields": [
+                {"id": "field_1", "type": "commission", "position": (0, 5),
+                 "context": "Brokerage commission of ____ on freight"},
+                {"id": "field_2", "type": "ice_clause", "position": (10, 15),
+                 "context": "The vessel shall not force ice ____"},
+                {"id": "field_3", "type": "other", "position": (20, 25), "context": ""}
+            ]
+        }
+        
+        mappings = await self.generator._map_terms_to_fields(recap_terms, template_data)
+        
+        assert [m["mapping_method"] for m in mappings] == ["semantic", "semantic", "none"]
+        assert mappings[0]["mapped_term"]["value"] == "1.25%"
+        assert mappings[1]["mapped_term"]["value"] == "Not to force ice"
+        assert mappings[0]["mapped_term"]["similarity_score"] > self.generator.similarity_threshold
+    
+    @pytest.mark.asyncio
+    async def test_assignment_capacity(self):
+        """Test that repeated blanks share a term, laycan fills both ends and other terms fill one type"""
+        recap_terms = {
+            "laycan": {"value": "1-5 March", "confidence": 0.8, "original_match": "laycan 1-5 march"},
+            "vessel": {"value": "OCEAN STAR", "confidence": 0.9, "original_match": "vessel ocean star"}
+        }
+        template_data = {
+            "structured_fields": [
+                {"id": "field_1", "type": "vessel_name", "position": (0, 5), "context": "Vessel: ____"},
+                {"id": "field_2", "type": "laycan_start", "position": (10, 15), "context": "Laycan from ____"},
+                {"id": "field_3", "type": "laycan_end", "position": (20, 25), "context": "to ____"},
+                {"id": "field_4", "type": "vessel_name", "position": (30, 35), "context": "the vessel ____"},
+                {"id": "field_5", "type": "flag", "position": (40, 45), "context": "vessel flag ____"}
+            ]
+        }
+        
+        mappings = await self.generator._map_terms_to_fields(recap_terms, template_data)
+        
+        values = [m["mapped_term"]["value"] if m["filled"] else None for m in mappings]
+        assert values == ["OCEAN STAR", "1-5 March", "1-5 March", "OCEAN STAR", None]
+        assert [m["mapping_method"] for m in mappings] == ["mapped", "mapped", "mapped", "mapped", "none"]
+    
+    @pytest.mark.asyncio
+    async def test_semantic_terms_fill_one_type(self):
+        """Test that a recap term similar to several field types fills only the closest"""
+        pytest.importorskip("sklearn")
+        recap_terms = {
+            "brokerage": {"value": "1.25%", "confidence": 0.8,
+                          "original_match": "brokerage commission payable on freight"}
+        }
+        template_data = {
+            "structured_fields": [
+                {"id": "field_1", "type": "address_commission", "position": (0, 5),
+                 "context": "Address commission payable on freight ____"},
+                {"id": "field_2", "type": "commission", "position": (10, 15),
+                 "context": "Brokerage commission payable on freight ____"}
+            ]
+        }
+        
+        similarities = self.generator._semantic_similarities(template_data["structured_fields"], recap_terms)
+        assert (similarities > self.generator.similarity_threshold).all()
+        
+        mappings = await self.generator._map_terms_to_fields(recap_terms, template_data)
+        
+        assert [m["filled"] for m in mappings] == [False, True]
+    
     def test_find_direct_mapping(self):
         """Test direct mapping of terms"""
         recap_terms = {
@@ -263,6 +337,121 @@ class TestCPGenerator:
         confidence = self.generator._calculate_overall_confidence(field_mappings)
         assert confidence == 0.0
     
+    @pytest.mark.asyncio
+    async def test_fill_template_text(self):
+        """Test filling applies every value at its original position and maps it into the filled text"""
+        template_data = {"original_data": {"original_text": "Vessel: ____ Cargo: ____ Port: ____"}}
+        
+        def mapping(field_id, position, value):
+            return {"field_id": field_id, "field_type": field_id, "field_position": position, "filled": True,
+                    "confidence": 0.9, "mapped_term": {"value": value}}
+        
+        field_mappings = [
+            mapping("port", (31, 35), "SANTOS"),
+            mapping("vessel", (8, 12), "OCEAN STAR"),
+            mapping("cargo", (20, 24), "WHEAT"),
+            mapping("overlap", (10, 22), "IGNORED")
+        ]
+        
+        result = await self.generator._fill_template(template_data, field_mappings, "text")
+        
+        content = result["content"]
+        assert content == "Vessel: OCEAN STAR Cargo: WHEAT Port: SANTOS"
+        assert [m["field_id"] for m in result["modifications"]] == ["vessel", "cargo", "port"]
+        for modification in result["modifications"]:
+            assert content[slice(*modification["new_position"])] == modification["new_text"]
+        
+        changes = self.generator._track_changes(template_data, field_mappings[:3], result["modifications"])
+        assert content[slice(*changes[0]["new_position"])] == "SANTOS"
+        
+        html = await self.generator._fill_template(template_data, field_mappings, "html")
+        assert 'Port: <span class="modified">SANTOS</span>' in html["content"]
+    
+    @pytest.mark.asyncio
+    async def test_fill_template_applies_amendments(self):
+        """Test that recap amendments are applied to the clauses before fields"""
+        from src.generators.clause_amender import find_amendments
+        
+        text = "1. Vessel. Vessel: ____ to load\n\n2. Freight. Rate ____ per mt\n\n3. Laytime. Days ____"
+        template_data = {"original_data": {"original_text": text}}
+        
+        def mapping(field_id, value):
+            start = text.index("____", text.index(f"{field_id}."))
+            return {"field_id": field_id, "field_type": field_id, "field_position": (start, start + 4),
+                    "filled": True, "confidence": 0.9, "mapped_term": {"value": value}}
+        
+        field_mappings = [mapping("1", "OCEAN STAR"), mapping("2", "USD 25")]
+        amendments = find_amendments('Clause 2 deleted\nClause 3 amended to read "Laytime. Reversible"')
+        
+        result = await self.generator._fill_template(template_data, field_mappings, "text", amendments=amendments)
+        
+        assert result["content"] == "1. Vessel. Vessel: OCEAN STAR to load\n\n3. Laytime. Reversible"
+        assert [a["status"] for a in result["amendments"]] == ["applied", "applied"]
+        
+        changes = self.generator._track_changes(template_data, field_mappings, result["modifications"])
+        assert [c["field_type"] for c in changes if c["mapping_method"] == "amendment"] == ["amendment"] * 2
+    
+    @pytest.mark.asyncio
+    async def test_amendments_cover_short_and_multi_paragraph_clauses(self):
+        """Test that every numbered heading opens a clause running to the next heading"""
+        from src.generators.clause_amender import find_amendments
+        from src.utils.clause_index import ClauseIndex
+        
+        text = ("1. Vessel. Name ____\n2. Short clause.\n3. Laytime. Days ____\n\n"
+                "Time to count from arrival.\n\n4. Demurrage. Rate ____")
+        # The template parser's index leaves out clause 2 and ends clause 3 at the blank line
+        stored = [{"number": "3", "title": "Laytime", "type": "numbered",
+                   "start": text.index("3."), "end": text.index("\n\nTime")}]
+        template_data = {
+            "original_data": {"original_text": text},
+            "clause_index": ClauseIndex.from_clauses(stored).to_dict()
+        }
+        amendments = find_amendments('Clause 2 deleted\nClause 3 amended to read "Laytime. Reversible"')
+        
+        result = await self.generator._fill_template(template_data, [], "text", amendments=amendments)
+        
+        assert [a["status"] for a in result["amendments"]] == ["applied", "applied"]
+        assert result["content"] == "1. Vessel. Name ____\n3. Laytime. Reversible\n\n4. Demurrage. Rate ____"
+    
+    @pytest.mark.asyncio
+    async def test_create_docx_output_patches_template(self):
+        """Test that a DOCX template is filled in place when its text is the original text"""
+        docx = pytest.importorskip("docx")
+        from src.extractors.docx_extractor import DOCXExtractor
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            template_path = os.path.join(temp_dir, "template.docx")
+            doc = docx.Document()
+            doc.add_paragraph("Vessel: ____ Cargo: ____")
+            doc.save(template_path)
+            extractor = DOCXExtractor()
+            original_text = extractor.extract_text(template_path)
+            modifications = [{"position": (8, 12), "new_text": "OCEAN STAR"}]
+            
+            result = await self.generator._create_docx_output(original_text, modifications, template_path)
+            
+            assert "document" not in result
+            assert result["content"] == "Vessel: OCEAN STAR Cargo: ____\n"
+            with tempfile.NamedTemporaryFile(suffix=".docx", dir=temp_dir, delete=False) as f:
+                f.write(result["docx_bytes"])
+            heading, generated_on, content = extractor.extract_text(f.name).split("\n", 2)
+            assert content == result["content"]
+            
+            # Text that is not the template's falls back to a rebuilt document
+            rebuilt = await self.generator._create_docx_output("Vessel: ____", modifications, template_path)
+            assert "document" in rebuilt
+            
+            # Both shapes open with the same title and generation date paragraphs
+            patched_paragraphs = docx.Document(f.name).paragraphs
+            rebuilt_paragraphs = rebuilt["document"].paragraphs
+            for paragraphs in (patched_paragraphs, rebuilt_paragraphs):
+                assert paragraphs[0].text == heading == "CHARTER PARTY"
+                assert paragraphs[0].runs[0].bold
+                assert paragraphs[0].alignment == 1
+                assert paragraphs[1].text.startswith("Generated on: ")
+                assert paragraphs[1].runs[0].italic
+            assert generated_on.startswith("Generated on: ")
+    
     @pytest.mark.asyncio
     async def test_create_html_output(self):
         """Test HTML output creation"""
@@ -0,0 +1,146 @@
+"""
+Tests for DocumentProcessor template compilation
+"""
+
+import io
+import os
+import shutil
+import tempfile
+
+import pytest
+
+docx = pytest.importorskip("docx")
+
+from document_processor import DocumentProcessor
+from src.extractors.docx_extractor import DOCXExtractor
+
+
+class TestCompiledTemplates:
+    """Test cases for compiled template fill plans"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.template_path = os.path.join(self.temp_dir, "template.docx")
+        
+        doc = docx.Document()
+        doc.add_paragraph("CHARTER PARTY")
+        doc.add_paragraph("Vessel.......... to load at Loading____ port")
+        doc.add_paragraph("Freight rate..... per metric ton")
+        table = doc.add_table(rows=2, cols=2)
+        # Only body dot placeholders are converted, so table cells use JSON placeholders
+        table.cell(0, 0).text = "Charterer {$charterer}"
+        table.cell(0, 1).text = "Owner {$owner}"
+        table.cell(1, 0).merge(table.cell(1, 1))
+        table.cell(1, 0).text = "Demurrage {$demurrage} per day, Owner {$owner}"
+        doc.save(self.template_path)
+        
+        self.recap_data = {
+            "vessel_name": "OCEAN STAR",
+            "loading_port": "Port Hedland",
+            "charterer": "ABC Trading Ltd",
+            "demurrage": "USD 15,000",
+            "owner": ""
+        }
+    
+    def teardown_method(self):
+        """Cleanup after each test method"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_plan_lists_fields(self):
+        """Test that the plan records the fields of body and table placeholders"""
+        plan = DocumentProcessor().compile_template(self.template_path)
+        
+        assert {"vessel_name", "charterer", "owner", "demurrage"} <= set(plan["fields"])
+        assert plan["placeholders"]
+    
+    def test_patch_fills_placeholders(self):
+        """Test that patching fills every mapped placeholder and leaves the others"""
+        processor = DocumentProcessor()
+        compiled = processor._compiled_template(self.template_path)
+        template_text = compiled["patcher"].text
+        
+        extractor = DOCXExtractor()
+        first = extractor.extract_text(io.BytesIO(processor._patch_compiled_template(compiled, self.recap_data)))
+        second = extractor.extract_text(io.BytesIO(
+            processor._patch_compiled_template(compiled, {"vessel_name": "SEA BREEZE"})
+        ))
+        
+        expected = template_text
+        for field, value in self.recap_data.items():
+            if value:
+                expected = expected.replace(f"{{${field}}}", value)
+        assert first == expected
+        # The empty owner value leaves its placeholders, here in a merged cell too
+        assert first.count("{$owner}") == template_text.count("{$owner}")
+        # Each patch starts from the compiled template
+        assert "SEA BREEZE" in second
+        assert "OCEAN STAR" not in second
+    
+    def test_update_cp_template_matches_compiled_patch(self):
+        """Test that updating a loaded template gives the text of the compiled patch"""
+        processor = DocumentProcessor()
+        patched = processor._patch_compiled_template(processor._compiled_template(self.template_path),
+                                                     self.recap_data)
+        
+        updated = processor.update_cp_template(docx.Document(self.template_path), self.recap_data)
+        buffer = io.BytesIO()
+        updated.save(buffer)
+        
+        extractor = DOCXExtractor()
+        assert extractor.extract_text(io.BytesIO(buffer.getvalue())) == extractor.extract_text(io.BytesIO(patched))
+        assert "OCEAN STAR" in updated.paragraphs[1].text
+    
+    def test_patch_keeps_run_formatting(self):
+        """Test that a filled value keeps the formatting of its run, marked bold red"""
+        doc = docx.Document()
+        paragraph = doc.add_paragraph()
+        paragraph.add_run("Vessel: ").italic = True
+        paragraph.add_run("{$vessel_name}").underline = True
+        doc.save(self.template_path)
+        
+        processor = DocumentProcessor()
+        patched = processor._patch_compiled_template(processor._compiled_template(self.template_path),
+                                                     self.recap_data)
+        
+        runs = [run for run in docx.Document(io.BytesIO(patched)).paragraphs[0].runs if run.text]
+        assert [run.text for run in runs] == ["Vessel: ", "OCEAN STAR"]
+        assert runs[0].italic and not runs[0].bold
+        assert runs[1].underline and runs[1].bold
+        assert str(runs[1].font.color.rgb) == "FF0000"
+    
+    def test_compiled_once_per_content(self, monkeypatch):
+        """Test that later compilations reuse the plan instead of reloading"""
+        processor = DocumentProcessor()
+        plan = processor.compile_template(self.template_path)
+        
+        def fail_load(file_path):
+            raise AssertionError("template was loaded again")
+        
+        monkeypatch.setattr(processor, "load_cp_template", fail_load)
+        assert processor.compile_template(self.template_path) is plan
+        assert processor.compile_template(self.template_path, content_hash=plan["content_hash"]) is plan
+    
+    def test_generate_applies_amendments_in_patch(self):
+        """Test that clause amendments go into the same patch as the filled values"""
+        doc = docx.Document()
+        for text in ["CHARTER PARTY", "1. Vessel {$vessel_name} to load", "2. Short clause.",
+                     "3. Laytime clause.", "Time counts from NOR.", "", "4. Demurrage {$demurrage} per day"]:
+            doc.add_paragraph(text)
+        doc.save(self.template_path)
+        recap_path = os.path.join(self.temp_dir, "recap.txt")
+        with open(recap_path, "w", encoding="utf-8") as f:
+            f.write('Vessel: OCEAN STAR\nDemurrage: USD 15,000\n\nClause 2 deleted\n'
+                    'Clause 3 amended to read "Laytime reversible."\n'
+                    'Clause 4 amended to read "Demurrage as per recap."\n')
+        output_path = os.path.join(self.temp_dir, "output.docx")
+        
+        processor = DocumentProcessor()
+        _, report = processor.generate_charter_party(self.template_path, recap_path, output_path)
+        
+        paragraphs = [paragraph.text for paragraph in docx.Document(output_path).paragraphs]
+        assert paragraphs == [
+            "CHARTER PARTY", "1. Vessel OCEAN STAR to load", "3. Laytime reversible.", "",
+            "4. Demurrage as per recap."
+        ]
+        assert [a["status"] for a in report["clause_amendments"]] == ["applied"] * 3
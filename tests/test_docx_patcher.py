@@ -0,0 +1,165 @@
+"""
+Tests for DocxPatcher and zip member replacement
+"""
+
+import io
+import zipfile
+
+import pytest
+
+docx = pytest.importorskip("docx")
+
+from src.extractors.docx_extractor import DOCXExtractor
+from src.generators.docx_patcher import DocxPatcher
+from src.utils.zip_patch import replace_members
+
+
+def make_docx(paragraphs=40):
+    """Build a DOCX with formatted runs, escaped text and a table"""
+    doc = docx.Document()
+    heading = doc.add_paragraph()
+    heading.add_run("CHARTER ").bold = True
+    heading.add_run("PARTY").italic = True
+    doc.add_paragraph("Vessel: ____ Owners: Smith & Sons <Ltd>")
+    for i in range(paragraphs):
+        doc.add_paragraph(f"{i + 1}. Freight ____ per metric ton, payable as agreed.")
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Charterer"
+    table.cell(0, 1).text = "____"
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def extracted(data):
+    """Text of a DOCX file as the extractor gives it"""
+    return DOCXExtractor().extract_text(io.BytesIO(data))
+
+
+def edit(text, target, new_text, occurrence=0):
+    """Edit replacing an occurrence of target in text"""
+    start = -1
+    for _ in range(occurrence + 1):
+        start = text.index(target, start + 1)
+    return {"position": (start, start + len(target)), "new_text": new_text}
+
+
+class TestDocxPatcher:
+    """Test cases for in-place DOCX patching"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.data = make_docx()
+        self.patcher = DocxPatcher(self.data)
+    
+    def test_text_matches_extractor(self):
+        """Test that the indexed text is the text edits are positioned in"""
+        assert self.patcher.text == extracted(self.data)
+    
+    def test_patch_replaces_text(self):
+        """Test that edits inside and across runs land in the extracted text"""
+        text = self.patcher.text
+        edits = [
+            edit(text, "____", "OCEAN STAR"),
+            edit(text, "Smith & Sons", "Jones & Co <UK>"),
+            edit(text, "CHARTER PARTY", "VOYAGE CHARTER"),
+            edit(text, "____", "USD 25.50", occurrence=40),
+        ]
+        patched = self.patcher.patch(edits)
+        
+        expected = text
+        for item in sorted(edits, key=lambda item: item["position"], reverse=True):
+            start, end = item["position"]
+            expected = expected[:start] + item["new_text"] + expected[end:]
+        assert extracted(patched) == expected
+    
+    def test_patch_keeps_formatting_and_marks_values(self):
+        """Test that new text keeps its run's formatting plus the marking"""
+        text = self.patcher.text
+        patched = self.patcher.patch([edit(text, "PARTY", "CP")], {"color": {"val": "FF0000"}})
+        
+        runs = docx.Document(io.BytesIO(patched)).paragraphs[0].runs
+        assert [run.text for run in runs if run.text] == ["CHARTER ", "CP"]
+        assert runs[0].bold
+        marked = [run for run in runs if run.text == "CP"][0]
+        assert marked.italic
+        assert str(marked.font.color.rgb) == "FF0000"
+    
+    def test_leading_paragraphs(self):
+        """Test that leading paragraphs open the body with their formatting, before the edits"""
+        text = self.patcher.text
+        patched = self.patcher.patch(
+            [edit(text, "____", "OCEAN STAR")],
+            leading_paragraphs=[
+                {"text": "CHARTER & PARTY", "run_properties": {"b": {}}, "paragraph_properties": {"jc": {"val": "center"}}},
+                {"text": "Generated"}
+            ]
+        )
+        
+        assert extracted(patched) == "CHARTER & PARTY\nGenerated\n" + text.replace("____", "OCEAN STAR", 1)
+        paragraphs = docx.Document(io.BytesIO(patched)).paragraphs
+        assert paragraphs[0].runs[0].bold
+        assert paragraphs[0].alignment == 1
+        assert not paragraphs[1].runs[0].bold
+    
+    def test_patch_removes_covered_paragraphs(self):
+        """Test that edits across paragraphs leave no empty paragraphs and keep line breaks"""
+        doc = docx.Document()
+        for paragraph in ["1. Vessel ____", "2. Freight clause.", "Paid on loading.", "",
+                          "3. Laytime ____", "Time counts from NOR.", "4. Demurrage ____"]:
+            doc.add_paragraph(paragraph)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        patcher = DocxPatcher(buffer.getvalue())
+        text = patcher.text
+        
+        # Clause 2 with the blank paragraph after it, and clause 3 rewritten on two lines
+        deleted = {"position": (text.index("2."), text.index("3.")), "new_text": ""}
+        replaced = {"position": (text.index("3."), text.index("\n4.")), "new_text": "3. Laytime\nReversible"}
+        patched = patcher.patch([deleted, replaced])
+        
+        paragraphs = docx.Document(io.BytesIO(patched)).paragraphs
+        assert [paragraph.text for paragraph in paragraphs] == [
+            "1. Vessel ____", "3. Laytime\nReversible", "4. Demurrage ____"
+        ]
+        assert extracted(patched) == "1. Vessel ____\n3. Laytime\nReversible\n4. Demurrage ____\n"
+    
+    def test_other_members_copied(self):
+        """Test that only the document XML changes in the archive"""
+        patched = self.patcher.patch([edit(self.patcher.text, "____", "OCEAN STAR")])
+        
+        with zipfile.ZipFile(io.BytesIO(self.data)) as before, zipfile.ZipFile(io.BytesIO(patched)) as after:
+            assert after.testzip() is None
+            assert after.namelist() == before.namelist()
+            for info in before.infolist():
+                if info.filename == DocxPatcher.DOCUMENT_PART:
+                    continue
+                copied = after.getinfo(info.filename)
+                assert (copied.CRC, copied.compress_size) == (info.CRC, info.compress_size)
+    
+    def test_chunked_deflate(self, monkeypatch):
+        """Test that patching reuses deflated chunks without changing the output"""
+        text = self.patcher.text
+        edits = [edit(text, "____", f"VALUE {i}", occurrence=i) for i in range(0, 40, 7)]
+        expected = extracted(self.patcher.patch(edits))
+        
+        monkeypatch.setattr(DocxPatcher, "CHUNK_SIZE", 97)
+        patcher = DocxPatcher(self.data)
+        assert len(patcher._chunks) > 10
+        assert extracted(patcher.patch(edits)) == expected
+        assert extracted(patcher.patch([])) == text
+    
+    def test_unplaceable_edits_skipped(self):
+        """Test that overlapping edits and edits without run text are skipped"""
+        text = self.patcher.text
+        first = edit(text, "Vessel: ____", "Ship: OCEAN STAR")
+        overlapping = edit(text, "____ Owners", "X")
+        newline = {"position": (text.index("\n"), text.index("\n") + 1), "new_text": "Y"}
+        
+        patched = self.patcher.patch([first, overlapping, newline])
+        assert extracted(patched) == text.replace("Vessel: ____", "Ship: OCEAN STAR", 1)
+    
+    def test_missing_member_rejected(self):
+        """Test that a replacement for a member not in the archive raises"""
+        with pytest.raises(ValueError):
+            replace_members(self.data, {"word/missing.xml": b""})
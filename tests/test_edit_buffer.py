@@ -0,0 +1,82 @@
+"""
+Tests for EditBuffer
+"""
+
+import random
+
+from src.utils.edit_buffer import EditBuffer
+
+
+def sliced(text, edits):
+    """Reference result: apply replacements by slicing, last position first"""
+    for start, end, new_text in sorted(edits, reverse=True):
+        text = text[:start] + new_text + text[end:]
+    return text
+
+
+class TestEditBuffer:
+    """Test cases for EditBuffer"""
+    
+    def test_replacements_in_any_order(self):
+        """Test that edits are positioned in original offsets whatever the order they are added in"""
+        buffer = EditBuffer("Vessel: ____ Cargo: ____ Port: ____")
+        buffer.replace(31, 35, "SANTOS")
+        buffer.replace(8, 12, "OCEAN STAR")
+        buffer.replace(20, 24, "WHEAT")
+        
+        assert buffer.text() == "Vessel: OCEAN STAR Cargo: WHEAT Port: SANTOS"
+        assert [edit["new_text"] for edit in buffer.edits] == ["OCEAN STAR", "WHEAT", "SANTOS"]
+        assert buffer.original == "Vessel: ____ Cargo: ____ Port: ____"
+    
+    def test_overlapping_edits_rejected(self):
+        """Test that an edit overlapping an earlier one is refused"""
+        buffer = EditBuffer("abcdefghij")
+        assert buffer.replace(2, 5, "X")
+        
+        assert buffer.replace(4, 7, "Y") is None
+        assert buffer.replace(3, 3, "Y") is None
+        assert buffer.replace(8, 12, "Y") is None
+        assert buffer.replace(5, 5, "+")
+        assert buffer.replace(2, 2, "-")
+        assert buffer.text() == "ab-X+fghij"
+    
+    def test_offset_mapping(self):
+        """Test that original offsets map into the edited text"""
+        buffer = EditBuffer("The ____ vessel ____ here")
+        first = buffer.replace(4, 8, "OCEAN STAR")
+        second = buffer.replace(16, 20, "X")
+        text = buffer.text()
+        
+        assert buffer.new_offset(0) == 0
+        assert buffer.new_offset(9) == text.index("vessel")
+        assert buffer.new_offset(6) == text.index("OCEAN STAR")
+        assert buffer.new_offset(21) == text.index("here")
+        assert buffer.edits == [first, second]
+        assert text[slice(*first["new_position"])] == "OCEAN STAR"
+        assert text[slice(*second["new_position"])] == "X"
+    
+    def test_render_markup(self):
+        """Test rendering with the replacements wrapped in markup"""
+        buffer = EditBuffer("Freight: ____ per MT")
+        buffer.replace(9, 13, "USD 25.50", field_type="freight_rate")
+        
+        assert buffer.render(lambda edit: f"<b>{edit['new_text']}</b>") == "Freight: <b>USD 25.50</b> per MT"
+        assert [(text, edit and edit["field_type"]) for text, edit in buffer.pieces()] == [
+            ("Freight: ", None), ("USD 25.50", "freight_rate"), (" per MT", None)
+        ]
+    
+    def test_matches_slicing(self):
+        """Test the edited text against slicing in the text on random edits"""
+        rng = random.Random(11)
+        for _ in range(300):
+            text = "".join(rng.choice("ab _\n") for _ in range(rng.randint(0, 60)))
+            buffer = EditBuffer(text)
+            accepted = []
+            for _ in range(rng.randint(0, 10) if text else 0):
+                start = rng.randrange(len(text))
+                end = min(len(text), start + rng.randint(1, 6))
+                new_text = rng.choice(["", "X", "VALUE"])
+                if buffer.replace(start, end, new_text):
+                    accepted.append((start, end, new_text))
+            
+            assert buffer.text() == sliced(text, accepted)
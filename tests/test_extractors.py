@@ -0,0 +1,217 @@
+"""
+Tests for document text extractors
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from src.extractors import pdf_extractor
+from src.extractors.docx_extractor import DOCXExtractor
+from src.extractors.pdf_extractor import PDFExtractor
+from src.extractors.text_stream import iter_paragraph_blocks, iter_text_chunks, iter_with_lookahead
+
+
+def make_pdf(path, pages):
+    """Write a simple PDF with one line of text per page"""
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    pdf = canvas.Canvas(path)
+    for text in pages:
+        pdf.drawString(72, 720, text)
+        pdf.showPage()
+    pdf.save()
+
+
+class TestTextStream:
+    """Test cases for paragraph block streaming"""
+    
+    def test_blocks_rejoin_to_original(self):
+        """Test that blocks split after blank lines and rejoin exactly"""
+        text = "\n  \nVessel: OCEAN STAR\nOwner: XYZ\n\n\nCargo: Iron Ore\n   \nFreight"
+        blocks = list(iter_paragraph_blocks(text.splitlines(keepends=True)))
+        
+        assert "".join(blocks) == text
+        assert blocks[1] == "Vessel: OCEAN STAR\nOwner: XYZ\n\n\n"
+        assert blocks[-1] == "Freight"
+    
+    def test_lookahead_is_next_first_line(self):
+        """Test that each block is paired with the first line of the next"""
+        pairs = list(iter_with_lookahead(["a\n\n", "b\nc\n", "d"]))
+        assert pairs == [("a\n\n", "b\n"), ("b\nc\n", "d"), ("d", "")]
+    
+    def test_chunks_respect_max_length(self):
+        """Test that long blocks are cut at line breaks, then spaces, then anywhere"""
+        text = "short\n\n" + "line one\nline two\n" + "x" * 12 + " tail words here"
+        chunks = list(iter_text_chunks(text, 12))
+        
+        assert "".join(chunk for _, chunk in chunks) == text
+        assert all(len(chunk) <= 12 for _, chunk in chunks)
+        assert all(text[offset:offset + len(chunk)] == chunk for offset, chunk in chunks)
+        assert [chunk for _, chunk in chunks][:3] == ["short\n\n", "line one\n", "line two\n"]
+
+
+class StubPage:
+    """Page exposing only extract_text and flush_cache, like pdfplumber 0.10"""
+    
+    def __init__(self, text):
+        self.text = text
+        self.flushed = False
+    
+    def extract_text(self):
+        return self.text
+    
+    def flush_cache(self):
+        self.flushed = True
+
+
+class StubPDF:
+    """Minimal stand-in for an open pdfplumber or PyPDF2 document"""
+    
+    def __init__(self, texts):
+        self.pages = [StubPage(text) for text in texts]
+
+
+class TestPageEngine:
+    """Test cases for per-page engine selection"""
+    
+    def test_pdfplumber_text_kept_without_page_close(self):
+        """Test that pages without close() keep their pdfplumber text and are flushed"""
+        plumber = StubPDF(["plumber one", "plumber two", "plumber three"])
+        pypdf = StubPDF(["pypdf one", "pypdf two", "pypdf three"])
+        
+        pages = [pdf_extractor._extract_page_text(plumber, pypdf, i) for i in range(3)]
+        
+        assert [p["engine"] for p in pages] == ["pdfplumber", "pdfplumber", "pdfplumber"]
+        assert pages[1]["text"] == "plumber two"
+        assert all(page.flushed for page in plumber.pages)
+    
+    def test_empty_pdfplumber_page_falls_back(self):
+        """Test that only the page pdfplumber read no text from goes to PyPDF2"""
+        plumber = StubPDF(["plumber one", "", "plumber three"])
+        pypdf = StubPDF(["pypdf one", "pypdf two", "pypdf three"])
+        
+        engines = [pdf_extractor._extract_page_text(plumber, pypdf, i)["engine"] for i in range(3)]
+        assert engines == ["pdfplumber", "PyPDF2", "pdfplumber"]
+
+
+class TestPDFExtractor:
+    """Test cases for PDFExtractor"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        fd, self.pdf_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        self.page_texts = [f"Clause {i} vessel page text" for i in range(1, 6)]
+        make_pdf(self.pdf_path, self.page_texts)
+    
+    def teardown_method(self):
+        """Cleanup after each test method"""
+        os.unlink(self.pdf_path)
+    
+    def test_parallel_matches_sequential(self):
+        """Test that the process pool keeps page order and text"""
+        sequential = PDFExtractor(max_workers=1)
+        parallel = PDFExtractor(max_workers=2, min_parallel_pages=1)
+        
+        assert parallel.extract_text(self.pdf_path) == sequential.extract_text(self.pdf_path)
+        
+        pages = parallel.extract_pages(self.pdf_path)
+        assert [p["page_number"] for p in pages] == [1, 2, 3, 4, 5]
+        assert all(t in p["text"] for t, p in zip(self.page_texts, pages))
+    
+    def test_page_offsets(self):
+        """Test that page offsets index into the joined text"""
+        extractor = PDFExtractor(max_workers=1)
+        pages = extractor.extract_pages(self.pdf_path)
+        text = extractor.extract_text(self.pdf_path)
+        
+        for page in pages:
+            assert text[page["start"]:page["end"]] == page["text"] + "\n"
+    
+    def test_per_page_fallback(self, monkeypatch):
+        """Test that a failing pdfplumber page falls back to PyPDF2 alone"""
+        original = pdf_extractor._extract_page_text
+        
+        def flaky_plumber(plumber_pdf, pypdf_reader, index):
+            if index == 2:
+                return original(None, pypdf_reader, index)
+            return original(plumber_pdf, pypdf_reader, index)
+        
+        monkeypatch.setattr(pdf_extractor, "_extract_page_text", flaky_plumber)
+        pages = PDFExtractor(max_workers=1).extract_pages(self.pdf_path)
+        
+        engines = [p["engine"] for p in pages]
+        assert engines == ["pdfplumber", "pdfplumber", "PyPDF2", "pdfplumber", "pdfplumber"]
+        assert "Clause 3" in pages[2]["text"]
+    
+    def test_large_document_spool(self):
+        """Test that large-document mode spools the same text to disk"""
+        expected = PDFExtractor(max_workers=1).extract_text(self.pdf_path)
+        extractor = PDFExtractor(max_workers=1, large_document_pages=1, spool_threshold=16)
+        
+        with extractor.extract_to_spool(self.pdf_path) as spool:
+            assert spool.read() == expected
+        assert extractor.last_stats["spooled_to_disk"]
+        assert extractor.last_stats["pages"] == 5
+        
+        assert extractor.extract_text(self.pdf_path) == expected
+    
+    def test_iter_text_stops_early(self):
+        """Test that closing the page stream early records a partial read"""
+        extractor = PDFExtractor(max_workers=2, min_parallel_pages=1)
+        stream = extractor.iter_text(self.pdf_path)
+        
+        assert "Clause 1" in next(stream)
+        stream.close()
+        assert extractor.last_stats["pages_read"] < 5
+
+
+class TestDOCXExtractor:
+    """Test cases for DOCXExtractor"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        docx = pytest.importorskip("docx")
+        fd, self.docx_path = tempfile.mkstemp(suffix=".docx")
+        os.close(fd)
+        
+        doc = docx.Document()
+        doc.add_paragraph("RECAP\tM/V OCEAN STAR")
+        table = doc.add_table(rows=2, cols=3)
+        for r in range(2):
+            for c in range(3):
+                table.cell(r, c).text = f"r{r}c{c}"
+        table.cell(0, 1).merge(table.cell(0, 2))
+        paragraph = doc.add_paragraph("Freight: ")
+        paragraph.add_run("USD 25.50").add_break()
+        paragraph.add_run("per MT")
+        doc.save(self.docx_path)
+    
+    def teardown_method(self):
+        """Cleanup after each test method"""
+        os.unlink(self.docx_path)
+    
+    def test_document_order_text(self):
+        """Test that tables stay in place and merged cells are read once"""
+        text = DOCXExtractor().extract_text(self.docx_path)
+        
+        assert text == (
+            "RECAP\tM/V OCEAN STAR\n"
+            "r0c0\tr0c1\nr0c2\t\n"
+            "r1c0\tr1c1\tr1c2\t\n"
+            "Freight: USD 25.50\nper MT\n"
+        )
+    
+    def test_item_offsets(self):
+        """Test that item offsets index into the joined text"""
+        extractor = DOCXExtractor()
+        items = list(extractor.iter_items(self.docx_path))
+        text = extractor.extract_text(self.docx_path)
+        
+        assert [i["type"] for i in items].count("cell") == 5
+        for item in items:
+            assert text[item["start"]:item["end"]] == item["text"]
+        
+        last_cell = [i for i in items if i["type"] == "cell"][-1]
+        assert (last_cell["table"], last_cell["row"], last_cell["column"]) == (0, 1, 2)
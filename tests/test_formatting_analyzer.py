@@ -0,0 +1,75 @@
+"""
+Tests for FormattingAnalyzer
+"""
+
+import re
+
+from src.preprocessors.formatting_analyzer import FormattingAnalyzer, analyze_formatting
+
+TEMPLATE_TEXT = """CHARTER PARTY
+  
+1. VESSEL
+    The vessel ______ of [tonnage] (about) tons.
+    a) at 5% more or less
+
+
+(b) freight at $ ____ per ton
+\t\x0b
+iv. GENERAL
+"""
+
+
+def reference_formatting(text):
+    """The statistics as computed with a separate scan each"""
+    indentation = {}
+    for line in text.split('\n'):
+        if line.strip():
+            indent = len(line) - len(line.lstrip())
+            indentation[indent] = indentation.get(indent, 0) + 1
+    
+    schemes = [
+        name for name, pattern in (
+            ("numeric_dot", r'^\s*\d+\.'),
+            ("letter_parenthesis", r'^\s*[a-z]\)'),
+            ("parenthesis_letter", r'^\s*\([a-z]\)'),
+            ("roman_dot", r'^\s*[ivx]+\.')
+        ) if re.search(pattern, text, re.MULTILINE)
+    ]
+    
+    return {
+        "line_breaks": text.count('\n'),
+        "paragraph_breaks": len(re.findall(r'\n\s*\n', text)),
+        "indentation_patterns": indentation,
+        "numbering_schemes": schemes,
+        "special_characters": {
+            "underscores": text.count('_'),
+            "brackets": text.count('[') + text.count(']'),
+            "parentheses": text.count('(') + text.count(')'),
+            "dollar_signs": text.count('$'),
+            "percent_signs": text.count('%')
+        }
+    }
+
+
+class TestFormattingAnalyzer:
+    """Test cases for FormattingAnalyzer"""
+    
+    def test_matches_separate_scans(self, sample_template_text):
+        """Test that one pass gives the statistics of the separate scans"""
+        for text in (TEMPLATE_TEXT, sample_template_text, "\n\n", " \n", "x\n \n", "", "ii."):
+            assert analyze_formatting(text) == reference_formatting(text)
+    
+    def test_paragraph_breaks(self):
+        """Test that a run of blank lines is one break and edge lines are not breaks"""
+        assert analyze_formatting("a\n\n \n\t\nb\n\nc")["paragraph_breaks"] == 2
+        assert analyze_formatting("\n\na")["paragraph_breaks"] == 1
+        assert analyze_formatting("\na\n")["paragraph_breaks"] == 0
+    
+    def test_chunked_feed(self):
+        """Test that lines split across chunks are counted as whole lines"""
+        for size in (1, 2, 5, 17):
+            analyzer = FormattingAnalyzer()
+            for start in range(0, len(TEMPLATE_TEXT), size):
+                analyzer.feed(TEMPLATE_TEXT[start:start + size])
+            
+            assert analyzer.finish() == reference_formatting(TEMPLATE_TEXT)
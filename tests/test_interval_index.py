@@ -0,0 +1,65 @@
+"""
+Tests for IntervalIndex
+"""
+
+import random
+
+from src.utils.interval_index import IntervalIndex
+
+
+def linear_overlaps(accepted, start, end, closed):
+    """Reference result: compare against every accepted interval"""
+    if closed:
+        return any(s <= end and e >= start for s, e in accepted)
+    return any(min(end, e) - max(start, s) > 0 for s, e in accepted)
+
+
+class TestIntervalIndex:
+    """Test cases for IntervalIndex"""
+    
+    def test_half_open_touching_is_free(self):
+        """Test that half-open intervals may share an endpoint"""
+        index = IntervalIndex()
+        assert index.add(10, 20)
+        
+        assert not index.overlaps(20, 30)
+        assert not index.overlaps(0, 10)
+        assert index.overlaps(19, 21)
+        assert index.overlaps(12, 15)
+        assert not index.add(5, 11)
+        assert len(index) == 1
+    
+    def test_closed_touching_overlaps(self):
+        """Test that closed intervals sharing an endpoint overlap"""
+        index = IntervalIndex(closed=True)
+        index.add(10, 20)
+        
+        assert index.overlaps(20, 30)
+        assert index.overlaps(0, 10)
+        assert not index.overlaps(21, 30)
+        assert index.overlaps(0, 100)
+    
+    def test_empty_interval_never_overlaps(self):
+        """Test that empty half-open intervals are accepted but not stored"""
+        index = IntervalIndex()
+        index.add(10, 20)
+        
+        assert index.add(15, 15)
+        assert len(index) == 1
+        assert index.add(18, 25) is False
+    
+    def test_matches_linear_scan(self):
+        """Test random insertions against pairwise overlap checks"""
+        rng = random.Random(7)
+        for closed in (False, True):
+            index = IntervalIndex(closed)
+            accepted = []
+            for _ in range(2000):
+                start = rng.randint(0, 5000)
+                end = start + rng.choice([0, 1, 3, 10, 40, 200])
+                expected = linear_overlaps(accepted, start, end, closed)
+                
+                assert index.overlaps(start, end) == expected
+                assert index.add(start, end) == (not expected)
+                if not expected:
+                    accepted.append((start, end))
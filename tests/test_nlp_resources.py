@@ -0,0 +1,42 @@
+"""
+Tests for lazy NLP resource loading
+"""
+
+import socket
+
+from src.utils import nlp_resources
+from src.parsers.recap_parser import RecapParser
+from src.generators.cp_generator import CPGenerator
+
+
+class TestNLPResources:
+    """Test cases for lazy, offline NLP loading"""
+    
+    def test_missing_module_is_none(self):
+        """Test that an uninstalled module is reported as None"""
+        assert nlp_resources.optional_import("no_such_nlp_module") is None
+        assert "import no_such_nlp_module" in nlp_resources.LOAD_TIMES
+    
+    def test_construction_loads_nothing(self):
+        """Test that parsers and generators defer NLP loading to first use"""
+        parser = RecapParser()
+        generator = CPGenerator()
+        assert not parser._nlp_loaded
+        assert not generator._vectorizer_loaded
+        
+        # A pipeline set explicitly is used as is
+        parser.nlp = None
+        assert parser._perform_nlp_analysis("Vessel: OCEAN STAR")["entities"] == []
+    
+    def test_loading_is_offline(self, monkeypatch):
+        """Test that loading NLP resources never opens a connection"""
+        def refuse(*args, **kwargs):
+            raise AssertionError("NLP loading tried to use the network")
+        
+        monkeypatch.setattr(socket.socket, "connect", refuse)
+        monkeypatch.setattr(socket, "create_connection", refuse)
+        
+        parser = RecapParser()
+        parser.nlp
+        assert isinstance(parser.stop_words, frozenset)
+        CPGenerator().vectorizer
@@ -0,0 +1,83 @@
+"""
+Tests for ParseCache
+"""
+
+import os
+import time
+import shutil
+import tempfile
+
+import pytest
+
+from src.utils.parse_cache import ParseCache, rules_hash
+from src.parsers.template_parser import TemplateParser
+
+
+class TestParseCache:
+    """Test cases for ParseCache"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ParseCache(self.temp_dir)
+    
+    def teardown_method(self):
+        """Cleanup after each test method"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_put_and_get(self):
+        """Test storing and retrieving a cached value"""
+        key = self.cache.make_key("recap", "abc123", "1.0", "rules")
+        self.cache.put(key, {"terms": {"vessel": [{"value": "ocean star"}]}})
+        
+        assert self.cache.get(key) == {"terms": {"vessel": [{"value": "ocean star"}]}}
+        assert self.cache.get("missing") is None
+        assert self.cache.stats()["hits"] == 1
+        assert self.cache.stats()["misses"] == 1
+    
+    def test_key_changes_with_rules_and_version(self):
+        """Test that rule or version changes produce a different key"""
+        base = self.cache.make_key("recap", "abc123", "1.0", rules_hash({"a": [r"x"]}))
+        new_rules = self.cache.make_key("recap", "abc123", "1.0", rules_hash({"a": [r"y"]}))
+        new_version = self.cache.make_key("recap", "abc123", "1.1", rules_hash({"a": [r"x"]}))
+        
+        assert base != new_rules
+        assert base != new_version
+    
+    def test_lru_eviction(self):
+        """Test that least recently used entries are evicted over the size cap"""
+        payload = "x" * 1000
+        self.cache.max_size_bytes = 2500
+        
+        self.cache.put("first", payload)
+        self.cache.put("second", payload)
+        
+        # Make "first" the most recently used entry
+        past = time.time() - 60
+        os.utime(os.path.join(self.temp_dir, "second.json"), (past, past))
+        self.cache.get("first")
+        
+        self.cache.put("third", payload)
+        
+        assert self.cache.get("first") == payload
+        assert self.cache.get("third") == payload
+        assert self.cache.get("second") is None
+    
+    @pytest.mark.asyncio
+    async def test_template_parser_uses_cache(self, sample_template_text):
+        """Test that a repeat parse of the same bytes skips extraction"""
+        parser = TemplateParser(cache=self.cache)
+        template_path = os.path.join(self.temp_dir, "template.txt")
+        with open(template_path, 'w') as f:
+            f.write(sample_template_text)
+        
+        first = await parser.parse(template_path)
+        
+        async def fail_extract(file_path):
+            raise AssertionError("extraction should have been skipped")
+        
+        parser._extract_text = fail_extract
+        second = await parser.parse(template_path)
+        
+        assert second["original_text"] == first["original_text"]
+        assert len(second["fields"]) == len(first["fields"])
@@ -0,0 +1,135 @@
+"""
+Tests for PatternScanner
+"""
+
+import re
+
+import pytest
+
+from src.utils.pattern_scanner import PatternScanner, LiteralIndex, anchor_context, literal_prefix, required_literals
+from src.parsers.recap_parser import RecapParser
+from src.parsers.template_parser import TemplateParser
+
+
+FLAGS = re.IGNORECASE | re.MULTILINE
+
+
+def finditer_all(rules, text):
+    """Reference result: one finditer per pattern, in rule order"""
+    return [
+        (name, match.span(), match.groups())
+        for name, patterns in rules.items()
+        for pattern in patterns
+        for match in re.finditer(pattern, text, FLAGS)
+    ]
+
+
+def scan_all(scanner, text, match_before=None):
+    return [(name, match.span(), match.groups()) for name, match in scanner.iter_matches(text, match_before)]
+
+
+class TestPatternScanner:
+    """Test cases for PatternScanner"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.rules = RecapParser().term_patterns
+        self.scanner = PatternScanner(self.rules, FLAGS)
+    
+    def test_literal_analysis(self):
+        """Test prefix and required literal derivation"""
+        assert literal_prefix(r'm[\/]v\s+(.+?)(?:\n|$)') == 'm/v'
+        assert literal_prefix(r'(\d+)\s*mt') == ''
+        assert literal_prefix(r'^vessel\s*:?') == 'vessel'
+        assert literal_prefix(r'___+\s*cargo') == '___'
+        assert required_literals(r'(\$?[\d,]+\.?\d*)\s*per\s*day\s*demurrage') == ['demurrage']
+        assert required_literals(r'(\d+)\s*(mt|tons?)') == ['mt', 'ton']
+        assert required_literals(r'(\d+)\s*(mt|\d)') == []
+    
+    def test_matches_finditer(self, sample_recap_text):
+        """Test that the scanner finds exactly what finditer finds"""
+        for text in (
+            sample_recap_text.lower(),
+            "to: to: toto:to\nfrom:from: x\nloadloading port: a\n",
+            "freight: 12.5 per mt\n 1,000 per day demurrage\n50,000 mt of wheat\n",
+            ""
+        ):
+            assert scan_all(self.scanner, text) == finditer_all(self.rules, text)
+    
+    def test_case_folding_fallback(self):
+        """Test that characters matching ASCII only under IGNORECASE are still found"""
+        text = "vessel: ocean star\nſhip: long s\nchartereR: abc\n"
+        assert scan_all(self.scanner, text) == finditer_all(self.rules, text)
+    
+    def test_match_before(self):
+        """Test that matches starting at or after the limit are dropped"""
+        text = "vessel: ocean star\nvessel: sea star\n"
+        found = scan_all(self.scanner, text, match_before=10)
+        
+        assert [span for name, span, _ in found if name == 'vessel'] == [(0, 19)]
+    
+    def test_first_only(self):
+        """Test that only the first match of the first matching pattern is kept per name"""
+        scanner = PatternScanner({'rate': [r'usd\s*\d+', r'\d+\s*usd'], 'days': [r'\d+\s*days']}, re.IGNORECASE)
+        found = [(name, m.group(0)) for name, m in scanner.iter_matches("5 USD or USD 7, USD 9, 3 days", first_only=True)]
+        
+        assert found == [('rate', 'USD 7'), ('days', '3 days')]
+    
+    def test_shared_literal_index(self):
+        """Test that scanners sharing an index give the same matches as separate ones"""
+        index = LiteralIndex()
+        first = PatternScanner({'vessel': [r'vessel[:\s]+(.+)']}, FLAGS, index)
+        second = PatternScanner({'owner': [r'^owner[:\s]+(.+)']}, FLAGS, index)
+        text = "vessel: ocean star\nowner: xyz\n"
+        
+        assert [m.group(1) for _, m in first.iter_matches(text)] == ['ocean star']
+        assert [m.group(1) for _, m in second.iter_matches(text)] == ['xyz']
+        assert first.literal_index is second.literal_index
+
+
+class TestAnchoredScanner:
+    """Test cases for PatternScanner with blank anchors"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        parser = TemplateParser()
+        self.rules = parser.field_patterns
+        self.scanner = PatternScanner(self.rules, FLAGS, anchors=parser.FIELD_BLANKS)
+    
+    def test_anchor_context(self):
+        """Test splitting a pattern at the blank its matches reach"""
+        anchor, steps = anchor_context(r'vessel:?\s*___+', ("___", "["), FLAGS)
+        
+        assert anchor == "___"
+        # Last step first: the spaces, the optional colon, then "vessel" backwards
+        assert [char_class.pattern for char_class, _, _ in steps] == [r'[\s]', '[:]', '[l]', '[e]', '[s]', '[s]', '[e]', '[v]']
+        assert steps[1][1:] == (0, 1)
+        assert anchor_context(r'\[vessel\]', ("___", "["), FLAGS) == ("[", [])
+        assert anchor_context(r'vessel\s+(.+)', ("___", "["), FLAGS) is None
+    
+    def test_every_field_pattern_is_anchored(self):
+        """Test that no field pattern needs a full scan of the template"""
+        assert all(context is not None for context in self.scanner.contexts)
+    
+    def test_matches_finditer(self, sample_template_text):
+        """Test that the anchored scanner finds exactly what finditer finds"""
+        for text in (
+            sample_template_text.lower(),
+            "vessel:\n\n  ______ cargo\nm.v.____ 12  ___ metric tons usd______ per mt\n",
+            "__ ___ ______per day demurrage [lay] time] [laytime] [[vessel]] us  d___per ton\n",
+            "laydays______days 123___tons ____ hours notice cancelling:___\n",
+            ""
+        ):
+            assert scan_all(self.scanner, text) == finditer_all(self.rules, text)
+    
+    def test_case_folding_fallback(self):
+        """Test that text the literal prefilter cannot handle is still scanned exactly"""
+        text = "veſſel: ______ cargo\nowner ____\n"
+        assert scan_all(self.scanner, text) == finditer_all(self.rules, text)
+    
+    def test_invalid_anchor(self):
+        """Test that anchors must repeat one uncased character"""
+        with pytest.raises(ValueError):
+            PatternScanner({}, FLAGS, anchors=["_-"])
+        with pytest.raises(ValueError):
+            PatternScanner({}, FLAGS, anchors=["xx"])
@@ -8,6 +8,7 @@ import tempfile
 import os
 
 from src.parsers.recap_parser import RecapParser
+from src.extractors.text_stream import iter_paragraph_blocks
 
 
 class TestRecapParser:
@@ -32,7 +33,7 @@ class TestRecapParser:
             temp_file = f.name
         
         try:
-            result = self.parser._extract_from_txt(temp_file)
+            result = "".join(self.parser._iter_text(temp_file))
             assert result == test_text
         finally:
             os.unlink(temp_file)
@@ -152,6 +153,32 @@ class TestRecapParser:
         finally:
             self.parser.nlp = original_nlp
     
+    def test_perform_nlp_analysis_batched(self):
+        """Test that paragraph batches map entities back to document offsets"""
+        spacy = pytest.importorskip("spacy")
+        nlp = spacy.blank("en")
+        nlp.add_pipe("entity_ruler").add_patterns([
+            {"label": "ORG", "pattern": "Oceanic Shipping"},
+            {"label": "GPE", "pattern": "Santos"}
+        ])
+        
+        @spacy.Language.component("fails_if_run")
+        def fails_if_run(doc):
+            raise AssertionError("unused component was not disabled")
+        
+        nlp.add_pipe("fails_if_run", name="lemmatizer")
+        # Forces the long last paragraph to be split
+        nlp.max_length = 60
+        
+        self.parser.nlp = nlp
+        self.parser.nlp_batch_size = 2
+        text = "Owners: Oceanic Shipping\n\nLoad port: Santos\n\n" * 3 + "bound for " * 20 + "Santos\n"
+        result = self.parser._perform_nlp_analysis(text)
+        
+        assert [e["label"] for e in result["entities"]] == ["ORG", "GPE"] * 3 + ["GPE"]
+        for entity in result["entities"]:
+            assert text[entity["start"]:entity["end"]] == entity["text"]
+    
     @pytest.mark.asyncio
     async def test_parse_invalid_file(self):
         """Test parsing of invalid file"""
@@ -165,6 +192,118 @@ class TestRecapParser:
         
         try:
             with pytest.raises(ValueError, match="Unsupported file format"):
-                self.parser._extract_text(temp_file)
+                list(self.parser._iter_text(temp_file))
+        finally:
+            os.unlink(temp_file)
+    
+    def test_extract_terms_stream_matches_full_text(self, sample_recap_text):
+        """Test that block-by-block extraction equals extraction on the whole text"""
+        blocks = list(iter_paragraph_blocks(sample_recap_text.splitlines(keepends=True)))
+        assert len(blocks) > 1
+        
+        terms, read_blocks, early_exit = self.parser._extract_terms_stream(blocks)
+        
+        assert terms == self.parser._extract_terms(sample_recap_text)
+        assert "".join(read_blocks) == sample_recap_text
+        assert not early_exit
+    
+    def test_label_and_value_in_separate_blocks(self):
+        """Test that a value after a blank line is still found"""
+        blocks = ["Vessel:\n\n", "OCEAN STAR\n"]
+        terms, _, _ = self.parser._extract_terms_stream(blocks)
+        
+        assert terms['vessel'][0]['value'] == 'ocean star'
+    
+    @pytest.mark.asyncio
+    async def test_parse_stops_after_required_terms(self):
+        """Test that a trailing email chain is skipped once required terms are filled"""
+        recap_text = (
+            "Vessel: OCEAN STAR\nCharterer: ABC Trading Ltd\nOwner: XYZ Shipping\n\n"
+            "Cargo: Iron Ore\nQuantity: 50,000 MT\n\n"
+            "Loading Port: Port Hedland\nDischarge Port: Qingdao\nFreight: $25.50 per MT\n"
+        )
+        email_chain = "\n\n".join(f"From: broker{i}@example.com\nSubject: RE: fixture" for i in range(50))
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+            f.write(recap_text + "\n\n" + email_chain)
+            temp_file = f.name
+        
+        try:
+            full = await self.parser.parse(temp_file)
+            early = await self.parser.parse(temp_file, template_type="GENCON", with_amendments=False)
+            
+            assert not full["stream_info"]["early_exit"]
+            assert early["stream_info"]["early_exit"]
+            assert early["stream_info"]["blocks_read"] < full["stream_info"]["blocks_read"]
+            assert "broker49" not in early["original_text"]
+            
+            for term_type in self.parser._required_terms("GENCON"):
+                assert early["terms"][term_type][0]["value"] == full["terms"][term_type][0]["value"]
         finally:
             os.unlink(temp_file)
+    
+    @pytest.mark.asyncio
+    async def test_amendments_found_past_required_terms(self):
+        """Test that amendments after the required terms are found without rereading"""
+        recap_text = (
+            "Vessel: OCEAN STAR\nCharterer: ABC Trading Ltd\nOwner: XYZ Shipping\n\n"
+            "Cargo: Iron Ore\nQuantity: 50,000 MT\n\n"
+            "Loading Port: Port Hedland\nDischarge Port: Qingdao\nFreight: $25.50 per MT\n\n"
+            "Clause 4 deleted\n\nOther terms as per Gencon 94"
+        )
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+            f.write(recap_text)
+            temp_file = f.name
+        
+        try:
+            parsed = await self.parser.parse(temp_file, template_type="GENCON")
+            terms_only = await self.parser.parse(temp_file, template_type="GENCON", with_amendments=False)
+            
+            assert parsed["stream_info"]["early_exit"]
+            assert parsed["original_text"] == recap_text
+            assert "Clause 4 deleted" not in terms_only["original_text"]
+            assert [(a["action"], a["clause"]) for a in parsed["amendments"]] == [("delete", "4")]
+            assert terms_only["amendments"] == []
+            assert terms_only["terms"] == parsed["terms"]
+        finally:
+            os.unlink(temp_file)
+    
+    @pytest.mark.asyncio
+    async def test_parse_modes_decide_nlp(self, monkeypatch):
+        """Test that tiered mode only runs NLP for terms regex left unfilled"""
+        nlp_runs = []
+        monkeypatch.setattr(self.parser, "_perform_nlp_analysis",
+                            lambda text: nlp_runs.append(text) or self.parser._empty_nlp_analysis())
+        
+        complete = (
+            "Vessel: OCEAN STAR\nCharterer: ABC Trading Ltd\nOwner: XYZ Shipping\n"
+            "Cargo: Iron Ore\nQuantity: 50,000 MT\n"
+            "Loading Port: Port Hedland\nDischarge Port: Qingdao\nFreight: $25.50 per MT\n"
+        )
+        without_charterer = complete.replace("Charterer: ABC Trading Ltd\n", "")
+        
+        files = []
+        try:
+            for text in (complete, without_charterer):
+                with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+                    f.write(text)
+                    files.append(f.name)
+            
+            result = await self.parser.parse(files[0], template_type="GENCON")
+            assert not result["extraction_info"]["nlp_run"]
+            
+            result = await self.parser.parse(files[1], template_type="GENCON")
+            assert result["extraction_info"]["nlp_run"]
+            assert result["extraction_info"]["missing_terms"] == ["charterer"]
+            assert len(nlp_runs) == 1
+            
+            assert not (await self.parser.parse(files[1], template_type="GENCON", mode="fast"))["extraction_info"]["nlp_run"]
+            assert (await self.parser.parse(files[0], template_type="GENCON", mode="full"))["extraction_info"]["nlp_run"]
+            assert len(nlp_runs) == 2
+            
+            with pytest.raises(ValueError):
+                await self.parser.parse(files[0], mode="thorough")
+        finally:
+            for path in files:
+                os.unlink(path)
@@ -0,0 +1,71 @@
+"""
+Tests for RegexGuard
+"""
+
+import re
+
+from src.utils.regex_guard import RegexGuard
+from src.utils.pattern_scanner import PatternScanner
+from src.parsers.recap_parser import RecapParser
+
+
+# Quadratic in the number of unclosed parentheses on the line
+BACKTRACKING_PATTERN = r'\(.*?\)'
+BACKTRACKING_TEXT = "( abc " * 4000
+
+
+class TestRegexGuard:
+    """Test cases for RegexGuard"""
+    
+    def test_matches_finditer_within_budget(self):
+        """Test that a guarded scan yields the same matches as re.finditer"""
+        guard = RegexGuard(1.0)
+        text = "Vessel (TBN) - laydays 01/03/2024 (to be advised)\n" * 50
+        compiled = guard.compile(BACKTRACKING_PATTERN)
+        
+        guarded = [m.span() for m in guard.finditer("brackets", compiled, text)]
+        assert guarded == [m.span() for m in re.finditer(BACKTRACKING_PATTERN, text)]
+        assert guard.tripped == []
+    
+    def test_trips_on_backtracking(self):
+        """Test that an overrunning rule stops and is reported"""
+        guard = RegexGuard(0.05)
+        compiled = guard.compile(BACKTRACKING_PATTERN)
+        
+        assert list(guard.finditer("brackets", compiled, BACKTRACKING_TEXT)) == []
+        assert len(guard.tripped) == 1
+        
+        tripped = guard.tripped[0]
+        assert tripped["rule"] == "brackets"
+        assert tripped["pattern"] == BACKTRACKING_PATTERN
+        assert tripped["text_length"] == len(BACKTRACKING_TEXT)
+        
+        guard.reset()
+        assert guard.tripped == []
+    
+    def test_scanner_skips_tripped_rule_only(self):
+        """Test that other rules of a scanner still run after one trips"""
+        guard = RegexGuard(0.05)
+        scanner = PatternScanner({
+            "parenthetical": [BACKTRACKING_PATTERN],
+            "underscores": [r'_{3,}']
+        }, guard=guard)
+        
+        matches = list(scanner.iter_matches(BACKTRACKING_TEXT + "____"))
+        assert [(name, m.group(0)) for name, m in matches] == [("underscores", "____")]
+        assert [t["rule"] for t in guard.tripped] == ["parenthetical"]
+    
+    def test_unguarded_uses_re(self):
+        """Test that no budget means plain re patterns"""
+        guard = RegexGuard(None)
+        assert isinstance(guard.compile("x"), re.Pattern)
+        assert not guard.interruptible
+    
+    def test_recap_parser_reports_tripped_rules(self):
+        """Test that a recap parse lists the rules that ran out of time"""
+        parser = RecapParser(regex_time_budget=0.05)
+        terms = parser._extract_terms("lay " * 20000)
+        
+        tripped = [t["rule"] for t in parser.regex_guard.tripped]
+        assert "laycan" in tripped
+        assert terms.get("laycan", []) == []
@@ -0,0 +1,75 @@
+"""
+Tests for TemplateFingerprintIndex
+"""
+
+import json
+
+from src.utils.template_fingerprint import TemplateFingerprintIndex, estimate_similarity, stable_hash
+
+
+def section_hashes(count, start=0):
+    """Hashes standing in for the sections of a template"""
+    return [stable_hash(f"section {i}") for i in range(start, start + count)]
+
+
+class TestTemplateFingerprintIndex:
+    """Test cases for TemplateFingerprintIndex"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.index = TemplateFingerprintIndex(threshold=0.7, num_hashes=64)
+    
+    def test_similarity_estimate(self):
+        """Test that the estimate tracks the Jaccard similarity"""
+        first = self.index.signature(section_hashes(200))
+        second = self.index.signature(section_hashes(200, start=20))
+        
+        assert estimate_similarity(first, first, 64) == 1.0
+        # True Jaccard similarity is 180 / 220
+        assert abs(estimate_similarity(first, second, 64) - 180 / 220) < 0.15
+    
+    def test_lookup_finds_family(self):
+        """Test that a near-identical template finds its family and others do not"""
+        family_id = self.index.add(self.index.signature(section_hashes(200)), {"name": "gencon"})
+        self.index.add(self.index.signature(section_hashes(200, start=1000)), {"name": "nype"})
+        
+        found = self.index.lookup(self.index.signature(section_hashes(200, start=5)))
+        assert found[0] == family_id
+        assert self.index.get(found[0]) == {"name": "gencon"}
+        assert self.index.lookup(self.index.signature(section_hashes(200, start=5000))) is None
+    
+    def test_add_replaces_member_and_evicts(self):
+        """Test that a family keeps its latest member and old families are evicted"""
+        index = TemplateFingerprintIndex(max_families=2)
+        first = index.add(index.signature(section_hashes(50)), {"version": 1})
+        index.add(index.signature(section_hashes(50, start=2)), {"version": 2}, first)
+        assert len(index) == 1
+        assert index.get(first) == {"version": 2}
+        
+        index.add(index.signature(section_hashes(50, start=500)), {})
+        index.add(index.signature(section_hashes(50, start=900)), {})
+        assert len(index) == 2
+        assert index.get(first) is None
+        assert index.lookup(index.signature(section_hashes(50))) is None
+    
+    def test_round_trip(self):
+        """Test that the index survives JSON serialisation"""
+        family_id = self.index.add(self.index.signature(section_hashes(100)), {"sections": [1, 2]})
+        
+        restored = TemplateFingerprintIndex.from_dict(json.loads(json.dumps(self.index.to_dict())))
+        found = restored.lookup(restored.signature(section_hashes(100)))
+        assert found == (family_id, 1.0)
+        assert restored.get(family_id) == {"sections": [1, 2]}
+    
+    def test_save_and_load(self, tmp_path):
+        """Test that a saved index loads back and a missing file gives an empty one"""
+        path = tmp_path / "index" / "families.json"
+        family_id = self.index.add(self.index.signature(section_hashes(100)), {"name": "gencon"})
+        self.index.save(str(path))
+        
+        restored = TemplateFingerprintIndex.load(str(path))
+        assert restored.lookup(restored.signature(section_hashes(100))) == (family_id, 1.0)
+        
+        empty = TemplateFingerprintIndex.load(str(tmp_path / "missing.json"), num_hashes=64)
+        assert len(empty) == 0
+        assert empty.num_hashes == 64
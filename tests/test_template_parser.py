@@ -95,30 +95,6 @@ class TestTemplateParser:
         freight_fields = [f for f in fields if f.get('type') == 'freight_rate']
         assert len(freight_fields) > 0
     
-    def test_is_duplicate_field(self):
-        """Test duplicate field detection"""
-        existing_fields = [
-            {
-                'type': 'vessel_name',
-                'position': (10, 20)
-            }
-        ]
-        
-        # Overlapping field
-        new_field_overlap = {
-            'type': 'vessel_name', 
-            'position': (15, 25)
-        }
-        
-        # Non-overlapping field
-        new_field_separate = {
-            'type': 'charterer',
-            'position': (50, 60)
-        }
-        
-        assert self.parser._is_duplicate_field(existing_fields, new_field_overlap) == True
-        assert self.parser._is_duplicate_field(existing_fields, new_field_separate) == False
-    
     def test_get_context(self):
         """Test context extraction"""
         text = "This is a test text for context extraction around a specific position"
@@ -210,3 +186,41 @@ class TestTemplateParser:
                 await self.parser.parse(temp_file)
         finally:
             os.unlink(temp_file)
+    
+    def test_family_reuse_matches_full_parse(self):
+        """Test that a near-identical template reuses sections and parses the same"""
+        sections = [
+            f"{i}. CLAUSE {i} TITLE\nThe owners shall provide ______ per day demurrage and "
+            f"the charterer: ______ shall nominate the loading port {i}."
+            for i in range(1, 21)
+        ]
+        original = "\n\n".join(sections)
+        self.parser._extract_fields_and_clauses(original)
+        
+        # Edit one clause and add a field that runs across a blank line
+        sections[4] = sections[4].replace("demurrage", "despatch")
+        sections[10] += " ______"
+        sections[11] = "vessel " + sections[11]
+        changed = "\n\n".join(sections)
+        
+        fields, clauses, family = self.parser._extract_fields_and_clauses(changed)
+        
+        assert family["similarity"] is not None
+        assert 0 < family["reused_sections"] < family["sections"]
+        assert fields == self.parser._extract_fields(changed)
+        assert clauses == self.parser._extract_clauses(changed)
+        assert any(f["match"].startswith("______\n\nvessel") for f in fields)
+    
+    def test_families_survive_restart(self, tmp_path):
+        """Test that template families saved by one parser are found by the next"""
+        path = tmp_path / "fingerprints" / "template_families.json"
+        sections = [f"{i}. CLAUSE {i}\nThe charterer: ______ shall pay." for i in range(1, 11)]
+        
+        TemplateParser(fingerprint_path=str(path))._extract_fields_and_clauses("\n\n".join(sections))
+        assert path.exists()
+        
+        sections[3] = sections[3].replace("pay", "remit")
+        restarted = TemplateParser(fingerprint_path=str(path))
+        _, _, family = restarted._extract_fields_and_clauses("\n\n".join(sections))
+        assert family["similarity"] is not None
+        assert family["reused_sections"] > 0
@@ -0,0 +1,67 @@
+"""
+Tests for TemplatePreprocessor
+"""
+
+import pytest
+
+from src.parsers.template_parser import TemplateParser
+from src.preprocessors.template_preprocessor import TemplatePreprocessor
+
+
+def parse_text(text):
+    """A parsed template as TemplateParser.parse builds it, without a file"""
+    parser = TemplateParser()
+    fields, clauses, family = parser._extract_fields_and_clauses(text)
+    return {
+        "original_text": text,
+        "template_type": "GENCON",
+        "fields": fields,
+        "structure": parser._analyze_structure(text),
+        "clauses": clauses,
+        "file_info": {"filename": "template.pdf", "file_type": ".pdf"},
+        "family": family,
+        "tripped_rules": []
+    }
+
+
+class TestTemplatePreprocessor:
+    """Test cases for TemplatePreprocessor"""
+    
+    def setup_method(self):
+        """Setup for each test method"""
+        self.preprocessor = TemplatePreprocessor()
+    
+    @pytest.mark.asyncio
+    async def test_process_all_sections(self, sample_template_text):
+        """Test that every lazy section is computed by default"""
+        parsed = parse_text(sample_template_text)
+        processed = await self.preprocessor.process(parsed, "GENCON")
+        
+        for section in TemplatePreprocessor.LAZY_SECTIONS:
+            assert section in processed
+        assert processed["structured_fields"]
+        assert processed["original_data"]["original_text"] == sample_template_text
+        assert "fields" not in processed["original_data"]
+        assert "clauses" not in processed["original_data"]
+    
+    @pytest.mark.asyncio
+    async def test_materialize_on_demand(self, sample_template_text):
+        """Test that sections left out are computed later, once, as process would have"""
+        parsed = parse_text(sample_template_text)
+        eager = await self.preprocessor.process(parsed, "GENCON")
+        lazy = await self.preprocessor.process(parsed, "GENCON", sections=[])
+        
+        assert not any(section in lazy for section in TemplatePreprocessor.LAZY_SECTIONS)
+        assert self.preprocessor.materialize(lazy, parsed, ["fillable_areas", "formatting_info"]) == [
+            "fillable_areas", "formatting_info"
+        ]
+        assert self.preprocessor.materialize(lazy, parsed, ["fillable_areas"]) == []
+        assert lazy["fillable_areas"] == eager["fillable_areas"]
+        assert lazy["formatting_info"] == eager["formatting_info"]
+        assert "template_structure" not in lazy
+    
+    @pytest.mark.asyncio
+    async def test_unknown_section(self, sample_template_text):
+        """Test that unknown section names are rejected"""
+        with pytest.raises(ValueError):
+            await self.preprocessor.process(parse_text(sample_template_text), "GENCON", sections=["layout"])